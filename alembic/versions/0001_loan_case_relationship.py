@@ -0,0 +1,44 @@
+"""Replace credit_underwriters.loan_cases ARRAY with an indexed foreign key
+
+Databases created before migrations existed were built by create_all, so the
+statements are idempotent (IF EXISTS / IF NOT EXISTS).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Ownership lives on loan_cases.underwriter_id; the copy on the user row goes
+    op.execute("ALTER TABLE credit_underwriters DROP COLUMN IF EXISTS loan_cases")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_loan_cases_underwriter_id "
+        "ON loan_cases (underwriter_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_loan_cases_underwriter_id")
+    op.add_column(
+        "credit_underwriters",
+        sa.Column("loan_cases", sa.ARRAY(sa.Integer()), nullable=True),
+    )
+    # Rebuild the denormalized list from the foreign key
+    op.execute(
+        "UPDATE credit_underwriters u SET loan_cases = COALESCE("
+        "(SELECT array_agg(c.id ORDER BY c.id) FROM loan_cases c WHERE c.underwriter_id = u.id), "
+        "'{}')"
+    )
@@ -0,0 +1,39 @@
+"""Composite indexes for keyset-paginated, filtered loan case listing
+
+(underwriter_id, id) replaces the single-column underwriter_id index; its
+leading column serves every lookup the old index did.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_loan_cases_underwriter_id_id": "underwriter_id, id",
+    "ix_loan_cases_underwriter_type_id": "underwriter_id, loan_type, id",
+    "ix_loan_cases_underwriter_amount": "underwriter_id, loan_amount",
+    "ix_loan_cases_underwriter_tenure": "underwriter_id, loan_tenure",
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON loan_cases ({columns})")
+    op.execute("DROP INDEX IF EXISTS ix_loan_cases_underwriter_id")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_loan_cases_underwriter_id ON loan_cases (underwriter_id)")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
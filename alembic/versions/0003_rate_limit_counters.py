@@ -0,0 +1,31 @@
+"""Shared counters for the postgres rate limit backend
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS rate_limit_counters ("
+        "key VARCHAR(320) NOT NULL, "
+        "window_start BIGINT NOT NULL, "
+        "count INTEGER NOT NULL, "
+        "PRIMARY KEY (key, window_start))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS rate_limit_counters")
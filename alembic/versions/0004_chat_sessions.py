@@ -0,0 +1,49 @@
+"""Persistent chat sessions and their append-only messages
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS chat_sessions ("
+        "id VARCHAR(32) NOT NULL PRIMARY KEY, "
+        "underwriter_id INTEGER NOT NULL REFERENCES credit_underwriters (id) ON DELETE CASCADE, "
+        "loan_case_id INTEGER REFERENCES loan_cases (id) ON DELETE CASCADE, "
+        "message_count INTEGER NOT NULL, "
+        "summary TEXT, "
+        "summary_through_seq INTEGER NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(), "
+        "updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now())"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_sessions_underwriter_case_updated "
+        "ON chat_sessions (underwriter_id, loan_case_id, updated_at)"
+    )
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS chat_messages ("
+        "session_id VARCHAR(32) NOT NULL REFERENCES chat_sessions (id) ON DELETE CASCADE, "
+        "seq INTEGER NOT NULL, "
+        "role VARCHAR(16) NOT NULL, "
+        "text TEXT NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(), "
+        "PRIMARY KEY (session_id, seq))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS chat_messages")
+    op.execute("DROP TABLE IF EXISTS chat_sessions")
@@ -0,0 +1,47 @@
+"""Scorecard batch jobs and items, readable from every worker
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS scorecard_batch_jobs ("
+        "id VARCHAR(32) NOT NULL PRIMARY KEY, "
+        "underwriter_id INTEGER NOT NULL REFERENCES credit_underwriters (id) ON DELETE CASCADE, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(), "
+        "heartbeat_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(), "
+        "finished_at TIMESTAMP WITHOUT TIME ZONE)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_scorecard_batch_jobs_created_at ON scorecard_batch_jobs (created_at)"
+    )
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS scorecard_batch_items ("
+        "job_id VARCHAR(32) NOT NULL REFERENCES scorecard_batch_jobs (id) ON DELETE CASCADE, "
+        "case_id INTEGER NOT NULL, "
+        "position INTEGER NOT NULL, "
+        "status VARCHAR(16) NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "error TEXT, "
+        "scorecard JSON, "
+        "PRIMARY KEY (job_id, case_id))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS scorecard_batch_items")
+    op.execute("DROP TABLE IF EXISTS scorecard_batch_jobs")
@@ -0,0 +1,31 @@
+"""Link documents to the loan case they were uploaded for
+
+Direct uploads attach a document to a loan case. Databases built by
+create_all before the column existed get it here, so the statements are
+idempotent.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS documents ADD COLUMN IF NOT EXISTS loan_case_id INTEGER REFERENCES loan_cases (id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documents_loan_case_id ON documents (loan_case_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_loan_case_id")
+    op.execute("ALTER TABLE IF EXISTS documents DROP COLUMN IF EXISTS loan_case_id")
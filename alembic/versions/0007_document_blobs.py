@@ -0,0 +1,71 @@
+"""Move the dedup index from documents to document_blobs
+
+documents.sha256 was unique, so a duplicate upload got no row of its own. Each
+upload now gets a documents row, and content with a verified hash is shared
+through document_blobs. Existing rows from ZIP uploads (hashed server-side)
+are backfilled into blobs; direct uploads carry client-declared hashes and
+are left outside the index.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS document_blobs ("
+        "id SERIAL PRIMARY KEY, "
+        "sha256 VARCHAR(64) NOT NULL, "
+        "s3_path VARCHAR NOT NULL, "
+        "mime_type VARCHAR, "
+        "size_bytes BIGINT NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now())"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_document_blobs_id ON document_blobs (id)")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_document_blobs_sha256 ON document_blobs (sha256)")
+
+    if not sa.inspect(op.get_bind()).has_table("documents"):
+        return
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS blob_id INTEGER REFERENCES document_blobs (id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documents_blob_id ON documents (blob_id)")
+    op.execute(
+        "INSERT INTO document_blobs (sha256, s3_path, mime_type, size_bytes, created_at) "
+        "SELECT sha256, s3_path, mime_type, size_bytes, created_at FROM documents "
+        "WHERE loan_case_id IS NULL AND sha256 IS NOT NULL "
+        "ON CONFLICT (sha256) DO NOTHING"
+    )
+    op.execute(
+        "UPDATE documents d SET blob_id = b.id FROM document_blobs b "
+        "WHERE d.loan_case_id IS NULL AND d.blob_id IS NULL AND b.sha256 = d.sha256"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_documents_sha256")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documents_sha256 ON documents (sha256)")
+    op.execute("ALTER TABLE documents ALTER COLUMN sha256 DROP NOT NULL")
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("documents"):
+        # The old schema has one row per hash: keep the first and drop rows without one
+        op.execute(
+            "DELETE FROM documents WHERE sha256 IS NULL OR id NOT IN "
+            "(SELECT min(id) FROM documents WHERE sha256 IS NOT NULL GROUP BY sha256)"
+        )
+        op.execute("ALTER TABLE documents ALTER COLUMN sha256 SET NOT NULL")
+        op.execute("DROP INDEX IF EXISTS ix_documents_sha256")
+        op.execute("CREATE UNIQUE INDEX ix_documents_sha256 ON documents (sha256)")
+        op.execute("DROP INDEX IF EXISTS ix_documents_blob_id")
+        op.execute("ALTER TABLE documents DROP COLUMN IF EXISTS blob_id")
+    op.execute("DROP TABLE IF EXISTS document_blobs")
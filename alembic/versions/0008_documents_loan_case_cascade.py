@@ -0,0 +1,39 @@
+"""Delete a loan case's documents with the case
+
+documents.loan_case_id was added without ON DELETE, so deleting a case that
+had documents failed on the foreign key. Recreate the constraint with ON
+DELETE CASCADE.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE IF EXISTS documents "
+        "DROP CONSTRAINT IF EXISTS documents_loan_case_id_fkey, "
+        "ADD CONSTRAINT documents_loan_case_id_fkey FOREIGN KEY (loan_case_id) "
+        "REFERENCES loan_cases (id) ON DELETE CASCADE"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "ALTER TABLE IF EXISTS documents "
+        "DROP CONSTRAINT IF EXISTS documents_loan_case_id_fkey, "
+        "ADD CONSTRAINT documents_loan_case_id_fkey FOREIGN KEY (loan_case_id) "
+        "REFERENCES loan_cases (id)"
+    )
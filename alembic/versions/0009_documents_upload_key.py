@@ -0,0 +1,31 @@
+"""Register each direct upload once
+
+documents.upload_key records the object key a direct upload was completed
+under. Its unique index makes a repeated or concurrent completion return the
+existing document instead of adding another.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS documents ADD COLUMN IF NOT EXISTS upload_key VARCHAR")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_documents_upload_key ON documents (upload_key)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_upload_key")
+    op.execute("ALTER TABLE IF EXISTS documents DROP COLUMN IF EXISTS upload_key")
@@ -1,20 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from ..database.database import SessionLocal
 from .security import verify_token
 from ..utils.logger import logger
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def token_payload(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Please log in to access",
@@ -23,11 +14,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
     if not token:
         raise credentials_exception
-    
+
     payload = verify_token(token)
     if not payload:
         logger.warning("Invalid token provided")
         raise credentials_exception
-    
-    # Normally we'd fetch user from DB, but we'll return email for simplicity
-    return payload.get("sub")
\ No newline at end of file
+    return payload
+
+# Both dependencies only decode the (cached) token, so they run on the event
+# loop and never open a database session of their own
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return token_payload(token).get("sub")
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """Underwriter id from the token's uid claim"""
+    user_id = token_payload(token).get("uid")
+    if user_id is None:
+        # Issued before tokens carried the id; a fresh login fixes it
+        logger.warning("Token without uid claim provided")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Please log in to access",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
@@ -0,0 +1,104 @@
+"""
+bcrypt on a dedicated process pool.
+
+Hashing is CPU-bound and deliberately slow, so running it on the request
+threadpool lets a burst of logins or signups starve every other route. The
+pool bounds how many hashes run at once, and callers on the event loop await
+it without holding a threadpool slot. The worker functions only depend on
+passlib, so worker processes stay light.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    # Hashes below the configured cost are flagged for rehash; stronger ones are left alone
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def verify_password(password: str, hashed: str, rounds: int) -> bool:
+    return crypt_context(rounds).verify(password, hashed)
+
+
+def verify_and_update(password: str, hashed: str, rounds: int):
+    """(valid, new hash or None); a new hash is returned when the stored cost is too low"""
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs the functions above on a size-limited process pool, or inline when
+    workers is 0 (useful for tests and single-core deployments).
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Created on first use so importing the app doesn't fork processes
+        if self.workers and self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a process that already runs threads can deadlock
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def _submit(self, func, *args):
+        return self.executor.submit(func, *args, self.rounds)
+
+    # Blocking API, for sync code already running on a worker thread
+    def hash(self, password: str) -> str:
+        if not self.workers:
+            return hash_password(password, self.rounds)
+        return self._submit(hash_password, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        if not self.workers:
+            return verify_password(password, hashed, self.rounds)
+        return self._submit(verify_password, password, hashed).result()
+
+    def verify_and_update(self, password: str, hashed: str):
+        if not self.workers:
+            return verify_and_update(password, hashed, self.rounds)
+        return self._submit(verify_and_update, password, hashed).result()
+
+    # Awaitable API, for the event loop
+    async def _run(self, func, *args):
+        if not self.workers:
+            # Inline mode still keeps bcrypt off the event loop
+            return await asyncio.to_thread(func, *args, self.rounds)
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    async def verify_and_update_async(self, password: str, hashed: str):
+        return await self._run(verify_and_update, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
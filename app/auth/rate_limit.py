@@ -0,0 +1,217 @@
+"""
+Sliding-window rate limiting for the password routes.
+
+Every /login attempt costs a bcrypt verify and every successful
+/forgot-password a bcrypt hash, so a credential-stuffing burst can keep all
+hashing workers busy. Attempts are counted per email and per client IP and
+rejected with 429 before the user lookup or any hashing happens. Rejected
+attempts are counted too, so a client that keeps hammering stays locked out.
+
+The window is the two-bucket approximation: hits in the current fixed window
+plus the previous window's hits weighted by how much of it still overlaps
+the sliding window. That keeps two counters per key, which makes it cheap to
+share through a backend. Backends only count hits; the limiter does the
+maths, so a new backend just needs a `hit` method.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import defaultdict
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from ..database.database import SessionLocal
+from ..database.models import RateLimitCounter
+from ..utils.config import settings
+from ..utils.logger import logger
+
+
+class MemoryRateLimitBackend:
+    """Counters in this process only; each worker limits on its own"""
+
+    SWEEP_EVERY = 1024
+
+    def __init__(self):
+        self._counters = {}  # key -> [window_start, previous, current]
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key: str, window_start: int, window: int):
+        """Count one hit and return (previous window count, current window count)"""
+        with self._lock:
+            self._hits += 1
+            if self._hits % self.SWEEP_EVERY == 0:
+                self._sweep(window_start - window)
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < window_start - window:
+                entry = self._counters[key] = [window_start, 0, 0]
+            elif entry[0] < window_start:
+                entry[:] = [window_start, entry[2], 0]
+            entry[2] += 1
+            return entry[1], entry[2]
+
+    def _sweep(self, oldest: int):
+        # Keys whose last hit is older than the previous window can't affect a decision
+        for key in [k for k, entry in self._counters.items() if entry[0] < oldest]:
+            del self._counters[key]
+
+
+class PostgresRateLimitBackend:
+    """
+    Counters in the rate_limit_counters table, shared by every worker and
+    replica. One round trip per key: upsert the current window and read the
+    previous one in the same statement.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._hits = 0
+
+    def hit(self, key: str, window_start: int, window: int):
+        counters = RateLimitCounter.__table__
+        upsert = (
+            insert(counters)
+            .values(key=key, window_start=window_start, count=1)
+            .on_conflict_do_update(
+                index_elements=[counters.c.key, counters.c.window_start],
+                set_={"count": counters.c.count + 1},
+            )
+            .returning(counters.c.count)
+            .cte("hit")
+        )
+        previous = (
+            select(counters.c.count)
+            .where(counters.c.key == key, counters.c.window_start == window_start - window)
+            .scalar_subquery()
+        )
+        with SessionLocal() as db:
+            row = db.execute(select(previous, upsert.c.count)).one()
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                db.execute(counters.delete().where(counters.c.window_start < window_start - window))
+            db.commit()
+        return row[0] or 0, row[1]
+
+
+class NoRateLimitBackend:
+    def hit(self, key: str, window_start: int, window: int):
+        return 0, 0
+
+
+def counter_key(action: str, key_type: str, value: str) -> str:
+    """Fixed-length backend key; the value is client-supplied and unbounded"""
+    return f"{action}:{key_type}:{hashlib.sha256(value.encode()).hexdigest()}"
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "postgres": PostgresRateLimitBackend,
+    "none": NoRateLimitBackend,
+}
+
+
+class RateLimiter:
+    """
+    Applies per-action limits, e.g. {"login": {"email": 10, "ip": 100}}, with
+    one sliding window length for all of them. Backend failures fail open so
+    an unavailable counter store doesn't lock everyone out.
+    """
+
+    def __init__(self, backend, window_seconds: int, limits: dict):
+        self.backend = backend
+        self.window = window_seconds
+        self.limits = limits
+        self.blocking = isinstance(backend, PostgresRateLimitBackend)
+        self._decisions = defaultdict(lambda: {"allowed": 0, "limited": 0})
+        self._backend_errors = 0
+        self._lock = threading.Lock()
+
+    def retry_after(self, previous: int, current: int, elapsed: float, limit: int) -> int:
+        """Seconds until one more attempt would be allowed, if none are made meanwhile"""
+        if current + 1 <= limit:
+            # Wait for the previous window's weight to decay enough
+            wait = self.window * (1 - (limit - current - 1) / previous) - elapsed
+        else:
+            # The current window becomes the previous one and has to decay instead
+            wait = self.window - elapsed + max(0.0, self.window * (1 - (limit - 1) / current))
+        return max(1, math.ceil(wait))
+
+    def check(self, action: str, keys: dict, now: float = None):
+        """
+        Count an attempt against every key of the action (key type -> value)
+        and return None if it's allowed, or the Retry-After seconds if not.
+        """
+        now = time.time() if now is None else now
+        window_start = int(now // self.window) * self.window
+        elapsed = now - window_start
+        retry_after = None
+        for key_type, value in keys.items():
+            limit = self.limits[action][key_type]
+            try:
+                previous, current = self.backend.hit(counter_key(action, key_type, value), window_start, self.window)
+            except Exception as e:
+                logger.error(f"Rate limit backend failed, allowing request: {str(e)}")
+                with self._lock:
+                    self._backend_errors += 1
+                continue
+            estimate = previous * (self.window - elapsed) / self.window + current
+            limited = estimate > limit
+            with self._lock:
+                self._decisions[f"{action}:{key_type}"]["limited" if limited else "allowed"] += 1
+            if limited:
+                wait = self.retry_after(previous, current, elapsed, limit)
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "window_seconds": self.window,
+                "limits": self.limits,
+                "decisions": {name: dict(counts) for name, counts in self._decisions.items()},
+                "backend_errors": self._backend_errors,
+            }
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(request: Request, action: str, email: str):
+    """Raise 429 if this client or email has used up its attempts for the action"""
+    keys = {"email": email.strip().lower(), "ip": client_ip(request)}
+    if rate_limiter.blocking:
+        retry_after = await run_in_threadpool(rate_limiter.check, action, keys)
+    else:
+        retry_after = rate_limiter.check(action, keys)
+    if retry_after is not None:
+        logger.warning(f"Rate limited {action} for email {keys['email']} from {keys['ip']}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+rate_limiter = RateLimiter(
+    RATE_LIMIT_BACKENDS[settings.RATE_LIMIT_BACKEND](),
+    settings.RATE_LIMIT_WINDOW_SECONDS,
+    {
+        "login": {
+            "email": settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+            "ip": settings.RATE_LIMIT_LOGIN_PER_IP,
+        },
+        "forgot_password": {
+            "email": settings.RATE_LIMIT_FORGOT_PASSWORD_PER_EMAIL,
+            "ip": settings.RATE_LIMIT_FORGOT_PASSWORD_PER_IP,
+        },
+    },
+)
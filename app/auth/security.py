@@ -1,16 +1,22 @@
-from passlib.context import CryptContext
+import threading
+import time
+from collections import OrderedDict
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from ..utils.config import settings
 from ..utils.logger import logger
+from .hashing import PasswordHasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS
+)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -21,10 +27,29 @@ def create_access_token(data: dict):
     )
     return encoded_jwt
 
+# Verified token payloads, kept until the token expires
+_verified_tokens: "OrderedDict[str, dict]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
 def verify_token(token: str):
+    now = time.time()
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(token)
+        if payload is not None:
+            if payload["exp"] > now:
+                _verified_tokens.move_to_end(token)
+                return payload
+            del _verified_tokens[token]
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError as e:
         logger.error(f"JWT verification error: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+    if "exp" in payload:
+        with _verified_tokens_lock:
+            _verified_tokens[token] = payload
+            while len(_verified_tokens) > settings.TOKEN_CACHE_MAX_ENTRIES:
+                _verified_tokens.popitem(last=False)
+    return payload
\ No newline at end of file
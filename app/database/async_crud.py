@@ -0,0 +1,95 @@
+"""
+AsyncSession versions of the user and loan-case operations in crud.py,
+used by the async routers when DB_ASYNC_MODE is enabled.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import CreditUnderwriter, LoanCase
+from .crud import update_loan_case_statement, delete_loan_case_statement, loan_case_page_statement
+from .schemas import (
+    CreditUnderwriterCreate,
+    LoanCaseCreate,
+    LoanCaseUpdate
+)
+from ..utils.logger import logger
+
+# User operations
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(CreditUnderwriter).where(CreditUnderwriter.email == email))
+    return result.scalars().first()
+
+async def get_user_by_email_detached(db: AsyncSession, email: str):
+    """Like crud.get_user_by_email_detached: releases the connection before hashing"""
+    user = await get_user_by_email(db, email)
+    await db.close()
+    return user
+
+async def create_user(db: AsyncSession, user: CreditUnderwriterCreate, hashed_password: str):
+    db_user = CreditUnderwriter(
+        name=user.name,
+        email=user.email,
+        phone=user.phone,
+        password=hashed_password,
+        security_question=user.security_question,
+        security_answer=user.security_answer
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    logger.info(f"User created: {user.email}")
+    return db_user
+
+async def update_user_password(db: AsyncSession, email: str, hashed_password: str):
+    user = await get_user_by_email(db, email)
+    if not user:
+        logger.warning(f"Password update attempt for non-existent user: {email}")
+        return None
+    user.password = hashed_password
+    await db.commit()
+    await db.refresh(user)
+    logger.info(f"Password updated for user: {email}")
+    return user
+
+# Loan case operations
+async def create_loan_case(db: AsyncSession, loan_case: LoanCaseCreate, underwriter_id: int):
+    db_loan_case = LoanCase(
+        **loan_case.dict(),
+        underwriter_id=underwriter_id
+    )
+    db.add(db_loan_case)
+    await db.commit()
+    await db.refresh(db_loan_case)
+    logger.info(f"Loan case created: {db_loan_case.id}")
+    return db_loan_case
+
+async def list_user_loan_cases(db: AsyncSession, underwriter_id: int, limit: int, after_id: int = None, **filters):
+    result = await db.execute(loan_case_page_statement(underwriter_id, limit, after_id, **filters))
+    return result.scalars().all()
+
+async def get_owned_loan_case(db: AsyncSession, case_id: int, underwriter_id: int):
+    result = await db.execute(select(LoanCase).where(
+        LoanCase.id == case_id,
+        LoanCase.underwriter_id == underwriter_id
+    ))
+    return result.scalars().first()
+
+async def update_loan_case(db: AsyncSession, case_id: int, underwriter_id: int, loan_case: LoanCaseUpdate):
+    update_data = loan_case.dict(exclude_unset=True)
+    if not update_data:
+        return await get_owned_loan_case(db, case_id, underwriter_id)
+
+    result = await db.execute(update_loan_case_statement(case_id, underwriter_id, update_data))
+    db_loan_case = result.first()
+    await db.commit()
+    if db_loan_case:
+        logger.info(f"Loan case updated: {case_id}")
+    return db_loan_case
+
+async def delete_loan_case(db: AsyncSession, case_id: int, underwriter_id: int):
+    result = await db.execute(delete_loan_case_statement(case_id, underwriter_id))
+    deleted = result.first()
+    await db.commit()
+    if not deleted:
+        return False
+    logger.info(f"Loan case deleted: {case_id}")
+    return True
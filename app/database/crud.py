@@ -1,19 +1,28 @@
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .models import CreditUnderwriter, LoanCase
+from .models import CreditUnderwriter, LoanCase, Document, DocumentBlob
 from .schemas import (
     CreditUnderwriterCreate,
     LoanCaseCreate,
     LoanCaseUpdate
 )
-from ..auth.security import get_password_hash
 from ..utils.logger import logger
 
 # User operations
 def get_user_by_email(db: Session, email: str):
     return db.query(CreditUnderwriter).filter(CreditUnderwriter.email == email).first()
 
-def create_user(db: Session, user: CreditUnderwriterCreate):
-    hashed_password = get_password_hash(user.password)
+def get_user_by_email_detached(db: Session, email: str):
+    """
+    Look a user up and hand the session's connection back to the pool, so it
+    isn't held while a slow password hash runs. The session stays usable.
+    """
+    user = get_user_by_email(db, email)
+    db.close()
+    return user
+
+def create_user(db: Session, user: CreditUnderwriterCreate, hashed_password: str):
     db_user = CreditUnderwriter(
         name=user.name,
         email=user.email,
@@ -28,12 +37,12 @@ def create_user(db: Session, user: CreditUnderwriterCreate):
     logger.info(f"User created: {user.email}")
     return db_user
 
-def update_user_password(db: Session, email: str, new_password: str):
+def update_user_password(db: Session, email: str, hashed_password: str):
     user = get_user_by_email(db, email)
     if not user:
         logger.warning(f"Password update attempt for non-existent user: {email}")
         return None
-    user.password = get_password_hash(new_password)
+    user.password = hashed_password
     db.commit()
     db.refresh(user)
     logger.info(f"Password updated for user: {email}")
@@ -48,50 +57,152 @@ def create_loan_case(db: Session, loan_case: LoanCaseCreate, underwriter_id: int
     db.add(db_loan_case)
     db.commit()
     db.refresh(db_loan_case)
-    
-    # Add loan case to underwriter's list
-    underwriter = db.query(CreditUnderwriter).get(underwriter_id)
-    if underwriter:
-        underwriter.loan_cases = list(set(underwriter.loan_cases + [db_loan_case.id]))
-        db.commit()
-        db.refresh(underwriter)
-    
     logger.info(f"Loan case created: {db_loan_case.id}")
     return db_loan_case
 
-def get_loan_case(db: Session, case_id: int):
-    return db.query(LoanCase).filter(LoanCase.id == case_id).first()
+def user_loan_cases_statement(underwriter_id: int, after_id: int = None,
+                              loan_type: str = None, min_amount: int = None, max_amount: int = None,
+                              min_tenure: int = None, max_tenure: int = None):
+    """An underwriter's cases in id order, optionally filtered and starting after after_id"""
+    stmt = select(LoanCase).where(LoanCase.underwriter_id == underwriter_id)
+    if after_id is not None:
+        stmt = stmt.where(LoanCase.id > after_id)
+    if loan_type is not None:
+        stmt = stmt.where(LoanCase.loan_type == loan_type)
+    if min_amount is not None:
+        stmt = stmt.where(LoanCase.loan_amount >= min_amount)
+    if max_amount is not None:
+        stmt = stmt.where(LoanCase.loan_amount <= max_amount)
+    if min_tenure is not None:
+        stmt = stmt.where(LoanCase.loan_tenure >= min_tenure)
+    if max_tenure is not None:
+        stmt = stmt.where(LoanCase.loan_tenure <= max_tenure)
+    return stmt.order_by(LoanCase.id)
 
-def get_user_loan_cases(db: Session, underwriter_id: int):
-    return db.query(LoanCase).filter(LoanCase.underwriter_id == underwriter_id).all()
+def loan_case_page_statement(underwriter_id: int, limit: int, after_id: int = None, **filters):
+    """
+    One keyset page of an underwriter's cases. Seeks past after_id on the
+    (underwriter_id, id) index instead of using OFFSET, so every page costs
+    the same however deep it is.
+    """
+    return user_loan_cases_statement(underwriter_id, after_id, **filters).limit(limit)
 
-# Update the update_loan_case function
-def update_loan_case(db: Session, case_id: int, loan_case: LoanCaseUpdate):
-    db_loan_case = get_loan_case(db, case_id)
-    if not db_loan_case:
-        return None
-    
+def list_user_loan_cases(db: Session, underwriter_id: int, limit: int, after_id: int = None, **filters):
+    return db.execute(loan_case_page_statement(underwriter_id, limit, after_id, **filters)).scalars().all()
+
+def bulk_insert_loan_cases(db: Session, loan_cases: list[LoanCaseCreate], underwriter_id: int):
+    """Insert a batch in one executemany; the caller owns the transaction"""
+    db.execute(
+        insert(LoanCase),
+        [{**loan_case.dict(), "underwriter_id": underwriter_id} for loan_case in loan_cases]
+    )
+
+def get_owned_loan_case(db: Session, case_id: int, underwriter_id: int):
+    """The case if it exists and belongs to the underwriter, in one query"""
+    return db.query(LoanCase).filter(
+        LoanCase.id == case_id,
+        LoanCase.underwriter_id == underwriter_id
+    ).first()
+
+def update_loan_case_statement(case_id: int, underwriter_id: int, update_data: dict):
+    # Core RETURNING rows aren't expired by the commit, so no refresh query is needed
+    loan_cases = LoanCase.__table__
+    return (
+        update(loan_cases)
+        .where(loan_cases.c.id == case_id, loan_cases.c.underwriter_id == underwriter_id)
+        .values(**update_data)
+        .returning(*loan_cases.c)
+    )
+
+def delete_loan_case_statement(case_id: int, underwriter_id: int):
+    loan_cases = LoanCase.__table__
+    return (
+        delete(loan_cases)
+        .where(loan_cases.c.id == case_id, loan_cases.c.underwriter_id == underwriter_id)
+        .returning(loan_cases.c.id)
+    )
+
+def update_loan_case(db: Session, case_id: int, underwriter_id: int, loan_case: LoanCaseUpdate):
+    """Update an owned case with UPDATE ... RETURNING; None if not found or not owned"""
     update_data = loan_case.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_loan_case, key, value)
-    
+    if not update_data:
+        return get_owned_loan_case(db, case_id, underwriter_id)
+
+    db_loan_case = db.execute(update_loan_case_statement(case_id, underwriter_id, update_data)).first()
     db.commit()
-    db.refresh(db_loan_case)
-    logger.info(f"Loan case updated: {case_id}")
+    if db_loan_case:
+        logger.info(f"Loan case updated: {case_id}")
     return db_loan_case
 
-def delete_loan_case(db: Session, case_id: int):
-    db_loan_case = get_loan_case(db, case_id)
-    if not db_loan_case:
-        return False
-    
-    # Remove from underwriter's list
-    underwriter = db.query(CreditUnderwriter).get(db_loan_case.underwriter_id)
-    if underwriter:
-        underwriter.loan_cases = [case for case in underwriter.loan_cases if case != case_id]
-        db.commit()
-    
-    db.delete(db_loan_case)
+def delete_loan_case(db: Session, case_id: int, underwriter_id: int):
+    """Delete an owned case in one statement; False if not found or not owned"""
+    deleted = db.execute(delete_loan_case_statement(case_id, underwriter_id)).first()
     db.commit()
+    if not deleted:
+        return False
     logger.info(f"Loan case deleted: {case_id}")
-    return True
\ No newline at end of file
+    return True
+
+# Document operations
+def get_blob_by_hash(db: Session, sha256: str, uploaded_by: int = None):
+    """Stored content with this hash; with uploaded_by, only content that user already has a document for"""
+    query = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256)
+    if uploaded_by is not None:
+        query = query.join(Document, Document.blob_id == DocumentBlob.id).filter(Document.uploaded_by == uploaded_by)
+    return query.first()
+
+def create_blob(db: Session, sha256: str, s3_path: str, mime_type: str, size_bytes: int):
+    """
+    Enter verified content in the dedup index. If the same content was
+    registered concurrently, the unique index wins and the existing row is
+    returned instead.
+    """
+    db_blob = DocumentBlob(sha256=sha256, s3_path=s3_path, mime_type=mime_type, size_bytes=size_bytes)
+    db.add(db_blob)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        logger.info(f"Blob {sha256} registered concurrently, reusing existing row")
+        return get_blob_by_hash(db, sha256)
+    db.refresh(db_blob)
+    logger.info(f"Blob registered: {sha256} -> {s3_path}")
+    return db_blob
+
+def get_document_by_upload_key(db: Session, upload_key: str):
+    return db.query(Document).filter(Document.upload_key == upload_key).first()
+
+def create_document(db: Session, original_filename: str, uploaded_by: int = None, loan_case_id: int = None,
+                    blob: DocumentBlob = None, s3_path: str = None, mime_type: str = None, size_bytes: int = None,
+                    upload_key: str = None):
+    """
+    Register one uploaded file. Content in the dedup index is referenced
+    through its blob; content whose hash couldn't be verified is stored with
+    its own s3_path, size and type and no hash. A direct upload is registered
+    once per upload_key; a repeat returns the existing document.
+    """
+    if blob is not None:
+        s3_path, mime_type, size_bytes = blob.s3_path, blob.mime_type, blob.size_bytes
+    db_document = Document(
+        blob_id=blob.id if blob is not None else None,
+        sha256=blob.sha256 if blob is not None else None,
+        s3_path=s3_path,
+        original_filename=original_filename,
+        mime_type=mime_type,
+        size_bytes=size_bytes,
+        uploaded_by=uploaded_by,
+        loan_case_id=loan_case_id,
+        upload_key=upload_key
+    )
+    db.add(db_document)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if upload_key is None:
+            raise
+        logger.info(f"Upload {upload_key} completed concurrently, reusing its document")
+        return get_document_by_upload_key(db, upload_key)
+    db.refresh(db_document)
+    logger.info(f"Document {db_document.id} registered: {original_filename} -> {s3_path}")
+    return db_document
\ No newline at end of file
@@ -1,9 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy_utils import database_exists, create_database
 from ..utils.config import settings
 from ..utils.logger import logger
+from .pool_metrics import register_pool_metrics
+from . import query_metrics  # noqa: F401  (registers query timing hooks)
 from contextlib import contextmanager
 
 
@@ -13,13 +17,42 @@ DATABASE_URL = (
     f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 )
 
-engine = create_engine(DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+sync_pool_metrics = register_pool_metrics("sync")
+engine = create_engine(
+    DATABASE_URL, poolclass=sync_pool_metrics.pool_class(QueuePool), **POOL_OPTIONS
+)
+sync_pool_metrics.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for DB_ASYNC_MODE; only built when enabled so asyncpg stays optional
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+async_engine = None
+if settings.DB_ASYNC_MODE:
+    async_pool_metrics = register_pool_metrics("async")
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=async_pool_metrics.pool_class(AsyncAdaptedQueuePool),
+        **POOL_OPTIONS
+    )
+    async_pool_metrics.attach(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
+
 Base = declarative_base()
 
 
 def init_db():
+    # Make sure every model is registered on Base.metadata before create_all
+    from . import models  # noqa: F401
     try:
         # Check if database exists, if not, create it
         if not database_exists(engine.url):
@@ -40,4 +73,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
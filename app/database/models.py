@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, JSON, Index, func
+from sqlalchemy.orm import relationship
 from .database import Base
 
 class CreditUnderwriter(Base):
@@ -11,7 +12,7 @@ class CreditUnderwriter(Base):
     password = Column(String, nullable=False)
     security_question = Column(String, nullable=False)
     security_answer = Column(String, nullable=False)
-    loan_cases = Column(ARRAY(Integer), default=[])
+    loan_cases = relationship("LoanCase", back_populates="underwriter", passive_deletes=True)
 
 class LoanCase(Base):
     __tablename__ = "loan_cases"
@@ -21,4 +22,106 @@ class LoanCase(Base):
     loan_amount = Column(Integer, nullable=False)
     loan_type = Column(String, nullable=False)
     loan_tenure = Column(Integer, nullable=False)
-    underwriter_id = Column(Integer, ForeignKey("credit_underwriters.id"))
\ No newline at end of file
+    underwriter_id = Column(Integer, ForeignKey("credit_underwriters.id"))
+    underwriter = relationship("CreditUnderwriter", back_populates="loan_cases")
+
+    # Keyset listing walks (underwriter_id, id); the others serve its filters
+    __table_args__ = (
+        Index("ix_loan_cases_underwriter_id_id", "underwriter_id", "id"),
+        Index("ix_loan_cases_underwriter_type_id", "underwriter_id", "loan_type", "id"),
+        Index("ix_loan_cases_underwriter_amount", "underwriter_id", "loan_amount"),
+        Index("ix_loan_cases_underwriter_tenure", "underwriter_id", "loan_tenure"),
+    )
+
+class ScorecardCacheEntry(Base):
+    __tablename__ = "scorecard_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class ScorecardBatchJob(Base):
+    """A scorecard batch; heartbeat_at is touched by the worker running it"""
+    __tablename__ = "scorecard_batch_jobs"
+
+    id = Column(String(32), primary_key=True)
+    underwriter_id = Column(Integer, ForeignKey("credit_underwriters.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    heartbeat_at = Column(DateTime, server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime)
+
+class ScorecardBatchItem(Base):
+    __tablename__ = "scorecard_batch_items"
+
+    job_id = Column(String(32), ForeignKey("scorecard_batch_jobs.id", ondelete="CASCADE"), primary_key=True)
+    case_id = Column(Integer, primary_key=True)
+    position = Column(Integer, nullable=False)  # order in the request
+    status = Column(String(16), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    scorecard = Column(JSON)
+
+class DocumentBlob(Base):
+    """Stored content, one row per verified SHA-256; the dedup index"""
+    __tablename__ = "document_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    s3_path = Column(String, nullable=False)
+    mime_type = Column(String)
+    size_bytes = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class Document(Base):
+    """One uploaded file; content with a verified hash is shared through its blob"""
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    blob_id = Column(Integer, ForeignKey("document_blobs.id"), index=True)
+    sha256 = Column(String(64), index=True)  # the blob's hash; dedup only goes through blob_id
+    s3_path = Column(String, nullable=False)
+    original_filename = Column(String, nullable=False)
+    mime_type = Column(String)
+    size_bytes = Column(BigInteger, nullable=False)
+    uploaded_by = Column(Integer, ForeignKey("credit_underwriters.id"))
+    loan_case_id = Column(Integer, ForeignKey("loan_cases.id", ondelete="CASCADE"), index=True)
+    upload_key = Column(String, unique=True, index=True)  # direct uploads: the key the upload was completed under
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class RateLimitCounter(Base):
+    """Per-key hit counts for one fixed window; shared rate-limit state across workers"""
+    __tablename__ = "rate_limit_counters"
+
+    key = Column(String(320), primary_key=True)
+    window_start = Column(BigInteger, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ChatSession(Base):
+    """One underwriting dialogue, optionally about a loan case; messages live in chat_messages"""
+    __tablename__ = "chat_sessions"
+
+    id = Column(String(32), primary_key=True)
+    underwriter_id = Column(Integer, ForeignKey("credit_underwriters.id", ondelete="CASCADE"), nullable=False)
+    loan_case_id = Column(Integer, ForeignKey("loan_cases.id", ondelete="CASCADE"))
+    # Next message seq is message_count + 1; bumping it serializes appends across workers
+    message_count = Column(Integer, nullable=False, default=0)
+    summary = Column(Text)
+    summary_through_seq = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_chat_sessions_underwriter_case_updated", "underwriter_id", "loan_case_id", "updated_at"),
+    )
+
+class ChatMessage(Base):
+    """Append-only turns of a chat session, numbered from 1"""
+    __tablename__ = "chat_messages"
+
+    session_id = Column(String(32), ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    role = Column(String(16), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -0,0 +1,132 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from ..utils.logger import logger
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    Connection pool counters for one engine, fed by SQLAlchemy pool events.
+    Checkout wait is timed by the pool class from pool_class(), so it covers
+    waiting for a free connection as well as opening a new one.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self._wait_sum = 0.0
+        self._wait_max = 0.0
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.connect_errors = 0
+        self.disconnects = 0
+
+    def pool_class(self, base):
+        """Subclass of a pool class that reports checkout waits to these metrics"""
+        metrics = self
+
+        class TimedPool(base):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    connection = super()._do_get()
+                except PoolTimeoutError:
+                    metrics._count("timeouts")
+                    raise
+                except Exception:
+                    metrics._count("connect_errors")
+                    raise
+                finally:
+                    metrics.observe_wait(time.perf_counter() - started)
+                return connection
+
+        TimedPool.__name__ = f"Timed{base.__name__}"
+        return TimedPool
+
+    def attach(self, engine):
+        """Register pool/engine listeners; pass engine.sync_engine for async engines"""
+        # Read the pool through the engine: dispose() swaps in a new pool
+        self.engine = engine
+        event.listen(engine.pool, "connect", lambda *_: self._count("connects"))
+        event.listen(engine.pool, "checkout", lambda *_: self._count("checkouts"))
+        event.listen(engine.pool, "checkin", lambda *_: self._count("checkins"))
+        event.listen(engine.pool, "invalidate", lambda *_: self._count("invalidations"))
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self._count("disconnects")
+            logger.warning(f"Database connection lost on {self.name} pool: {context.original_exception}")
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def observe_wait(self, seconds: float):
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound), len(WAIT_BUCKETS))
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._wait_sum += seconds
+            self._wait_max = max(self._wait_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._bucket_counts)
+            wait_sum, wait_max = self._wait_sum, self._wait_max
+            counters = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "connect_errors": self.connect_errors,
+                "disconnects": self.disconnects,
+            }
+
+        # Cumulative buckets, Prometheus-style
+        buckets, running = {}, 0
+        for bound, count in zip(list(WAIT_BUCKETS) + ["+Inf"], counts):
+            running += count
+            buckets[str(bound)] = running
+
+        state = {}
+        if self.engine is not None:
+            pool = self.engine.pool
+            state = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+        return {
+            "pool": state,
+            **counters,
+            "checkout_wait_seconds": {
+                "count": running,
+                "sum": wait_sum,
+                "max": wait_max,
+                "buckets": buckets,
+            },
+        }
+
+
+# Every instrumented engine in this process, by name
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def register_pool_metrics(name: str) -> PoolMetrics:
+    metrics = pool_metrics[name] = PoolMetrics(name)
+    return metrics
+
+
+def pool_metrics_snapshot() -> dict:
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
@@ -0,0 +1,37 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..utils.metrics import registry
+from ..utils.request_metrics import current_request_stats
+
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time by statement type",
+    ("operation",),
+)
+
+
+def _operation(statement: str) -> str:
+    # First keyword only (select/insert/...), so labels stay bounded
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return keyword if keyword in ("select", "insert", "update", "delete", "with") else "other"
+
+
+# The start time rides on the execution context, which is dropped with the
+# statement; after_cursor_execute doesn't fire for a statement that fails.
+# Internal statements (sequence defaults) run without a context and go untimed.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    elapsed = time.perf_counter() - context._query_start
+    db_query_duration.observe(elapsed, operation=_operation(statement))
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Literal, Optional
 
 class CreditUnderwriterBase(BaseModel):
     name: str
@@ -13,7 +14,6 @@ class CreditUnderwriterCreate(CreditUnderwriterBase):
 
 class CreditUnderwriterResponse(CreditUnderwriterBase):
     id: int
-    loan_cases: List[int] = []
     
     class Config:
         from_attributes = True
@@ -41,6 +41,19 @@ class LoanCaseResponse(LoanCaseBase):
     class Config:
         from_attributes = True
 
+class LoanCasePage(BaseModel):
+    items: list[LoanCaseResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; None on the last page
+
+class LoanCaseImportError(BaseModel):
+    row: int  # 1-based data row (CSV header excluded)
+    error: str
+
+class LoanCaseImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[LoanCaseImportError] = []  # first LOAN_CASE_IMPORT_MAX_ERRORS only
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -55,8 +68,136 @@ class ForgotPassword(BaseModel):
     new_password: str = Field(..., min_length=8)
 
 
+class FileUploadResult(BaseModel):
+    filename: str
+    status: str  # uploaded | duplicate | skipped | failed
+    s3_path: Optional[str] = None
+    error: Optional[str] = None
+
+
 class ZipUploadResponse(BaseModel):
     original_filename: str
     extracted_files: list[str]
     s3_paths: list[str]
-    message: str
\ No newline at end of file
+    files: list[FileUploadResult] = []
+    message: str
+
+
+class ScorecardBatchRequest(BaseModel):
+    case_ids: list[int] = Field(..., min_length=1)
+
+
+class ScorecardItemStatus(BaseModel):
+    case_id: int
+    status: str
+    attempts: int = 0
+    error: Optional[str] = None
+    scorecard: Optional[dict] = None
+
+
+class ScorecardBatchStatus(BaseModel):
+    job_id: str
+    status: str
+    total: int
+    completed: int
+    succeeded: int
+    failed: int
+    items: list[ScorecardItemStatus]
+
+
+class DirectUploadRequest(BaseModel):
+    loan_case_id: int
+    filename: str
+    content_type: str
+    size_bytes: int = Field(..., gt=0)
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    method: Literal["put", "post"] = "put"
+
+
+class DirectUploadResponse(BaseModel):
+    key: str
+    method: str
+    duplicate: bool = False
+    s3_path: Optional[str] = None
+    url: Optional[str] = None
+    fields: Optional[dict] = None
+    headers: dict = {}
+    expires_in: int
+
+
+class MultipartUploadRequest(BaseModel):
+    loan_case_id: int
+    filename: str
+    content_type: str
+    size_bytes: int = Field(..., gt=0)
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class MultipartUploadResponse(BaseModel):
+    key: str
+    upload_id: str
+    part_size: int
+    parts: list[PresignedPart]
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class MultipartCompleteRequest(BaseModel):
+    loan_case_id: int
+    key: str
+    upload_id: str
+    filename: str
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    parts: list[CompletedPart] = Field(..., min_length=1)
+
+
+class MultipartAbortRequest(BaseModel):
+    loan_case_id: int
+    key: str
+    upload_id: str
+
+
+class DirectUploadComplete(BaseModel):
+    loan_case_id: int
+    key: str
+    filename: str
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class ChatSessionCreate(BaseModel):
+    loan_case_id: Optional[int] = None
+
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    loan_case_id: Optional[int] = None
+    message_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChatMessageResponse(BaseModel):
+    seq: int
+    role: str
+    text: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChatMessagePage(BaseModel):
+    items: list[ChatMessageResponse]  # oldest first
+    next_before_seq: Optional[int] = None  # pass back as ?before_seq= for older messages; None at the start
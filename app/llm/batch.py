@@ -0,0 +1,315 @@
+"""
+Scorecard batch jobs.
+
+Jobs run on the worker that accepted them, but their state is written to the
+job store selected with SCORECARD_BATCH_JOB_STORE as each item completes, so
+any worker can report on any job and results survive a restart. The running
+worker heartbeats its unfinished jobs; an unfinished job whose heartbeat has
+gone stale was cut short by a restart and is reported as "interrupted".
+"""
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, insert, select, update, func
+from ..database.database import SessionLocal
+from ..database.models import ScorecardBatchJob, ScorecardBatchItem
+from ..utils.config import settings
+from ..utils.logger import logger
+from .client import InvalidScorecard, generate_scorecard
+
+
+def case_context(loan_case) -> str:
+    """
+    Scoring context for a loan case. Case documents are not stored against the
+    case record, so the context is built from the case fields.
+    """
+    return (
+        "Loan case details:\n"
+        f"- Business name: {loan_case.business_name}\n"
+        f"- Loan type: {loan_case.loan_type}\n"
+        f"- Requested amount: {loan_case.loan_amount}\n"
+        f"- Tenure (months): {loan_case.loan_tenure}\n"
+    )
+
+
+@dataclass
+class BatchItem:
+    case_id: int
+    context: Optional[str] = None
+    status: str = "pending"
+    attempts: int = 0
+    error: Optional[str] = None
+    scorecard: Optional[dict] = None
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+
+@dataclass
+class BatchJob:
+    owner: int  # underwriter id
+    items: list[BatchItem]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    interrupted: bool = False  # unfinished, and the worker running it stopped heartbeating
+
+    @property
+    def status(self):
+        if self.finished_at:
+            return "completed"
+        if self.interrupted:
+            return "interrupted"
+        if any(item.status != "pending" for item in self.items):
+            return "running"
+        return "queued"
+
+    def to_dict(self):
+        completed = [item for item in self.items if item.done]
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": len(self.items),
+            "completed": len(completed),
+            "succeeded": sum(1 for item in completed if item.status == "succeeded"),
+            "failed": sum(1 for item in completed if item.status == "failed"),
+            "items": [
+                {
+                    "case_id": item.case_id,
+                    "status": item.status,
+                    "attempts": item.attempts,
+                    "error": item.error,
+                    "scorecard": item.scorecard,
+                }
+                for item in self.items
+            ],
+        }
+
+
+class PostgresBatchJobStore:
+    """Jobs in the scorecard_batch_jobs / scorecard_batch_items tables"""
+
+    def __init__(self, ttl_hours: int, stale_after: float):
+        self.ttl = timedelta(hours=ttl_hours)
+        self.stale_after = timedelta(seconds=stale_after)
+
+    def create(self, job: BatchJob):
+        jobs = ScorecardBatchJob.__table__
+        with SessionLocal() as db:
+            db.execute(delete(jobs).where(jobs.c.created_at < func.now() - self.ttl))
+            db.execute(insert(jobs).values(id=job.job_id, underwriter_id=job.owner))
+            db.execute(insert(ScorecardBatchItem), [
+                {
+                    "job_id": job.job_id, "case_id": item.case_id, "position": position,
+                    "status": item.status, "attempts": item.attempts, "error": item.error,
+                    "scorecard": item.scorecard,
+                }
+                for position, item in enumerate(job.items)
+            ])
+            db.commit()
+
+    def save_item(self, job: BatchJob, item: BatchItem):
+        jobs, items = ScorecardBatchJob.__table__, ScorecardBatchItem.__table__
+        with SessionLocal() as db:
+            db.execute(
+                update(items)
+                .where(items.c.job_id == job.job_id, items.c.case_id == item.case_id)
+                .values(status=item.status, attempts=item.attempts, error=item.error, scorecard=item.scorecard)
+            )
+            db.execute(update(jobs).where(jobs.c.id == job.job_id).values(heartbeat_at=func.now()))
+            db.commit()
+
+    def finish(self, job: BatchJob):
+        jobs = ScorecardBatchJob.__table__
+        with SessionLocal() as db:
+            db.execute(update(jobs).where(jobs.c.id == job.job_id).values(finished_at=func.now()))
+            db.commit()
+
+    def touch(self, job_ids: list[str]):
+        jobs = ScorecardBatchJob.__table__
+        with SessionLocal() as db:
+            db.execute(update(jobs).where(jobs.c.id.in_(job_ids)).values(heartbeat_at=func.now()))
+            db.commit()
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        stale = (ScorecardBatchJob.heartbeat_at < func.now() - self.stale_after).label("stale")
+        with SessionLocal() as db:
+            found = db.execute(select(ScorecardBatchJob, stale).where(ScorecardBatchJob.id == job_id)).first()
+            if found is None:
+                return None
+            row, stale = found
+            items = db.scalars(
+                select(ScorecardBatchItem)
+                .where(ScorecardBatchItem.job_id == job_id)
+                .order_by(ScorecardBatchItem.position)
+            ).all()
+        return BatchJob(
+            owner=row.underwriter_id,
+            items=[
+                BatchItem(
+                    case_id=item.case_id, status=item.status, attempts=item.attempts,
+                    error=item.error, scorecard=item.scorecard,
+                )
+                for item in items
+            ],
+            job_id=row.id,
+            created_at=row.created_at,
+            finished_at=row.finished_at,
+            interrupted=row.finished_at is None and bool(stale),
+        )
+
+
+class MemoryBatchJobStore:
+    """Per-process store for local runs and benchmarks; jobs are lost on restart and only visible to this worker"""
+
+    def __init__(self, retention: int):
+        self.retention = retention
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job: BatchJob):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished_at]
+            for job_id in finished[:max(0, len(self._jobs) - self.retention)]:
+                del self._jobs[job_id]
+
+    def save_item(self, job: BatchJob, item: BatchItem):
+        pass
+
+    def finish(self, job: BatchJob):
+        pass
+
+    def touch(self, job_ids: list[str]):
+        pass
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+BATCH_JOB_STORES = {
+    "postgres": lambda: PostgresBatchJobStore(
+        ttl_hours=settings.SCORECARD_BATCH_JOB_TTL_HOURS,
+        # A few missed heartbeats before a job is declared interrupted
+        stale_after=4 * settings.SCORECARD_BATCH_HEARTBEAT_SECONDS,
+    ),
+    "memory": lambda: MemoryBatchJobStore(retention=settings.SCORECARD_BATCH_JOB_RETENTION),
+}
+
+
+def build_batch_job_store():
+    backend = settings.SCORECARD_BATCH_JOB_STORE
+    if backend not in BATCH_JOB_STORES:
+        raise ValueError(
+            f"Unknown SCORECARD_BATCH_JOB_STORE {backend!r}; expected one of {sorted(BATCH_JOB_STORES)}"
+        )
+    if backend == "memory":
+        logger.warning("SCORECARD_BATCH_JOB_STORE=memory: batch jobs are lost on restart and pinned to one worker")
+    return BATCH_JOB_STORES[backend]()
+
+
+class ScorecardBatchRunner:
+    """
+    Fans scorecard generation out to a fixed-size worker pool shared by all
+    batch jobs on this worker, so total LLM concurrency stays bounded no matter
+    how many jobs are queued. Transient model errors are already retried by
+    the LLM client, so an item is only tried again, up to max_attempts, when
+    the model answered without a usable scorecard. Items that still fail are
+    reported with their error and the job always completes.
+    """
+
+    def __init__(self, store, concurrency: int, max_attempts: int, heartbeat: float):
+        self.store = store
+        self.max_attempts = max(1, max_attempts)
+        self.heartbeat = heartbeat
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scorecard")
+        self._jobs: dict[str, BatchJob] = {}  # running on this worker
+        self._tasks: set[asyncio.Task] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def submit(self, job: BatchJob) -> BatchJob:
+        """Persist and start a job; raises if the store can't take it, so no job runs unseen"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.store.create, job)
+        self._jobs[job.job_id] = job
+        self._spawn(self._run(job))
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        logger.info(f"Scorecard batch {job.job_id} queued with {len(job.items)} cases")
+        return job
+
+    async def lookup(self, job_id: str) -> Optional[BatchJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store.get, job_id)
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        # Keep a reference so the task isn't garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _store_call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, method, *args)
+        except Exception as e:
+            logger.error(f"Scorecard batch store {method.__name__} failed: {str(e)}")
+
+    async def _run(self, job: BatchJob):
+        try:
+            await asyncio.gather(*(self._score(job, item) for item in job.items if not item.done))
+            job.finished_at = datetime.utcnow()
+            await self._store_call(self.store.finish, job)
+        finally:
+            self._jobs.pop(job.job_id, None)
+        summary = job.to_dict()
+        logger.info(
+            f"Scorecard batch {job.job_id} finished: "
+            f"{summary['succeeded']} succeeded, {summary['failed']} failed"
+        )
+
+    async def _score(self, job: BatchJob, item: BatchItem):
+        loop = asyncio.get_running_loop()
+        item.status = "running"
+        while True:
+            item.attempts += 1
+            try:
+                item.scorecard = await loop.run_in_executor(self._executor, generate_scorecard, item.context)
+            except InvalidScorecard as e:
+                item.error = str(e)
+                if item.attempts < self.max_attempts:
+                    logger.info(f"Retrying scorecard for case {item.case_id}: {item.error}")
+                    continue
+            except Exception as e:
+                item.error = str(e) or type(e).__name__
+            else:
+                item.status = "succeeded"
+                item.error = None
+                break
+            item.status = "failed"
+            logger.warning(f"Scorecard failed for case {item.case_id} after {item.attempts} attempts: {item.error}")
+            break
+        await self._store_call(self.store.save_item, job, item)
+
+    async def _heartbeat(self):
+        while self._jobs:
+            await self._store_call(self.store.touch, list(self._jobs))
+            await asyncio.sleep(self.heartbeat)
+
+
+batch_runner = ScorecardBatchRunner(
+    store=build_batch_job_store(),
+    concurrency=settings.SCORECARD_BATCH_CONCURRENCY,
+    max_attempts=settings.SCORECARD_BATCH_MAX_ATTEMPTS,
+    heartbeat=settings.SCORECARD_BATCH_HEARTBEAT_SECONDS,
+)
@@ -0,0 +1,246 @@
+"""
+Durable chat sessions, selected with CHAT_SESSION_STORE.
+
+A session belongs to one underwriter and optionally one loan case. Its turns
+are append-only rows numbered 1, 2, ... per session, written as each turn
+completes, so a dropped socket or a deploy loses at most the reply in flight.
+The running summary of older turns is stored on the session together with
+the last seq it covers, so a resumed conversation only needs the summary and
+the turns after it, read newest first a page at a time.
+
+A session opened on the WebSocket without an id is only written by its first
+append, so connections that never send a message leave no rows behind.
+
+Any worker can resume any session: appends allocate seqs by bumping the
+session row's message_count in the same transaction, which serializes
+concurrent writers on that row.
+"""
+import threading
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..database.database import SessionLocal
+from ..database.models import ChatSession, ChatMessage
+from ..database.crud import get_owned_loan_case
+from ..utils.config import settings
+from ..utils.logger import logger
+
+
+@dataclass
+class StoredSession:
+    session_id: str
+    underwriter_id: int
+    loan_case_id: Optional[int] = None
+    message_count: int = 0
+    summary: Optional[str] = None
+    summary_through_seq: int = 0
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+
+@dataclass
+class StoredMessage:
+    seq: int
+    role: str
+    text: str
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class PostgresChatStore:
+    """Sessions and messages in the chat_sessions / chat_messages tables"""
+
+    @staticmethod
+    def _session(row: ChatSession) -> StoredSession:
+        return StoredSession(
+            session_id=row.id,
+            underwriter_id=row.underwriter_id,
+            loan_case_id=row.loan_case_id,
+            message_count=row.message_count,
+            summary=row.summary,
+            summary_through_seq=row.summary_through_seq,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+
+    def new_session(self, underwriter_id: int, loan_case_id: Optional[int] = None) -> Optional[StoredSession]:
+        """A session to be written by its first append; None if the loan case isn't the underwriter's"""
+        if loan_case_id is not None:
+            with SessionLocal() as db:
+                if get_owned_loan_case(db, loan_case_id, underwriter_id) is None:
+                    return None
+        return StoredSession(uuid.uuid4().hex, underwriter_id, loan_case_id)
+
+    def create_session(self, underwriter_id: int, loan_case_id: Optional[int] = None) -> Optional[StoredSession]:
+        """None if the loan case doesn't exist or belongs to someone else"""
+        with SessionLocal() as db:
+            if loan_case_id is not None and get_owned_loan_case(db, loan_case_id, underwriter_id) is None:
+                return None
+            row = ChatSession(
+                id=uuid.uuid4().hex,
+                underwriter_id=underwriter_id,
+                loan_case_id=loan_case_id,
+                message_count=0,
+                summary_through_seq=0,
+            )
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            return self._session(row)
+
+    def get_session(self, session_id: str, underwriter_id: int) -> Optional[StoredSession]:
+        with SessionLocal() as db:
+            row = db.get(ChatSession, session_id)
+            if row is None or row.underwriter_id != underwriter_id:
+                return None
+            return self._session(row)
+
+    def list_sessions(self, underwriter_id: int, loan_case_id: Optional[int] = None,
+                      limit: int = 50) -> list[StoredSession]:
+        """Most recently active first; sessions without messages are left out"""
+        statement = select(ChatSession).where(
+            ChatSession.underwriter_id == underwriter_id,
+            ChatSession.message_count > 0,
+        )
+        if loan_case_id is not None:
+            statement = statement.where(ChatSession.loan_case_id == loan_case_id)
+        statement = statement.order_by(ChatSession.updated_at.desc()).limit(limit)
+        with SessionLocal() as db:
+            return [self._session(row) for row in db.scalars(statement)]
+
+    def append(self, session: StoredSession, turns: list[tuple[str, str]]) -> list[int]:
+        """Append (role, text) turns in order, creating the session row if needed; returns their seqs"""
+        sessions = ChatSession.__table__
+        with SessionLocal() as db:
+            last = db.execute(
+                pg_insert(sessions)
+                .values(
+                    id=session.session_id,
+                    underwriter_id=session.underwriter_id,
+                    loan_case_id=session.loan_case_id,
+                    message_count=len(turns),
+                    summary_through_seq=0,
+                )
+                .on_conflict_do_update(
+                    index_elements=[sessions.c.id],
+                    set_={"message_count": sessions.c.message_count + len(turns), "updated_at": func.now()},
+                )
+                .returning(sessions.c.message_count)
+            ).scalar_one()
+            seqs = list(range(last - len(turns) + 1, last + 1))
+            db.execute(insert(ChatMessage), [
+                {"session_id": session.session_id, "seq": seq, "role": role, "text": text}
+                for seq, (role, text) in zip(seqs, turns)
+            ])
+            db.commit()
+        return seqs
+
+    def list_messages(self, session_id: str, before_seq: Optional[int] = None, after_seq: int = 0,
+                      limit: int = 50) -> list[StoredMessage]:
+        """The newest `limit` messages with after_seq < seq < before_seq, oldest first"""
+        statement = select(ChatMessage).where(ChatMessage.session_id == session_id, ChatMessage.seq > after_seq)
+        if before_seq is not None:
+            statement = statement.where(ChatMessage.seq < before_seq)
+        statement = statement.order_by(ChatMessage.seq.desc()).limit(limit)
+        with SessionLocal() as db:
+            rows = db.scalars(statement).all()
+        return [StoredMessage(row.seq, row.role, row.text, row.created_at) for row in reversed(rows)]
+
+    def save_summary(self, session_id: str, summary: str, through_seq: int):
+        sessions = ChatSession.__table__
+        with SessionLocal() as db:
+            # Never replace a summary that already covers more of the conversation
+            db.execute(
+                update(sessions)
+                .where(sessions.c.id == session_id, sessions.c.summary_through_seq <= through_seq)
+                .values(summary=summary, summary_through_seq=through_seq)
+            )
+            db.commit()
+
+
+class MemoryChatStore:
+    """Per-process store for local runs and benchmarks; sessions don't survive a restart or move between workers"""
+
+    def __init__(self):
+        self._sessions: dict[str, StoredSession] = {}
+        self._messages: dict[str, list[StoredMessage]] = {}
+        self._lock = threading.Lock()
+
+    def new_session(self, underwriter_id: int, loan_case_id: Optional[int] = None) -> Optional[StoredSession]:
+        return StoredSession(uuid.uuid4().hex, underwriter_id, loan_case_id)
+
+    def create_session(self, underwriter_id: int, loan_case_id: Optional[int] = None) -> Optional[StoredSession]:
+        session = self.new_session(underwriter_id, loan_case_id)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._messages[session.session_id] = []
+        return replace(session)
+
+    def get_session(self, session_id: str, underwriter_id: int) -> Optional[StoredSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.underwriter_id != underwriter_id:
+                return None
+            return replace(session)
+
+    def list_sessions(self, underwriter_id: int, loan_case_id: Optional[int] = None,
+                      limit: int = 50) -> list[StoredSession]:
+        with self._lock:
+            sessions = [
+                replace(s) for s in self._sessions.values()
+                if s.underwriter_id == underwriter_id and s.message_count > 0
+                and (loan_case_id is None or s.loan_case_id == loan_case_id)
+            ]
+        sessions.sort(key=lambda s: s.updated_at, reverse=True)
+        return sessions[:limit]
+
+    def append(self, session: StoredSession, turns: list[tuple[str, str]]) -> list[int]:
+        with self._lock:
+            if session.session_id not in self._sessions:
+                self._sessions[session.session_id] = replace(session, message_count=0)
+                self._messages[session.session_id] = []
+            messages = self._messages[session.session_id]
+            session = self._sessions[session.session_id]
+            seqs = []
+            for role, text in turns:
+                session.message_count += 1
+                messages.append(StoredMessage(session.message_count, role, text))
+                seqs.append(session.message_count)
+            session.updated_at = datetime.utcnow()
+        return seqs
+
+    def list_messages(self, session_id: str, before_seq: Optional[int] = None, after_seq: int = 0,
+                      limit: int = 50) -> list[StoredMessage]:
+        with self._lock:
+            messages = [
+                m for m in self._messages.get(session_id, [])
+                if m.seq > after_seq and (before_seq is None or m.seq < before_seq)
+            ]
+        return messages[-limit:]
+
+    def save_summary(self, session_id: str, summary: str, through_seq: int):
+        with self._lock:
+            session = self._sessions[session_id]
+            if session.summary_through_seq <= through_seq:
+                session.summary = summary
+                session.summary_through_seq = through_seq
+
+
+CHAT_STORES = {
+    "postgres": PostgresChatStore,
+    "memory": MemoryChatStore,
+}
+
+
+def build_chat_store():
+    backend = settings.CHAT_SESSION_STORE
+    if backend not in CHAT_STORES:
+        raise ValueError(f"Unknown CHAT_SESSION_STORE {backend!r}; expected one of {sorted(CHAT_STORES)}")
+    if backend == "memory":
+        logger.warning("CHAT_SESSION_STORE=memory: chat sessions are lost on restart and pinned to one worker")
+    return CHAT_STORES[backend]()
+
+
+chat_store = build_chat_store()
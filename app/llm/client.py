@@ -1,19 +1,112 @@
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 import json
 from ..utils.config import settings
+from ..utils.logger import logger
 from ..prompts.basic import chat_prompt, json_prompt
+from .context_cache import ContextCache
+from .result_cache import build_scorecard_cache
+from .fingerprint import fingerprint
+from .telemetry import observe_generation
+from .governor import llm_governor, is_quota_error
+from .singleflight import SingleFlight
+from .resilience import CallPolicy, llm_caller, request_options, governor_wait
 
 TEXT_MODEL_NAME = settings.GEMINI_MODEL
 
-client = genai.Client(api_key=settings.GOOGLE_API_KEY)
 
 
+def build_client():
+    """The Gemini client, or an offline stand-in selected by LLM_BACKEND"""
+    backend = settings.LLM_BACKEND
+    if backend == "fake":
+        from .fake_client import FakeClient
+        logger.warning("LLM_BACKEND=fake: model responses are synthetic")
+        return FakeClient(settings.LLM_FAKE_RECORDINGS_PATH)
+    real = genai.Client(api_key=settings.GOOGLE_API_KEY)
+    if backend == "record":
+        from .fake_client import RecordingClient
+        if not settings.LLM_FAKE_RECORDINGS_PATH:
+            raise ValueError("LLM_BACKEND=record needs LLM_FAKE_RECORDINGS_PATH")
+        return RecordingClient(real, settings.LLM_FAKE_RECORDINGS_PATH)
+    if backend != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected gemini, fake or record")
+    return real
+
+
+client = build_client()
+
+context_cache = ContextCache(
+    client,
+    ttl_seconds=settings.LLM_CONTEXT_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CONTEXT_CACHE_MAX_ENTRIES,
+)
+
+scorecard_cache = build_scorecard_cache()
+
+# Duplicate clicks and retries of an identical request share one generation
+case_chat_flight = SingleFlight("case_chat")
+scorecard_flight = SingleFlight("scorecard")
+
+CASE_CHAT_POLICY = CallPolicy("case_chat", deadline_seconds=settings.LLM_DEADLINE_SECONDS)
+SCORECARD_POLICY = CallPolicy("scorecard", deadline_seconds=settings.LLM_SCORECARD_DEADLINE_SECONDS)
+
+
+def _generate_with_cached_prefix(model, prefix, multiturn, deadline, capacity_wait):
+    """
+    Generate against a cached prefix so only the new turns are sent and billed.
+    Returns None when no cache is available, letting the caller send the full request.
+    """
+    if not settings.LLM_CONTEXT_CACHE_ENABLED or not multiturn:
+        return None
+    cache_name = context_cache.get(model, prefix)
+    if not cache_name:
+        return None
+    try:
+        with llm_governor.reserve(prefix + multiturn, "interactive", timeout=governor_wait(deadline, capacity_wait)) as lease, \
+                observe_generation("case_chat", model) as generation:
+            response = client.models.generate_content(
+                model=model,
+                contents=multiturn,
+                config=types.GenerateContentConfig(cached_content=cache_name, http_options=request_options(deadline)),
+            )
+            generation.record_usage(response.usage_metadata)
+            lease.settle(response.usage_metadata)
+        return response
+    except errors.ClientError as e:
+        if is_quota_error(e):
+            raise
+        # Cache expired or was deleted server-side; drop it and go uncached
+        logger.warning(f"Cached prefix {cache_name} unusable, falling back: {str(e)}")
+        context_cache.invalidate(model, prefix)
+        return None
+
+
+
+def _case_chat_attempt(prefix, multiturn):
+    """One case-chat request to a given model, for llm_caller"""
+    def attempt(model, deadline, capacity_wait):
+        response = _generate_with_cached_prefix(model, prefix, multiturn, deadline, capacity_wait)
+        if response is None:
+            with llm_governor.reserve(prefix + multiturn, "interactive", timeout=governor_wait(deadline, capacity_wait)) as lease, \
+                    observe_generation("case_chat", model) as generation:
+                response = client.models.generate_content(
+                    model=model,
+                    contents=prefix + multiturn,
+                    config=types.GenerateContentConfig(http_options=request_options(deadline)),
+                )
+                generation.record_usage(response.usage_metadata)
+                lease.settle(response.usage_metadata)
+        return response
+    return attempt
+
 
 def genai_call_model(context, prompt):
     """
     Calls the Google GenAI model with the provided context and prompt.
-    Returns the response text.
+    The system prompt and case context are served from the context cache when possible.
+    Identical concurrent calls share one generation; failures are retried
+    within CASE_CHAT_POLICY's deadline. Returns the response text.
     """
     try:
         # context.append(system_prompt)
@@ -30,100 +123,148 @@ def genai_call_model(context, prompt):
                     role="model",
                     parts=[types.Part.from_text(text=x['content'])]
                 ))
-        response = client.models.generate_content(
-            model=TEXT_MODEL_NAME,
-            contents=[chat_prompt, context] + multiturn
+        prefix = [chat_prompt, context]
+        key = fingerprint(TEXT_MODEL_NAME, prefix, multiturn)
+        response = case_chat_flight.do(
+            key, lambda: llm_caller.call(CASE_CHAT_POLICY, _case_chat_attempt(prefix, multiturn))
         )
         
         if response and response.text:
             return response.text
     except Exception as e:
+        logger.error(f"Case chat generation failed: {type(e).__name__}: {str(e)}")
         return "No response from the model."
 
 
 
-def context_to_json(repo_context):
-    """
-    Converts the repository context to a JSON format based on credit assessment schema.
-    """
+# Schema for the credit assessment scorecard JSON
+SCORECARD_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    required=["company_name", "industry", "assessment_date", "pillars", "total_score", "decision_zone"],
+    properties={
+        "company_name": types.Schema(type=types.Type.STRING),
+        "industry": types.Schema(type=types.Type.STRING),
+        "assessment_date": types.Schema(type=types.Type.STRING),
+        "pillars": types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(
+                type=types.Type.OBJECT,
+                required=["pillar", "weight", "metrics", "pillar_avg", "weighted_score"],
+                properties={
+                    "pillar": types.Schema(type=types.Type.STRING),
+                    "weight": types.Schema(type=types.Type.NUMBER),
+                    "metrics": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.OBJECT,
+                            required=["metric", "definition", "applicant_value", "score"],
+                            properties={
+                                "metric": types.Schema(type=types.Type.STRING),
+                                "definition": types.Schema(type=types.Type.STRING),
+                                "applicant_value": types.Schema(
+                                    anyOf=[
+                                        types.Schema(type=types.Type.STRING),
+                                        types.Schema(type=types.Type.NUMBER),
+                                    ]
+                                ),
+                                "score": types.Schema(type=types.Type.NUMBER),
+                            }
+                        )
+                    ),
+                    "pillar_avg": types.Schema(type=types.Type.NUMBER),
+                    "weighted_score": types.Schema(type=types.Type.NUMBER),
+                }
+            )
+        ),
+        "total_score": types.Schema(type=types.Type.NUMBER),
+        "decision_zone": types.Schema(type=types.Type.STRING),
+    }
+)
+
+
+class InvalidScorecard(ValueError):
+    """The model answered, but not with a usable scorecard"""
+
+
+def scorecard_cache_key(repo_context):
+    return fingerprint(TEXT_MODEL_NAME, repo_context, json_prompt, SCORECARD_SCHEMA)
+
+
+def invalidate_scorecard(repo_context):
+    """Drop the cached scorecard so the next generate_scorecard call regenerates it"""
+    scorecard_cache.invalidate(scorecard_cache_key(repo_context))
+
+
+def _generate_scorecard(repo_context, cache_key):
+    # Create content for the API call
+    contents = [ repo_context,
+        types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=json_prompt)],
+        )
+    ]
     
-    # Define the schema for the JSON output
-    schema = types.Schema(
-        type=types.Type.OBJECT,
-        required=["company_name", "industry", "assessment_date", "pillars", "total_score", "decision_zone"],
-        properties={
-            "company_name": types.Schema(type=types.Type.STRING),
-            "industry": types.Schema(type=types.Type.STRING),
-            "assessment_date": types.Schema(type=types.Type.STRING),
-            "pillars": types.Schema(
-                type=types.Type.ARRAY,
-                items=types.Schema(
-                    type=types.Type.OBJECT,
-                    required=["pillar", "weight", "metrics", "pillar_avg", "weighted_score"],
-                    properties={
-                        "pillar": types.Schema(type=types.Type.STRING),
-                        "weight": types.Schema(type=types.Type.NUMBER),
-                        "metrics": types.Schema(
-                            type=types.Type.ARRAY,
-                            items=types.Schema(
-                                type=types.Type.OBJECT,
-                                required=["metric", "definition", "applicant_value", "score"],
-                                properties={
-                                    "metric": types.Schema(type=types.Type.STRING),
-                                    "definition": types.Schema(type=types.Type.STRING),
-                                    "applicant_value": types.Schema(
-                                        anyOf=[
-                                            types.Schema(type=types.Type.STRING),
-                                            types.Schema(type=types.Type.NUMBER),
-                                        ]
-                                    ),
-                                    "score": types.Schema(type=types.Type.NUMBER),
-                                }
-                            )
-                        ),
-                        "pillar_avg": types.Schema(type=types.Type.NUMBER),
-                        "weighted_score": types.Schema(type=types.Type.NUMBER),
-                    }
-                )
-            ),
-            "total_score": types.Schema(type=types.Type.NUMBER),
-            "decision_zone": types.Schema(type=types.Type.STRING),
-        }
+    # Configure the generation to return JSON
+    generate_content_config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=SCORECARD_SCHEMA,
     )
     
-   
+    # Generate the JSON response; batch scoring yields to interactive chat
+    def attempt(model, deadline, capacity_wait):
+        with llm_governor.reserve(contents, "batch", timeout=governor_wait(deadline, capacity_wait)) as lease, \
+                observe_generation("scorecard", model) as generation:
+            response = client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=generate_content_config.model_copy(update={"http_options": request_options(deadline)}),
+            )
+            generation.record_usage(response.usage_metadata)
+            lease.settle(response.usage_metadata)
+        return model, response
+
+    model, response = llm_caller.call(SCORECARD_POLICY, attempt)
     
+    # Extract and return the JSON response
+    text = getattr(response, 'text', None)
+    if not text:
+        raise InvalidScorecard(f"The {model} response has no scorecard JSON")
     try:
-        # Create content for the API call
-        contents = [ repo_context,
-            types.Content(
-                role="user",
-                parts=[types.Part.from_text(text=json_prompt)],
-            )
-        ]
-        
-        # Configure the generation to return JSON
-        generate_content_config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=schema,
-        )
-        
-        # Generate the JSON response
-        response = client.models.generate_content(
-            model=TEXT_MODEL_NAME,
-            contents=contents,
-            config=generate_content_config,
-        )
-        
-        # Extract and return the JSON response
-        if hasattr(response, 'text'):
-            print("Generated JSON response successfully.")
-            #print(response.text)
-            return json.loads(response.text)
-        else:
-            print("Error: Could not extract JSON from response")
-            return None
-            
+        scorecard = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise InvalidScorecard(f"The {model} response is not valid JSON: {str(e)}") from e
+    if not isinstance(scorecard, dict) or not scorecard:
+        raise InvalidScorecard(f"The {model} response has an empty scorecard")
+    logger.info(f"Generated scorecard {cache_key} with {model}")
+    # Fallback-model scorecards answer this request but aren't cached as the primary's
+    if model == TEXT_MODEL_NAME:
+        scorecard_cache.put(cache_key, TEXT_MODEL_NAME, scorecard)
+    return scorecard
+
+
+def generate_scorecard(repo_context, use_cache=True):
+    """
+    Scorecard JSON for a context, raising on failure: InvalidScorecard when the
+    model answered with no usable scorecard, the model error otherwise.
+    Results are cached by a hash of (model, context, prompt, schema); pass use_cache=False to regenerate.
+    Concurrent calls for the same context share one generation.
+    """
+    cache_key = scorecard_cache_key(repo_context)
+    if use_cache:
+        cached = scorecard_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Scorecard cache hit: {cache_key}")
+            return cached
+    return scorecard_flight.do(cache_key, lambda: _generate_scorecard(repo_context, cache_key))
+
+
+def context_to_json(repo_context, use_cache=True):
+    """
+    Converts the repository context to a JSON format based on credit assessment schema.
+    Like generate_scorecard, but returns None instead of raising.
+    """
+    try:
+        return generate_scorecard(repo_context, use_cache)
     except Exception as e:
-        print(f"Error generating JSON from context: {e}")
+        logger.warning(f"Scorecard generation failed: {str(e)}")
         return None
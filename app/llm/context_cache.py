@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from google.genai import types
+from ..utils.logger import logger
+from .fingerprint import fingerprint
+
+
+@dataclass
+class CachedPrefix:
+    name: str
+    expires_at: float
+
+
+class ContextCache:
+    """
+    Gemini explicit caches for the stable prompt prefix (system prompt + case
+    documents), keyed by a content hash of model and prefix.
+
+    Entries are refreshed when they get close to expiry, evicted least recently
+    used beyond `max_entries`, and deleted server-side on eviction. Prefixes the
+    API refuses to cache (e.g. below the model's minimum token count) are
+    remembered for one TTL so we don't retry creation on every call.
+    """
+
+    def __init__(self, client, ttl_seconds: int, max_entries: int, refresh_margin_seconds: int = 300):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_margin_seconds = min(refresh_margin_seconds, ttl_seconds // 2)
+        self._entries: "OrderedDict[str, CachedPrefix]" = OrderedDict()
+        self._uncacheable: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model: str, prefix: list) -> str:
+        return fingerprint(model, prefix)
+
+    def get(self, model: str, prefix: list):
+        """Return the cache name for this prefix, creating it if needed, or None"""
+        key = self.key_for(model, prefix)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > now:
+                self._entries.move_to_end(key)
+            elif entry:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._uncacheable.get(key, 0) > now:
+                return None
+
+        if entry:
+            if entry.expires_at - now < self.refresh_margin_seconds:
+                self._refresh(key, entry)
+            return entry.name
+        return self._create(key, model, prefix)
+
+    def invalidate(self, model: str, prefix: list):
+        key = self.key_for(model, prefix)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry:
+            self._delete(entry)
+
+    def _create(self, key: str, model: str, prefix: list):
+        try:
+            cached = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    contents=prefix,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=f"ctx-{key[:16]}",
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Context cache creation failed, using plain requests: {str(e)}")
+            with self._lock:
+                self._uncacheable[key] = time.time() + self.ttl_seconds
+            return None
+
+        entry = CachedPrefix(name=cached.name, expires_at=time.time() + self.ttl_seconds)
+        evicted = []
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing:
+                # Another caller created the same prefix concurrently; keep theirs
+                evicted.append(entry)
+                entry = existing
+            else:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False)[1])
+        for stale in evicted:
+            self._delete(stale)
+        logger.info(f"Context cache ready: {entry.name}")
+        return entry.name
+
+    def _refresh(self, key: str, entry: CachedPrefix):
+        try:
+            self.client.caches.update(
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+            entry.expires_at = time.time() + self.ttl_seconds
+        except Exception as e:
+            logger.warning(f"Context cache refresh failed for {entry.name}: {str(e)}")
+            with self._lock:
+                self._entries.pop(key, None)
+
+    def _delete(self, entry: CachedPrefix):
+        try:
+            self.client.caches.delete(name=entry.name)
+        except Exception as e:
+            # Expired or already gone; the server cleans up on TTL anyway
+            logger.debug(f"Context cache delete failed for {entry.name}: {str(e)}")
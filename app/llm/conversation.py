@@ -0,0 +1,311 @@
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from google.genai import types
+from ..utils.config import settings
+from ..utils.logger import logger
+from ..prompts.basic import summary_prompt
+from .telemetry import observe_generation
+from .governor import llm_governor
+from .resilience import CallPolicy, llm_caller, request_options, governor_wait
+
+# Summaries are background work: retried, but never hedged
+SUMMARY_POLICY = CallPolicy("conversation_summary", deadline_seconds=settings.LLM_DEADLINE_SECONDS, hedge=False)
+
+# Rough chars-per-token ratio for Gemini on English/financial text. Calibrated
+# per session from the usage metadata the model returns.
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    return int(len(text) / chars_per_token) + 1
+
+
+@dataclass
+class Turn:
+    role: str
+    text: str
+    tokens: int
+    seq: Optional[int] = None  # position in the stored session, once persisted
+
+    def to_content(self):
+        return types.Content(role=self.role, parts=[types.Part.from_text(text=self.text)])
+
+
+class ConversationManager:
+    """
+    Token-budgeted chat history for one WebSocket session.
+
+    Recent turns are kept verbatim up to `recent_tokens`. Older turns are
+    handed to a background task that folds them into a running summary; until
+    that summary is rebuilt they are still sent verbatim. The whole request
+    (summary + folding + recent) never exceeds `max_tokens`.
+
+    With a chat store and a stored session, turns are appended to the store by
+    persist() and load_history() resumes from the stored summary plus only as
+    many recent turns as fit the context window.
+    """
+
+    def __init__(self, client, model_name, owner=None, store=None, session=None,
+                 max_tokens=None, recent_tokens=None, summary_max_tokens=None):
+        self.client = client
+        self.model_name = model_name
+        self.owner = owner
+        self.store = store if session is not None else None
+        self.session = session
+        self.session_id = session.session_id if session is not None else uuid.uuid4().hex
+        self.max_tokens = max_tokens or settings.CHAT_MAX_CONTEXT_TOKENS
+        self.recent_tokens = min(recent_tokens or settings.CHAT_RECENT_CONTEXT_TOKENS, self.max_tokens)
+        self.summary_max_tokens = summary_max_tokens or settings.CHAT_SUMMARY_MAX_TOKENS
+
+        self.summary = ""
+        self.summary_tokens = 0
+        self._recent: list[Turn] = []
+        self._folding: list[Turn] = []
+        self._chars_per_token = CHARS_PER_TOKEN
+        self._last_estimate = 0
+        self._summary_task: asyncio.Task | None = None
+        self._unsaved: list[Turn] = []
+
+    # History
+
+    def add_user_message(self, text: str):
+        self._append(Turn("user", text, self._estimate(text)))
+
+    def add_model_message(self, text: str):
+        self._append(Turn("model", text, self._estimate(text)))
+        self._compact()
+
+    def discard_last(self):
+        """Drop the most recent turn, e.g. a user message that was never answered"""
+        if self._recent and self._recent[-1].seq is None:
+            turn = self._recent.pop()
+            if self._unsaved and self._unsaved[-1] is turn:
+                self._unsaved.pop()
+
+    def _append(self, turn: Turn):
+        self._recent.append(turn)
+        self._unsaved.append(turn)
+
+    # Persistence
+
+    async def persist(self):
+        """Append turns not yet stored; on failure they stay queued for the next call"""
+        if self.store is None or not self._unsaved:
+            return
+        turns = list(self._unsaved)
+        try:
+            seqs = await run_in_threadpool(
+                self.store.append, self.session, [(turn.role, turn.text) for turn in turns]
+            )
+        except Exception as e:
+            logger.error(f"Persisting {len(turns)} chat turns failed for session {self.session_id}: {str(e)}")
+            return
+        for turn, seq in zip(turns, seqs):
+            turn.seq = seq
+        del self._unsaved[:len(turns)]
+
+    async def load_history(self):
+        """Resume a stored session: its summary, then stored turns newest first until the window is full"""
+        if self.store is None:
+            return
+        if self.session.summary:
+            self.summary = self.session.summary
+            self.summary_tokens = self._estimate(self.summary)
+        budget = self.max_tokens - self.summary_tokens
+        turns: list[Turn] = []
+        before_seq = None
+        while budget > 0:
+            page = await run_in_threadpool(
+                self.store.list_messages, self.session_id, before_seq,
+                self.session.summary_through_seq, settings.CHAT_HISTORY_PAGE_SIZE,
+            )
+            for message in reversed(page):
+                turn = Turn(message.role, message.text, self._estimate(message.text), message.seq)
+                if turn.tokens > budget and turns:
+                    budget = 0
+                    break
+                turns.append(turn)
+                budget -= turn.tokens
+            if len(page) < settings.CHAT_HISTORY_PAGE_SIZE:
+                break
+            before_seq = page[0].seq
+        turns.reverse()
+        # Keep the window starting on a user turn, as _compact expects
+        while turns and turns[0].role != "user":
+            turns.pop(0)
+        self._recent = turns
+        logger.info(
+            f"Resumed chat session {self.session_id}: {len(turns)} turns loaded"
+            + (f", summary through seq {self.session.summary_through_seq}" if self.summary else "")
+        )
+        self._compact()
+
+    def _estimate(self, text: str) -> int:
+        return estimate_tokens(text, self._chars_per_token)
+
+    # Request building
+
+    def system_instruction(self):
+        if not self.summary:
+            return None
+        return f"Summary of the earlier conversation:\n{self.summary}"
+
+    def contents(self) -> list:
+        """Turns to send with the next request, oldest first, within the token ceiling"""
+        budget = self.max_tokens - self.summary_tokens
+        selected = []
+        # Newest first so the latest turns always survive the ceiling
+        for turn in reversed(self._folding + self._recent):
+            if turn.tokens > budget and selected:
+                break
+            selected.append(turn)
+            budget -= turn.tokens
+        selected.reverse()
+        # Gemini expects the conversation to open with a user turn
+        while len(selected) > 1 and selected[0].role != "user":
+            selected.pop(0)
+        self._last_estimate = self.summary_tokens + sum(t.tokens for t in selected)
+        return [turn.to_content() for turn in selected]
+
+    def observe_usage(self, usage_metadata):
+        """Calibrate the token estimate against what the model actually counted"""
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+        if not prompt_tokens or not self._last_estimate:
+            return
+        ratio = self._last_estimate / prompt_tokens
+        # Smooth so one odd response does not swing the budget
+        self._chars_per_token = max(1.0, min(8.0, self._chars_per_token * (0.7 + 0.3 * ratio)))
+
+    # Summarization
+
+    def _compact(self):
+        recent_total = sum(t.tokens for t in self._recent)
+        moved = False
+        # Move whole user/model exchanges so the verbatim window starts on a user turn
+        while recent_total > self.recent_tokens and len(self._recent) > 2:
+            for _ in range(2):
+                turn = self._recent.pop(0)
+                self._folding.append(turn)
+                recent_total -= turn.tokens
+            moved = True
+        if moved and (self._summary_task is None or self._summary_task.done()):
+            self._summary_task = asyncio.create_task(self._rebuild_summary())
+
+    def _summary_attempt(self, prompt: str):
+        async def attempt(model, deadline, capacity_wait):
+            async with llm_governor.reserve_async(
+                prompt, "background", self.summary_max_tokens, timeout=governor_wait(deadline, capacity_wait)
+            ) as lease:
+                with observe_generation("conversation_summary", model) as generation:
+                    response = await self.client.aio.models.generate_content(
+                        model=model,
+                        contents=prompt,
+                        config=types.GenerateContentConfig(
+                            max_output_tokens=self.summary_max_tokens,
+                            http_options=request_options(deadline),
+                        ),
+                    )
+                    generation.record_usage(response.usage_metadata)
+                lease.settle(response.usage_metadata)
+            return response
+        return attempt
+
+    async def _rebuild_summary(self):
+        while self._folding:
+            batch = list(self._folding)
+            turns_text = "\n".join(f"{t.role.upper()}: {t.text}" for t in batch)
+            try:
+                prompt = summary_prompt.format(summary=self.summary or "(none)", turns=turns_text)
+                response = await llm_caller.call_async(SUMMARY_POLICY, self._summary_attempt(prompt))
+            except Exception as e:
+                logger.error(f"Conversation summary rebuild failed for session {self.session_id}: {str(e)}")
+                return
+            if not response or not response.text:
+                logger.warning(f"Empty conversation summary for session {self.session_id}")
+                return
+            self.summary = response.text.strip()
+            self.summary_tokens = self._estimate(self.summary)
+            # Only drop what was summarized; more turns may have been folded meanwhile
+            del self._folding[:len(batch)]
+            await self._save_summary(batch)
+            logger.info(
+                f"Rebuilt conversation summary for session {self.session_id}: "
+                f"{len(batch)} turns folded, summary ~{self.summary_tokens} tokens"
+            )
+
+    async def _save_summary(self, batch: list[Turn]):
+        through_seq = max((turn.seq for turn in batch if turn.seq is not None), default=None)
+        if self.store is None or through_seq is None:
+            return
+        try:
+            await run_in_threadpool(self.store.save_summary, self.session_id, self.summary, through_seq)
+        except Exception as e:
+            logger.error(f"Saving conversation summary failed for session {self.session_id}: {str(e)}")
+
+    async def close(self, timeout: float = None):
+        """Let an in-flight summary rebuild finish and be stored, cancelling it after `timeout`"""
+        if self._summary_task is None or self._summary_task.done():
+            return
+        timeout = settings.CHAT_SUMMARY_CLOSE_WAIT_SECONDS if timeout is None else timeout
+        try:
+            await asyncio.wait_for(asyncio.shield(self._summary_task), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Conversation summary for session {self.session_id} still running after {timeout}s, cancelling")
+            self._summary_task.cancel()
+            try:
+                await self._summary_task
+            except asyncio.CancelledError:
+                pass
+
+    # Accounting
+
+    def memory_bytes(self) -> int:
+        texts = [self.summary] + [t.text for t in self._folding + self._recent]
+        return sum(len(text.encode("utf-8")) for text in texts)
+
+    def stats(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "persisted": self.store is not None,
+            "recent_turns": len(self._recent),
+            "folding_turns": len(self._folding),
+            "summary_tokens": self.summary_tokens,
+            "context_tokens": self.summary_tokens + sum(t.tokens for t in self._folding + self._recent),
+            "max_tokens": self.max_tokens,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+# Conversations open on this worker, for memory accounting. Keyed by the
+# manager itself: two sockets may resume the same session at once.
+active_conversations: dict[int, ConversationManager] = {}
+
+
+def register_conversation(conversation: ConversationManager):
+    active_conversations[id(conversation)] = conversation
+
+
+def unregister_conversation(conversation: ConversationManager):
+    active_conversations.pop(id(conversation), None)
+
+
+def conversation_memory_stats(owner) -> dict:
+    """Open sessions and their memory for one user on this worker"""
+    conversations = [c for c in list(active_conversations.values()) if c.owner == owner]
+    return {
+        "active_sessions": len(conversations),
+        "total_memory_bytes": sum(c.memory_bytes() for c in conversations),
+        "sessions": [c.stats() for c in conversations],
+    }
+
+
+def conversation_totals() -> dict:
+    """Process-wide numbers, for the metrics endpoint only"""
+    conversations = list(active_conversations.values())
+    return {
+        "active_sessions": len(conversations),
+        "memory_bytes": sum(c.memory_bytes() for c in conversations),
+    }
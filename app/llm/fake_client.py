@@ -0,0 +1,311 @@
+"""
+Offline stand-ins for genai.Client, selected with LLM_BACKEND.
+
+FakeClient ("fake") never touches the network. It answers from, in order:
+- recorded responses in LLM_FAKE_RECORDINGS_PATH, matched by request fingerprint;
+- canned entries in the same file, the first whose "contains" text appears in the prompt;
+- a deterministic synthetic reply of LLM_FAKE_RESPONSE_CHARS characters derived
+  from the prompt hash, or, when the request has a response_schema, JSON
+  generated from the schema (so context_to_json gets a valid scorecard).
+
+Time to first chunk, chunk size and streaming rate follow the LLM_FAKE_*
+settings, and HTTP timeouts passed in http_options are honoured. That lets
+benchmarks and load tests exercise the real chat, governor and retry code
+with realistic timing.
+
+RecordingClient ("record") wraps the real client and appends each response
+to LLM_FAKE_RECORDINGS_PATH, for replay later by FakeClient.
+
+File format, one JSON object per line:
+    {"key": "<fingerprint>", "text": "..."}        recorded
+    {"contains": "DSCR", "text": "..."}            canned
+    {"contains": "scorecard", "json": {...}}       canned structured output
+"""
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+import httpx
+from google.genai import errors, types
+from ..utils.config import settings
+from ..utils.logger import logger
+from .fingerprint import fingerprint
+from .governor import estimate_prompt_tokens
+
+WORDS = (
+    "cash flow debt service coverage ratio leverage liquidity collateral covenant revenue margin "
+    "working capital receivables inventory tenure repayment risk exposure sector outlook borrower "
+    "guarantee security ebitda turnover net worth profitability assessment recommendation"
+).split()
+
+
+def request_key(model: str, contents, config) -> str:
+    config = config or types.GenerateContentConfig()
+    return fingerprint(model, contents, config.system_instruction, config.response_schema)
+
+
+def contents_text(contents) -> str:
+    if contents is None:
+        return ""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(contents_text(item) for item in contents)
+    parts = getattr(contents, "parts", None) or []
+    return "\n".join(part.text for part in parts if getattr(part, "text", None))
+
+
+def sample_from_schema(schema: types.Schema, rng: random.Random, name: str = ""):
+    """A deterministic value that satisfies the schema"""
+    if schema.any_of:
+        return sample_from_schema(schema.any_of[0], rng, name)
+    if schema.enum:
+        return schema.enum[0]
+    kind = schema.type
+    if kind == types.Type.OBJECT:
+        return {key: sample_from_schema(value, rng, key) for key, value in (schema.properties or {}).items()}
+    if kind == types.Type.ARRAY:
+        return [sample_from_schema(schema.items, rng, name) for _ in range(rng.randint(1, 3))]
+    if kind == types.Type.NUMBER:
+        return round(rng.uniform(1, 10), 2)
+    if kind == types.Type.INTEGER:
+        return rng.randint(1, 100)
+    if kind == types.Type.BOOLEAN:
+        return rng.random() < 0.5
+    return f"{name or 'value'} {rng.randint(1, 999)}"
+
+
+def synthetic_text(key: str, length: int) -> str:
+    rng = random.Random(key)
+    words, size = [], 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def load_responses(path: Optional[str]):
+    recorded, canned = {}, []
+    if not path or not Path(path).exists():
+        return recorded, canned
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "key" in entry:
+                recorded[entry["key"]] = entry["text"]
+            elif "contains" in entry:
+                canned.append(entry)
+    logger.info(f"Fake LLM loaded {len(recorded)} recorded and {len(canned)} canned responses from {path}")
+    return recorded, canned
+
+
+def build_response(text: str, prompt_tokens: int, output_tokens: Optional[int] = None):
+    if output_tokens is None:
+        output_tokens = estimate_prompt_tokens(text)
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            finish_reason=types.FinishReason.STOP,
+        )],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        ),
+    )
+
+
+class FakeTimings:
+    """Latency plan for one response; jitter and injected errors come from one seeded RNG"""
+
+    _rng = random.Random(settings.LLM_FAKE_SEED)
+    _lock = threading.Lock()
+
+    def __init__(self, text: str, config):
+        with self._lock:
+            jitter = self._rng.uniform(-1, 1) * settings.LLM_FAKE_LATENCY_JITTER
+            self.fail = self._rng.random() < settings.LLM_FAKE_ERROR_RATE
+        self.first_chunk = max(0.0, settings.LLM_FAKE_LATENCY_SECONDS * (1 + jitter))
+        size = max(1, settings.LLM_FAKE_CHUNK_CHARS)
+        self.chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        self.interval = 1.0 / settings.LLM_FAKE_CHUNKS_PER_SECOND if settings.LLM_FAKE_CHUNKS_PER_SECOND > 0 else 0.0
+        options = getattr(config, "http_options", None) if config else None
+        self.timeout = options.timeout / 1000 if options and options.timeout else None
+
+    @property
+    def total(self) -> float:
+        return self.first_chunk + self.interval * (len(self.chunks) - 1)
+
+    def check(self, waited: float):
+        """(seconds to wait, error to raise after waiting or None)"""
+        if self.timeout is not None and waited > self.timeout:
+            return self.timeout, httpx.ReadTimeout("Fake model read timeout")
+        if self.fail:
+            return waited, errors.ServerError(503, {"error": {
+                "code": 503, "message": "Fake model overloaded", "status": "UNAVAILABLE"
+            }})
+        return waited, None
+
+
+class FakeModels:
+    def __init__(self, owner: "FakeClient"):
+        self.owner = owner
+
+    def generate_content(self, model, contents, config=None):
+        text, prompt_tokens = self.owner.answer(model, contents, config)
+        timings = FakeTimings(text, config)
+        wait, error = timings.check(timings.total)
+        time.sleep(wait)
+        if error:
+            raise error
+        return build_response(text, prompt_tokens)
+
+
+class FakeAsyncModels:
+    def __init__(self, owner: "FakeClient"):
+        self.owner = owner
+
+    async def generate_content(self, model, contents, config=None):
+        text, prompt_tokens = self.owner.answer(model, contents, config)
+        timings = FakeTimings(text, config)
+        wait, error = timings.check(timings.total)
+        await asyncio.sleep(wait)
+        if error:
+            raise error
+        return build_response(text, prompt_tokens)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        text, prompt_tokens = self.owner.answer(model, contents, config)
+        timings = FakeTimings(text, config)
+
+        async def stream():
+            wait, error = timings.check(timings.first_chunk)
+            await asyncio.sleep(wait)
+            if error:
+                raise error
+            sent = ""
+            for index, chunk in enumerate(timings.chunks):
+                if index:
+                    wait, error = timings.check(timings.interval)
+                    await asyncio.sleep(wait)
+                    if error:
+                        raise error
+                sent += chunk
+                # Like Gemini, usage arrives with the final chunk
+                last = index == len(timings.chunks) - 1
+                response = build_response(chunk, prompt_tokens, estimate_prompt_tokens(sent))
+                if not last:
+                    response.usage_metadata = None
+                yield response
+        return stream()
+
+
+class FakeCaches:
+    def __init__(self):
+        self._names = itertools.count(1)
+        self._caches = {}
+
+    def create(self, model, config):
+        name = f"cachedContents/fake-{next(self._names)}"
+        self._caches[name] = config
+        ttl = int(str(config.ttl or "0s").rstrip("s"))
+        return types.CachedContent(
+            name=name, model=model, expire_time=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+        )
+
+    def update(self, name, config):
+        if name not in self._caches:
+            raise errors.ClientError(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+        return types.CachedContent(name=name)
+
+    def delete(self, name):
+        self._caches.pop(name, None)
+
+
+class FakeClient:
+    """Mimics the parts of genai.Client the app uses: models, aio.models and caches"""
+
+    def __init__(self, recordings_path: Optional[str] = None):
+        self.recorded, self.canned = load_responses(recordings_path)
+        self.models = FakeModels(self)
+        self.caches = FakeCaches()
+        self.aio = type("FakeAio", (), {})()
+        self.aio.models = FakeAsyncModels(self)
+        self.aio.caches = self.caches
+
+    def answer(self, model, contents, config):
+        """(response text, prompt token count) for a request"""
+        key = request_key(model, contents, config)
+        prompt_tokens = estimate_prompt_tokens([getattr(config, "system_instruction", None), contents])
+        if key in self.recorded:
+            return self.recorded[key], prompt_tokens
+        prompt = contents_text(contents)
+        for entry in self.canned:
+            if entry["contains"] in prompt:
+                text = entry["text"] if "text" in entry else json.dumps(entry["json"])
+                return text, prompt_tokens
+        if config is not None and config.response_schema is not None:
+            document = sample_from_schema(config.response_schema, random.Random(key))
+            return json.dumps(document), prompt_tokens
+        return synthetic_text(key, settings.LLM_FAKE_RESPONSE_CHARS), prompt_tokens
+
+
+class _RecordingModels:
+    def __init__(self, models, recorder: "RecordingClient"):
+        self._models = models
+        self._recorder = recorder
+
+    def generate_content(self, model, contents, config=None):
+        response = self._models.generate_content(model=model, contents=contents, config=config)
+        self._recorder.record(model, contents, config, response.text)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class _RecordingAsyncModels(_RecordingModels):
+    async def generate_content(self, model, contents, config=None):
+        response = await self._models.generate_content(model=model, contents=contents, config=config)
+        self._recorder.record(model, contents, config, response.text)
+        return response
+
+    async def generate_content_stream(self, model, contents, config=None):
+        stream = await self._models.generate_content_stream(model=model, contents=contents, config=config)
+
+        async def recorded():
+            text = ""
+            async for chunk in stream:
+                text += chunk.text or ""
+                yield chunk
+            self._recorder.record(model, contents, config, text)
+        return recorded()
+
+
+class RecordingClient:
+    """Real client that appends every response to a JSONL file for FakeClient to replay"""
+
+    def __init__(self, client, path: str):
+        self._client = client
+        self._path = path
+        self._lock = threading.Lock()
+        self.models = _RecordingModels(client.models, self)
+        self.aio = type("RecordingAio", (), {})()
+        self.aio.models = _RecordingAsyncModels(client.aio.models, self)
+        self.aio.caches = client.aio.caches
+        self.caches = client.caches
+
+    def record(self, model, contents, config, text):
+        if text is None:
+            return
+        line = json.dumps({"key": request_key(model, contents, config), "text": text})
+        with self._lock, open(self._path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
@@ -0,0 +1,33 @@
+import hashlib
+import json
+
+
+def _framed(data: bytes) -> bytes:
+    return len(data).to_bytes(8, "big") + data
+
+
+def _serialize(part) -> bytes:
+    if part is None:
+        return b"\x00"
+    if isinstance(part, bytes):
+        return part
+    if isinstance(part, str):
+        return part.encode("utf-8")
+    if isinstance(part, (list, tuple)):
+        # Length-prefix items too, so nesting and separators inside items can't collide
+        return b"[" + b"".join(_framed(_serialize(p)) for p in part) + b"]"
+    if isinstance(part, dict):
+        return json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+    if hasattr(part, "model_dump_json"):
+        # google.genai types (Content, Part, Schema, ...) are pydantic models
+        return part.model_dump_json(exclude_none=True).encode("utf-8")
+    return repr(part).encode("utf-8")
+
+
+def fingerprint(*parts) -> str:
+    """Stable SHA-256 over prompt pieces, used as a content-addressed cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        # Length-prefix each piece so ("ab", "c") and ("a", "bc") differ
+        digest.update(_framed(_serialize(part)))
+    return digest.hexdigest()
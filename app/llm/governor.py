@@ -0,0 +1,303 @@
+"""
+Requests-per-minute and tokens-per-minute governor for Gemini calls.
+
+Every model call reserves one request and an estimate of its tokens from two
+token buckets before it is sent. When the buckets are empty, callers queue by
+priority class (interactive chat ahead of background summaries ahead of
+batch scoring), FIFO within a class. The estimate is corrected with the
+usage the model reports afterwards, and a quota error from the API pauses
+all grants for a cooldown, since the buckets evidently overestimate what's
+left.
+
+Sync callers (scorecards, case chat on worker threads) and async callers
+(the chat stream) share the same queue: a dispatcher thread grants waiters
+in order and wakes them with an Event or a future on their event loop.
+Limits are per worker process, so set them to the project quota divided by
+the number of workers.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from google.genai import errors
+from ..utils.config import settings
+from ..utils.logger import logger
+from ..utils.metrics import registry
+
+PRIORITIES = {"interactive": 0, "background": 1, "batch": 2}
+
+# Rough prompt-size estimate; settle() corrects it with the real usage
+CHARS_PER_TOKEN = 4.0
+
+governor_wait = registry.histogram(
+    "llm_governor_wait_seconds", "Time model calls waited for rate-limit capacity", ("priority",),
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+governor_throttled = registry.counter(
+    "llm_governor_throttled_total", "Model calls given up after waiting for capacity", ("priority",),
+)
+governor_quota_errors = registry.counter(
+    "llm_governor_quota_errors_total", "Quota (429) errors returned by the model API",
+)
+
+
+class LLMThrottled(Exception):
+    """No capacity became available within the caller's wait limit"""
+
+
+def estimate_prompt_tokens(contents) -> int:
+    if contents is None:
+        return 0
+    if isinstance(contents, str):
+        return int(len(contents) / CHARS_PER_TOKEN) + 1
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_prompt_tokens(item) for item in contents)
+    parts = getattr(contents, "parts", None)
+    if parts:
+        return sum(estimate_prompt_tokens(part.text) for part in parts if getattr(part, "text", None))
+    return 0
+
+
+def is_quota_error(exc: Exception) -> bool:
+    return isinstance(exc, errors.APIError) and getattr(exc, "code", None) == 429
+
+
+class Lease:
+    """Capacity granted for one call; settle() swaps the estimate for actual usage"""
+
+    def __init__(self, governor, tokens: int):
+        self.governor = governor
+        self.tokens = tokens
+
+    def settle(self, usage_metadata):
+        if usage_metadata is None or not self.governor.enabled:
+            return
+        actual = sum(
+            getattr(usage_metadata, field, None) or 0
+            for field in ("prompt_token_count", "candidates_token_count", "thoughts_token_count")
+        )
+        if actual:
+            self.governor._adjust_tokens(actual - self.tokens)
+            self.tokens = actual
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "granted", "cancelled", "event", "loop", "future")
+
+    def __init__(self, priority: str, tokens: int, loop=None):
+        self.priority = priority
+        self.tokens = tokens
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.future is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class LLMGovernor:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_wait_seconds: float,
+                 default_output_tokens: int, quota_cooldown_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.max_wait_seconds = max_wait_seconds
+        self.default_output_tokens = default_output_tokens
+        self.quota_cooldown_seconds = quota_cooldown_seconds
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # heap of (priority rank, sequence, waiter)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._dispatcher = None
+
+    # Bucket accounting; callers hold self._cond
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
+
+    def _seconds_until_fits(self, tokens: int, now: float) -> float:
+        return max(
+            0.0,
+            self._paused_until - now,
+            (1 - self._requests) / self.request_rate,
+            (tokens - self._tokens) / self.token_rate,
+        )
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                while self._waiters and self._waiters[0][2].cancelled:
+                    heapq.heappop(self._waiters)
+                if not self._waiters:
+                    self._cond.wait()
+                    continue
+                head = self._waiters[0][2]
+                wait = self._seconds_until_fits(head.tokens, now)
+                if wait > 0:
+                    # Woken early when a higher-priority waiter arrives or capacity is refunded
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._waiters)
+                self._requests -= 1
+                self._tokens -= head.tokens
+                head.granted = True
+                head.wake()
+
+    def _enqueue(self, tokens: int, priority: str, loop=None) -> _Waiter:
+        waiter = _Waiter(priority, tokens, loop)
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if not self._waiters and self._seconds_until_fits(tokens, now) == 0:
+                # Uncontended: grant on the caller's thread without a dispatcher round trip
+                self._requests -= 1
+                self._tokens -= tokens
+                waiter.granted = True
+                if loop:
+                    waiter.future.set_result(None)
+                else:
+                    waiter.event.set()
+                return waiter
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="llm-governor", daemon=True)
+                self._dispatcher.start()
+            heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), waiter))
+            self._cond.notify()
+        return waiter
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Cancel a waiter; False if it was granted first and must be refunded instead"""
+        with self._cond:
+            if waiter.granted:
+                return False
+            waiter.cancelled = True
+            return True
+
+    def _refund(self, tokens: int):
+        with self._cond:
+            self._requests = min(self.request_capacity, self._requests + 1)
+            self._tokens = min(self.token_capacity, self._tokens + tokens)
+            self._cond.notify()
+
+    def _adjust_tokens(self, delta: float):
+        with self._cond:
+            # Overruns may push the bucket negative, which delays later calls
+            self._tokens = max(-self.token_capacity, min(self.token_capacity, self._tokens - delta))
+            self._cond.notify()
+
+    def observe_error(self, exc: Exception):
+        if is_quota_error(exc):
+            self.penalize()
+
+    def penalize(self):
+        """Pause all grants after the API reported the quota exhausted"""
+        governor_quota_errors.inc()
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + self.quota_cooldown_seconds)
+            self._requests = min(self._requests, 0.0)
+        logger.warning(f"Gemini quota exhausted, pausing model calls for {self.quota_cooldown_seconds}s")
+
+    def estimate(self, contents, output_tokens: int = None) -> int:
+        tokens = estimate_prompt_tokens(contents) + (output_tokens or self.default_output_tokens)
+        # Never ask for more than the bucket holds, or the call could never be granted
+        return int(min(tokens, self.token_capacity))
+
+    # Acquisition
+
+    def acquire(self, tokens: int, priority: str = "interactive", timeout: float = None) -> Lease:
+        """Block until capacity is granted; raises LLMThrottled after the wait limit"""
+        if not self.enabled:
+            return Lease(self, 0)
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        started = time.perf_counter()
+        waiter = self._enqueue(tokens, priority)
+        if not waiter.event.wait(timeout) and self._withdraw(waiter):
+            governor_throttled.inc(priority=priority)
+            raise LLMThrottled(f"No model capacity for {priority} call within {timeout}s")
+        governor_wait.observe(time.perf_counter() - started, priority=priority)
+        return Lease(self, tokens)
+
+    async def acquire_async(self, tokens: int, priority: str = "interactive", timeout: float = None) -> Lease:
+        if not self.enabled:
+            return Lease(self, 0)
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        started = time.perf_counter()
+        waiter = self._enqueue(tokens, priority, asyncio.get_running_loop())
+        try:
+            if not waiter.granted:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if self._withdraw(waiter):
+                governor_throttled.inc(priority=priority)
+                raise LLMThrottled(f"No model capacity for {priority} call within {timeout}s")
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter):
+                self._refund(tokens)
+            raise
+        governor_wait.observe(time.perf_counter() - started, priority=priority)
+        return Lease(self, tokens)
+
+    @contextmanager
+    def reserve(self, contents, priority: str, output_tokens: int = None, timeout: float = None):
+        """Hold capacity for one sync model call made inside the block"""
+        lease = self.acquire(self.estimate(contents, output_tokens), priority, timeout)
+        try:
+            yield lease
+        except Exception as e:
+            self.observe_error(e)
+            raise
+
+    @asynccontextmanager
+    async def reserve_async(self, contents, priority: str, output_tokens: int = None, timeout: float = None):
+        lease = await self.acquire_async(self.estimate(contents, output_tokens), priority, timeout)
+        try:
+            yield lease
+        except Exception as e:
+            self.observe_error(e)
+            raise
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            queued = {name: 0 for name in PRIORITIES}
+            for _, _, waiter in self._waiters:
+                if not waiter.cancelled:
+                    queued[waiter.priority] += 1
+            return {
+                "enabled": self.enabled,
+                "requests_available": self._requests,
+                "tokens_available": self._tokens,
+                "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+                "queued": queued,
+            }
+
+
+llm_governor = LLMGovernor(
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_wait_seconds=settings.LLM_GOVERNOR_MAX_WAIT_SECONDS,
+    default_output_tokens=settings.LLM_DEFAULT_OUTPUT_TOKENS,
+    quota_cooldown_seconds=settings.LLM_QUOTA_COOLDOWN_SECONDS,
+    enabled=settings.LLM_GOVERNOR_ENABLED,
+)
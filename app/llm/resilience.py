@@ -0,0 +1,337 @@
+"""
+Deadlines, retries, hedged requests and model fallback for Gemini calls.
+
+A call is described by a CallPolicy and an attempt function
+attempt(model, deadline, capacity_wait) that makes one request to `model`
+and must finish by `deadline` (time.monotonic()). Attempts pass
+request_options(deadline) to the SDK so the HTTP timeout matches, and
+governor_wait(deadline, capacity_wait) to the governor so queueing for quota
+cannot overrun the deadline either.
+
+- Retryable failures (5xx, 429, timeouts, transport errors) are retried
+  with jittered exponential backoff while the deadline allows.
+- With hedging on, an attempt still unanswered after the operation's
+  LLM_HEDGE_QUANTILE latency gets a duplicate request, and the first answer
+  wins. Hedges are only sent when the governor has capacity right away.
+- When the primary model is exhausted, one attempt goes to
+  LLM_FALLBACK_MODEL, which keeps a share of the deadline for itself.
+
+Outcomes and per-attempt results are counted, and recent latencies are
+kept per operation, so thresholds can be tuned from /metrics/llm-calls.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+import httpx
+from google.genai import errors, types
+from ..utils.config import settings
+from ..utils.logger import logger
+from ..utils.metrics import registry
+from .governor import LLMThrottled
+
+llm_call_outcomes = registry.counter(
+    "llm_call_outcomes_total", "Final outcome of model calls after retries, hedging and fallback",
+    ("operation", "outcome"),
+)
+llm_attempts = registry.counter(
+    "llm_attempts_total", "Individual model requests by role and result",
+    ("operation", "model", "kind", "result"),
+)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call's deadline passed before any attempt answered"""
+
+
+@dataclass
+class CallPolicy:
+    operation: str
+    deadline_seconds: float
+    max_attempts: int = field(default_factory=lambda: settings.LLM_MAX_ATTEMPTS)
+    hedge: bool = field(default_factory=lambda: settings.LLM_HEDGE_ENABLED)
+    fallback_model: Optional[str] = field(default_factory=lambda: settings.LLM_FALLBACK_MODEL)
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, errors.APIError):
+        return exc.code in (408, 429) or exc.code >= 500
+    return isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+def attempt_result(exc: Exception) -> str:
+    if isinstance(exc, LLMThrottled):
+        return "throttled"
+    if isinstance(exc, (LLMDeadlineExceeded, httpx.TimeoutException, asyncio.TimeoutError)):
+        return "timeout"
+    return "retryable_error" if is_retryable(exc) else "error"
+
+
+def remaining(deadline: float) -> float:
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise LLMDeadlineExceeded("Model call deadline exceeded")
+    return left
+
+
+def request_options(deadline: float) -> types.HttpOptions:
+    """Per-request HTTP timeout (milliseconds) for what's left of the deadline"""
+    return types.HttpOptions(timeout=max(1, int(remaining(deadline) * 1000)))
+
+
+def governor_wait(deadline: float, capacity_wait: Optional[float]) -> float:
+    limit = settings.LLM_GOVERNOR_MAX_WAIT_SECONDS if capacity_wait is None else capacity_wait
+    return min(limit, remaining(deadline))
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies per operation"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, operation: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {op: sorted(samples) for op, samples in self._samples.items()}
+        return {
+            op: {
+                "samples": len(samples),
+                **{f"p{int(q * 100)}": samples[min(len(samples) - 1, int(q * len(samples)))]
+                   for q in (0.5, 0.9, 0.95, 0.99)},
+            }
+            for op, samples in operations.items() if samples
+        }
+
+
+class ResilientCaller:
+    def __init__(self, primary_model: str, workers: int):
+        self.primary_model = primary_model
+        self.workers = workers
+        self.latency = LatencyTracker()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Hedged sync calls run both requests on this pool; created on first use
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="llm-call")
+        return self._executor
+
+    def hedge_delay(self, policy: CallPolicy) -> Optional[float]:
+        if not policy.hedge:
+            return None
+        threshold = self.latency.quantile(policy.operation, settings.LLM_HEDGE_QUANTILE)
+        if threshold is None:
+            return None
+        return max(settings.LLM_HEDGE_MIN_DELAY_SECONDS, threshold)
+
+    def _plan(self, policy: CallPolicy):
+        """(primary deadline, overall deadline); the fallback keeps its share of the budget"""
+        now = time.monotonic()
+        deadline = now + policy.deadline_seconds
+        if policy.fallback_model and policy.fallback_model != self.primary_model:
+            return now + policy.deadline_seconds * (1 - settings.LLM_FALLBACK_BUDGET_FRACTION), deadline
+        return deadline, deadline
+
+    def _backoff(self, number: int) -> float:
+        base = settings.LLM_RETRY_BACKOFF_SECONDS * (2 ** number)
+        return min(settings.LLM_RETRY_BACKOFF_MAX_SECONDS, base) * random.uniform(0.5, 1.5)
+
+    def _finish(self, policy: CallPolicy, outcome: str, error: Exception = None):
+        llm_call_outcomes.inc(operation=policy.operation, outcome=outcome)
+        if error is not None:
+            logger.warning(f"Model call {policy.operation} failed ({outcome}): {type(error).__name__}: {str(error)}")
+
+    @staticmethod
+    def _failure(error: Exception) -> str:
+        if isinstance(error, LLMThrottled):
+            return "throttled"
+        if attempt_result(error) == "timeout":
+            return "deadline"
+        return "error"
+
+    # Sync calls
+
+    def _run(self, policy, attempt, model, deadline, kind, capacity_wait=None):
+        started = time.monotonic()
+        try:
+            response = attempt(model, deadline, capacity_wait)
+        except Exception as e:
+            llm_attempts.inc(operation=policy.operation, model=model, kind=kind, result=attempt_result(e))
+            raise
+        if model == self.primary_model:
+            self.latency.observe(policy.operation, time.monotonic() - started)
+        llm_attempts.inc(operation=policy.operation, model=model, kind=kind, result="ok")
+        return response
+
+    def _attempt(self, policy, attempt, model, deadline, kind):
+        """One attempt, hedged when it runs long; returns (response, hedge won)"""
+        delay = self.hedge_delay(policy)
+        if delay is None or delay >= remaining(deadline):
+            return self._run(policy, attempt, model, deadline, kind), False
+
+        primary = self.executor.submit(self._run, policy, attempt, model, deadline, kind)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result(), False
+        # A hedge must not queue behind real work: only send it if capacity is free now
+        hedge = self.executor.submit(self._run, policy, attempt, model, deadline, "hedge", 0.0)
+        pending, failures = {primary, hedge}, {}
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise LLMDeadlineExceeded("Model call deadline exceeded")
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), future is hedge
+                failures[future] = future.exception()
+        raise failures.get(primary) or failures[hedge]
+
+    def call(self, policy: CallPolicy, attempt):
+        """Run attempt under the policy from a sync caller; raises the last error on failure"""
+        primary_deadline, deadline = self._plan(policy)
+        error = None
+        for number in range(policy.max_attempts):
+            kind = "primary" if number == 0 else "retry"
+            try:
+                response, hedge_won = self._attempt(policy, attempt, self.primary_model, primary_deadline, kind)
+            except Exception as e:
+                error = e
+                if not is_retryable(e) or number + 1 == policy.max_attempts:
+                    break
+                backoff = self._backoff(number)
+                if time.monotonic() + backoff >= primary_deadline:
+                    break
+                time.sleep(backoff)
+                continue
+            self._finish(policy, "hedge_won" if hedge_won else ("retried_ok" if number else "ok"))
+            return response
+
+        if policy.fallback_model and policy.fallback_model != self.primary_model and is_retryable(error):
+            try:
+                response = self._run(policy, attempt, policy.fallback_model, deadline, "fallback")
+            except Exception as e:
+                error = e
+            else:
+                self._finish(policy, "fallback_ok")
+                return response
+        self._finish(policy, self._failure(error), error)
+        raise error
+
+    # Async calls
+
+    async def _run_async(self, policy, attempt, model, deadline, kind, capacity_wait=None):
+        started = time.monotonic()
+        try:
+            try:
+                response = await asyncio.wait_for(attempt(model, deadline, capacity_wait), remaining(deadline))
+            except asyncio.TimeoutError as e:
+                if time.monotonic() >= deadline:
+                    raise LLMDeadlineExceeded("Model call deadline exceeded") from e
+                raise
+        except Exception as e:
+            llm_attempts.inc(operation=policy.operation, model=model, kind=kind, result=attempt_result(e))
+            raise
+        if model == self.primary_model:
+            self.latency.observe(policy.operation, time.monotonic() - started)
+        llm_attempts.inc(operation=policy.operation, model=model, kind=kind, result="ok")
+        return response
+
+    async def _attempt_async(self, policy, attempt, model, deadline, kind, discard):
+        delay = self.hedge_delay(policy)
+        if delay is None or delay >= remaining(deadline):
+            return await self._run_async(policy, attempt, model, deadline, kind), False
+
+        primary = asyncio.ensure_future(self._run_async(policy, attempt, model, deadline, kind))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result(), False
+        hedge = asyncio.ensure_future(self._run_async(policy, attempt, model, deadline, "hedge", 0.0))
+        pending, failures, winner = {primary, hedge}, {}, None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        failures[task] = task.exception()
+                    elif winner is None:
+                        winner = task
+            if winner is not None:
+                return winner.result(), winner is hedge
+            raise failures.get(primary) or failures[hedge]
+        finally:
+            # Cancel the loser; if it answered in the same instant, let the caller release it
+            for task in pending:
+                task.cancel()
+            if discard is not None:
+                for task in (primary, hedge):
+                    if task is not winner and task.done() and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    async def call_async(self, policy: CallPolicy, attempt, discard=None):
+        """
+        Async twin of call(). attempt is a coroutine function; discard, if
+        given, is awaited with a losing hedge's response to release it.
+        """
+        primary_deadline, deadline = self._plan(policy)
+        error = None
+        for number in range(policy.max_attempts):
+            kind = "primary" if number == 0 else "retry"
+            try:
+                response, hedge_won = await self._attempt_async(
+                    policy, attempt, self.primary_model, primary_deadline, kind, discard
+                )
+            except Exception as e:
+                error = e
+                if not is_retryable(e) or number + 1 == policy.max_attempts:
+                    break
+                backoff = self._backoff(number)
+                if time.monotonic() + backoff >= primary_deadline:
+                    break
+                await asyncio.sleep(backoff)
+                continue
+            self._finish(policy, "hedge_won" if hedge_won else ("retried_ok" if number else "ok"))
+            return response
+
+        if policy.fallback_model and policy.fallback_model != self.primary_model and is_retryable(error):
+            try:
+                response = await self._run_async(policy, attempt, policy.fallback_model, deadline, "fallback")
+            except Exception as e:
+                error = e
+            else:
+                self._finish(policy, "fallback_ok")
+                return response
+        self._finish(policy, self._failure(error), error)
+        raise error
+
+    def snapshot(self) -> dict:
+        return {
+            "primary_model": self.primary_model,
+            "fallback_model": settings.LLM_FALLBACK_MODEL,
+            "hedging": settings.LLM_HEDGE_ENABLED,
+            "hedge_quantile": settings.LLM_HEDGE_QUANTILE,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+llm_caller = ResilientCaller(settings.GEMINI_MODEL, workers=settings.LLM_CALL_WORKERS)
@@ -0,0 +1,167 @@
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from ..database.database import SessionLocal
+from ..database.models import ScorecardCacheEntry
+from ..utils.config import settings
+from ..utils.logger import logger
+
+
+class DiskScorecardStore:
+    """Durable tier as one JSON file per key"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, model: str, payload: dict):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        # Atomic so concurrent readers never see a half-written scorecard
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class PostgresScorecardStore:
+    """Durable tier in the scorecard_cache table"""
+
+    def get(self, key: str):
+        with SessionLocal() as db:
+            entry = db.get(ScorecardCacheEntry, key)
+            return entry.payload if entry else None
+
+    def put(self, key: str, model: str, payload: dict):
+        with SessionLocal() as db:
+            db.merge(ScorecardCacheEntry(key=key, model=model, payload=payload))
+            db.commit()
+
+    def delete(self, key: str):
+        with SessionLocal() as db:
+            db.query(ScorecardCacheEntry).filter(ScorecardCacheEntry.key == key).delete()
+            db.commit()
+
+    def clear(self):
+        with SessionLocal() as db:
+            db.query(ScorecardCacheEntry).delete()
+            db.commit()
+
+
+class ScorecardCache:
+    """
+    Content-addressed cache for context_to_json results: an in-process LRU in
+    front of an optional durable store. Durable-store errors are logged and
+    treated as misses so scoring never fails because of the cache.
+    """
+
+    def __init__(self, store=None, max_entries: int = 512):
+        self.store = store
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "durable_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                # Callers may annotate the scorecard; keep the cached copy pristine
+                return copy.deepcopy(self._memory[key])
+
+        payload = None
+        if self.store:
+            try:
+                payload = self.store.get(key)
+            except Exception as e:
+                logger.error(f"Scorecard cache read failed: {str(e)}")
+                self._count("errors")
+
+        if payload is None:
+            self._count("misses")
+            return None
+        self._count("durable_hits")
+        self._remember(key, copy.deepcopy(payload))
+        return payload
+
+    def put(self, key: str, model: str, payload: dict):
+        self._remember(key, copy.deepcopy(payload))
+        self._count("stores")
+        if self.store:
+            try:
+                self.store.put(key, model, payload)
+            except Exception as e:
+                logger.error(f"Scorecard cache write failed: {str(e)}")
+                self._count("errors")
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.store:
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                logger.error(f"Scorecard cache invalidation failed: {str(e)}")
+                self._count("errors")
+                return
+        logger.info(f"Scorecard cache entry invalidated: {key}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.store:
+            try:
+                self.store.clear()
+            except Exception as e:
+                logger.error(f"Scorecard cache clear failed: {str(e)}")
+                self._count("errors")
+                return
+        logger.info("Scorecard cache cleared")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._memory)}
+
+    def _remember(self, key: str, payload: dict):
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def build_scorecard_cache() -> ScorecardCache:
+    backend = settings.SCORECARD_CACHE_BACKEND.lower()
+    if backend == "postgres":
+        store = PostgresScorecardStore()
+    elif backend == "disk":
+        store = DiskScorecardStore(settings.SCORECARD_CACHE_DIR)
+    elif backend == "none":
+        store = None
+    else:
+        raise ValueError(f"Unknown SCORECARD_CACHE_BACKEND: {settings.SCORECARD_CACHE_BACKEND}")
+    return ScorecardCache(store, max_entries=settings.SCORECARD_CACHE_MAX_ENTRIES)
@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import Future
+from ..utils.metrics import registry
+
+singleflight_calls = registry.counter(
+    "llm_singleflight_calls_total", "Coalescable model calls; followers shared a leader's result",
+    ("operation", "role"),
+)
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: the first caller for a key runs the
+    function, callers arriving while it runs wait for and share its result
+    (or exception). Nothing is kept once the call finishes; caching results
+    is the result cache's job.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        singleflight_calls.inc(operation=self.operation, role="leader" if leader else "follower")
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
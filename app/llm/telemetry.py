@@ -0,0 +1,76 @@
+"""
+Gemini call timing and token usage.
+
+observe_generation() wraps one model call. Streaming callers mark the first
+chunk with first_token() to get time-to-first-token; every caller hands over
+the response's usage_metadata so token counts are recorded per operation.
+"""
+import time
+from contextlib import contextmanager
+from ..utils.metrics import registry
+
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# usage_metadata field -> token kind label
+TOKEN_FIELDS = {
+    "prompt_token_count": "prompt",
+    "candidates_token_count": "output",
+    "cached_content_token_count": "cached",
+    "thoughts_token_count": "thoughts",
+}
+
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from request to the first streamed chunk",
+    ("operation", "model"), buckets=LLM_LATENCY_BUCKETS,
+)
+llm_generation_duration = registry.histogram(
+    "llm_generation_seconds", "Total model call time, including streaming",
+    ("operation", "model", "outcome"), buckets=LLM_LATENCY_BUCKETS,
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens reported by the model's usage metadata",
+    ("operation", "model", "kind"),
+)
+
+
+class Generation:
+    def __init__(self, operation: str, model: str):
+        self.operation = operation
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.usage = None
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            llm_time_to_first_token.observe(
+                self.first_token_at - self.started, operation=self.operation, model=self.model
+            )
+
+    def record_usage(self, usage_metadata):
+        # Streams repeat usage on several chunks with running totals; keep the latest
+        if usage_metadata is not None:
+            self.usage = usage_metadata
+
+    def finish(self, outcome: str):
+        llm_generation_duration.observe(
+            time.perf_counter() - self.started, operation=self.operation, model=self.model, outcome=outcome
+        )
+        if self.usage is None:
+            return
+        for field, kind in TOKEN_FIELDS.items():
+            count = getattr(self.usage, field, None)
+            if count:
+                llm_tokens.inc(count, operation=self.operation, model=self.model, kind=kind)
+
+
+@contextmanager
+def observe_generation(operation: str, model: str):
+    generation = Generation(operation, model)
+    try:
+        yield generation
+    except BaseException:
+        generation.finish("error")
+        raise
+    generation.finish("ok")
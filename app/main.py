@@ -1,26 +1,46 @@
 from fastapi import FastAPI
-from .database.database import init_db
-from .routers import loan_cases, auth, chat, file_upload
+from .database.database import init_db, async_engine
+from .auth.security import password_hasher
+from .routers import loan_cases, auth, chat, file_upload, direct_upload, scorecards
+from .routers import async_auth, async_loan_cases, loan_case_bulk, metrics
+from .utils.config import settings
 from .utils.logger import logger
+from .utils.request_metrics import RequestMetricsMiddleware
 import uvicorn
 
 app = FastAPI(title="Credit Underwriter API", version="1.0.0")
+app.add_middleware(RequestMetricsMiddleware)
 
 # Initialize database
 @app.on_event("startup")
 def on_startup():
     try:
         init_db()
-        logger.info("Application started successfully")
+        logger.info(f"Application started successfully (async database mode: {settings.DB_ASYNC_MODE})")
     except Exception as e:
         logger.critical(f"Application startup failed: {str(e)}")
         raise
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    if async_engine is not None:
+        await async_engine.dispose()
+    password_hasher.shutdown()
+
 # Include routers
-app.include_router(auth.router)
-app.include_router(loan_cases.router)
+# Before the case routers: /loan-cases/export would otherwise match /loan-cases/{case_id}
+app.include_router(loan_case_bulk.router)
+if settings.DB_ASYNC_MODE:
+    app.include_router(async_auth.router)
+    app.include_router(async_loan_cases.router)
+else:
+    app.include_router(auth.router)
+    app.include_router(loan_cases.router)
 app.include_router(chat.router)
 app.include_router(file_upload.router)
+app.include_router(direct_upload.router)
+app.include_router(scorecards.router)
+app.include_router(metrics.router)
 
 @app.get("/health")
 def health_check():
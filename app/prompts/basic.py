@@ -56,4 +56,22 @@ The JSON should contain:
 
 Generate the JSON following the exact schema provided, extracting relevant information from the repository content.
 If specific information is not found, use reasonable defaults or indicate "Not Available".
-"""
\ No newline at end of file
+"""
+
+summary_prompt = """
+You maintain the running memory of an underwriting chat between a credit underwriter and an AI assistant.
+Merge the existing summary with the new conversation turns into one updated summary.
+
+Keep:
+- Every figure, ratio, limit and calculation result that was stated, with its source document if mentioned
+- Decisions, assumptions and open questions raised by the underwriter
+- Requests the assistant has not fully answered yet
+
+Drop greetings, filler and repeated explanations. Write compact bullet points, no more than needed to continue the conversation accurately.
+
+Existing summary:
+{summary}
+
+New conversation turns:
+{turns}
+"""
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.database import get_async_db
+from ..database.schemas import CreditUnderwriterCreate, Token, ForgotPassword
+from ..database.async_crud import create_user, get_user_by_email_detached, update_user_password
+from ..auth.security import password_hasher, create_access_token
+from ..auth.dependencies import get_current_user
+from ..auth.rate_limit import enforce_rate_limit
+from ..utils.logger import logger
+
+# Async twin of routers/auth.py, mounted instead of it when DB_ASYNC_MODE is on
+router = APIRouter(tags=["Authentication"])
+
+@router.post("/signup", response_model=Token)
+async def signup(user: CreditUnderwriterCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await get_user_by_email_detached(db, user.email)
+    if db_user:
+        logger.warning(f"Signup attempt with existing email: {user.email}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
+    hashed_password = await password_hasher.hash_async(user.password)
+    new_user = await create_user(db, user, hashed_password)
+    access_token = create_access_token(data={"sub": new_user.email, "uid": new_user.id})
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/login", response_model=Token)
+async def login(request: Request, login_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    await enforce_rate_limit(request, "login", login_data.username)
+    user = await get_user_by_email_detached(db, login_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update_async(login_data.password, user.password)
+    if not valid:
+        logger.warning(f"Failed login attempt for email: {login_data.username}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if new_hash:
+        # Stored hash predates the current bcrypt cost
+        await update_user_password(db, user.email, new_hash)
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.patch("/forgot-password")
+async def forgot_password(request: Request, forgot_data: ForgotPassword, db: AsyncSession = Depends(get_async_db)):
+    await enforce_rate_limit(request, "forgot_password", forgot_data.email)
+    user = await get_user_by_email_detached(db, forgot_data.email)
+    if not user:
+        logger.warning(f"Password reset attempt for non-existent email: {forgot_data.email}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    if forgot_data.security_answer != user.security_answer:
+        logger.warning(f"Invalid security answer for email: {forgot_data.email}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid security answer"
+        )
+
+    hashed_password = await password_hasher.hash_async(forgot_data.new_password)
+    await update_user_password(db, forgot_data.email, hashed_password)
+    return {"message": "Password updated successfully"}
+
+@router.get("/me")
+async def get_current_user_endpoint(current_user: str = Depends(get_current_user)):
+    return {"email": current_user}
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.database import get_async_db
+from ..database.schemas import LoanCaseCreate, LoanCaseResponse, LoanCaseUpdate, LoanCasePage
+from ..database.async_crud import (
+    create_loan_case,
+    get_owned_loan_case,
+    list_user_loan_cases,
+    update_loan_case,
+    delete_loan_case
+)
+from ..auth.dependencies import get_current_user_id
+from .loan_cases import loan_case_not_found, loan_case_list_params, loan_case_page
+
+# Async twin of routers/loan_cases.py, mounted instead of it when DB_ASYNC_MODE is on
+router = APIRouter(tags=["Loan Cases"])
+
+@router.post("/loan-cases/", response_model=LoanCaseResponse, status_code=status.HTTP_201_CREATED)
+async def create_new_loan_case(
+    loan_case: LoanCaseCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await create_loan_case(db, loan_case, user_id)
+
+@router.get("/loan-cases/", response_model=LoanCasePage)
+async def read_user_loan_cases(
+    params: dict = Depends(loan_case_list_params),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return loan_case_page(await list_user_loan_cases(db, user_id, **params), params)
+
+@router.get("/loan-cases/{case_id}", response_model=LoanCaseResponse)
+async def read_loan_case(
+    case_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    loan_case = await get_owned_loan_case(db, case_id, user_id)
+    if not loan_case:
+        raise loan_case_not_found(case_id, user_id, "read")
+    return loan_case
+
+@router.patch("/loan-cases/{case_id}", response_model=LoanCaseResponse)
+async def update_existing_loan_case(
+    case_id: int,
+    loan_case: LoanCaseUpdate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    updated = await update_loan_case(db, case_id, user_id, loan_case)
+    if not updated:
+        raise loan_case_not_found(case_id, user_id, "update")
+    return updated
+
+@router.delete("/loan-cases/{case_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_existing_loan_case(
+    case_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await delete_loan_case(db, case_id, user_id):
+        raise loan_case_not_found(case_id, user_id, "delete")
+    return
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from ..database.database import get_db
 from ..database.schemas import CreditUnderwriterCreate, Token, Login, ForgotPassword
-from ..database.crud import create_user, get_user_by_email, update_user_password
-from ..auth.security import verify_password, create_access_token
+from ..database.crud import create_user, get_user_by_email_detached, update_user_password
+from ..auth.security import password_hasher, create_access_token
 from ..auth.dependencies import get_current_user
+from ..auth.rate_limit import enforce_rate_limit
 from ..utils.logger import logger
 
 router = APIRouter(tags=["Authentication"]) 
 
+# Password routes are async: bcrypt runs on the hashing process pool and the
+# short DB calls on the threadpool, so a login burst doesn't hold threadpool
+# slots while hashes are computed
+
 @router.post("/signup", response_model=Token)
-def signup(user: CreditUnderwriterCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_email(db, user.email)
+async def signup(user: CreditUnderwriterCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(get_user_by_email_detached, db, user.email)
     if db_user:
         logger.warning(f"Signup attempt with existing email: {user.email}")
         raise HTTPException(
@@ -20,14 +26,19 @@ def signup(user: CreditUnderwriterCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    new_user = create_user(db, user)
-    access_token = create_access_token(data={"sub": new_user.email})
+    hashed_password = await password_hasher.hash_async(user.password)
+    new_user = await run_in_threadpool(create_user, db, user, hashed_password)
+    access_token = create_access_token(data={"sub": new_user.email, "uid": new_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(login_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_email(db, login_data.username)
-    if not user or not verify_password(login_data.password, user.password):
+async def login(request: Request, login_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    await enforce_rate_limit(request, "login", login_data.username)
+    user = await run_in_threadpool(get_user_by_email_detached, db, login_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update_async(login_data.password, user.password)
+    if not valid:
         logger.warning(f"Failed login attempt for email: {login_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,12 +46,16 @@ def login(login_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    if new_hash:
+        # Stored hash predates the current bcrypt cost
+        await run_in_threadpool(update_user_password, db, user.email, new_hash)
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.patch("/forgot-password")
-def forgot_password(forgot_data: ForgotPassword, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, forgot_data.email)
+async def forgot_password(request: Request, forgot_data: ForgotPassword, db: Session = Depends(get_db)):
+    await enforce_rate_limit(request, "forgot_password", forgot_data.email)
+    user = await run_in_threadpool(get_user_by_email_detached, db, forgot_data.email)
     if not user:
         logger.warning(f"Password reset attempt for non-existent email: {forgot_data.email}")
         raise HTTPException(
@@ -55,7 +70,8 @@ def forgot_password(forgot_data: ForgotPassword, db: Session = Depends(get_db)):
             detail="Invalid security answer"
         )
     
-    update_user_password(db, forgot_data.email, forgot_data.new_password)
+    hashed_password = await password_hasher.hash_async(forgot_data.new_password)
+    await run_in_threadpool(update_user_password, db, forgot_data.email, hashed_password)
     return {"message": "Password updated successfully"}
 
 @router.get("/me")
@@ -1,15 +1,110 @@
 import os
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status, Query
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from google import genai
 from google.genai import types
-from ..utils.logger import logger
+from ..utils.logger import logger, payload_preview
 from ..utils.config import settings
 from ..auth.security import verify_token
+from ..auth.dependencies import get_current_user, get_current_user_id
+from ..database.schemas import ChatSessionCreate, ChatSessionResponse, ChatMessagePage
 from ..llm.client import client
+from ..llm.chat_store import chat_store
+from ..llm.telemetry import Generation
+from ..llm.governor import llm_governor, LLMThrottled, Lease, estimate_prompt_tokens
+from ..llm.resilience import CallPolicy, llm_caller, remaining, governor_wait
+from ..llm.conversation import (
+    ConversationManager,
+    register_conversation,
+    unregister_conversation,
+    conversation_memory_stats
+)
 
 # Initialize Gemini client
 model_name = settings.GEMINI_MODEL
 
+# Per-worker cap on in-flight Gemini generations
+generation_slots = asyncio.Semaphore(settings.CHAT_MAX_CONCURRENT_GENERATIONS)
+
+# Retries, hedging and fallback only apply until the first chunk: after that
+# the user is already reading the answer
+CHAT_POLICY = CallPolicy("chat", deadline_seconds=settings.LLM_CHAT_FIRST_TOKEN_DEADLINE_SECONDS)
+
+# The HTTP request outlives the first-token deadline: it carries the whole reply
+CHAT_STREAM_OPTIONS = types.HttpOptions(timeout=int(settings.LLM_CHAT_STREAM_TIMEOUT_SECONDS * 1000))
+
+
+@dataclass
+class OpenedStream:
+    lease: Lease
+    generation: Generation
+    stream: object
+    first_chunk: object
+
+
+def chat_stream_attempt(contents, config: types.GenerateContentConfig):
+    """Open a stream on the given model and wait for its first chunk, for llm_caller"""
+    async def attempt(model, deadline, capacity_wait):
+        # Interactive chat is granted quota ahead of summaries and batch scoring
+        lease = await llm_governor.acquire_async(
+            llm_governor.estimate([config.system_instruction, contents]),
+            "interactive",
+            timeout=governor_wait(deadline, capacity_wait),
+        )
+        generation = Generation("chat", model)
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config.model_copy(update={"http_options": CHAT_STREAM_OPTIONS}),
+                ),
+                remaining(deadline),
+            )
+            # Only the wait for the first chunk is held to the deadline
+            first_chunk = await asyncio.wait_for(anext(stream, None), remaining(deadline))
+        except BaseException as e:
+            # Includes cancellation when a hedge wins
+            generation.finish("error")
+            if isinstance(e, Exception):
+                llm_governor.observe_error(e)
+            if stream is not None and hasattr(stream, "aclose"):
+                await stream.aclose()
+            raise
+        generation.first_token()
+        return OpenedStream(lease, generation, stream, first_chunk)
+    return attempt
+
+
+def partial_usage(system_instruction, contents, reply: str):
+    """Estimated usage for a stream cut off before its final chunk, which carries the real one"""
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=estimate_prompt_tokens([system_instruction, contents]),
+        candidates_token_count=estimate_prompt_tokens(reply),
+    )
+
+
+async def discard_chat_stream(opened: OpenedStream):
+    opened.generation.finish("discarded")
+    if hasattr(opened.stream, "aclose"):
+        await opened.stream.aclose()
+
+
+async def acquire_generation_slot() -> bool:
+    """Wait for a free generation slot, giving up after the configured wait"""
+    try:
+        await asyncio.wait_for(
+            generation_slots.acquire(),
+            timeout=settings.CHAT_GENERATION_WAIT_SECONDS
+        )
+        return True
+    except asyncio.TimeoutError:
+        return False
+
 
 async def authenticate_websocket(websocket: WebSocket, token: str):
     """Authenticate WebSocket connection using JWT token"""
@@ -18,75 +113,206 @@ async def authenticate_websocket(websocket: WebSocket, token: str):
         if not payload:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token")
             return None
-        return payload.get("sub")  # Return user email
+        if payload.get("uid") is None:
+            # Issued before tokens carried the id; sessions are stored per underwriter id
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Please log in again")
+            return None
+        return payload  # sub is the user's email, uid their underwriter id
     except Exception as e:
         logger.error(f"WebSocket authentication error: {str(e)}")
         await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Authentication failed")
         return None
 
+async def open_chat_session(websocket: WebSocket, user_id: int, session_id: Optional[str], loan_case_id: Optional[int]):
+    """The stored session to chat in, or None after closing the socket with the reason"""
+    try:
+        if session_id:
+            stored = await run_in_threadpool(chat_store.get_session, session_id, user_id)
+            reason = "Chat session not found"
+        else:
+            # Written on the first persisted turn, so idle connections leave no empty sessions
+            stored = await run_in_threadpool(chat_store.new_session, user_id, loan_case_id)
+            reason = "Loan case not found"
+    except Exception as e:
+        logger.error(f"Opening chat session failed: {str(e)}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Chat sessions unavailable")
+        return None
+    if stored is None:
+        logger.warning(f"{reason} for underwriter {user_id}: session {session_id}, loan case {loan_case_id}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=reason)
+    return stored
+
 router = APIRouter(tags=["Chat"])
 
 @router.websocket("/chat")
-async def websocket_endpoint(websocket: WebSocket, token: str = Query(..., alias="token"),):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    token: str = Query(..., alias="token"),
+    session_id: Optional[str] = Query(None),
+    loan_case_id: Optional[int] = Query(None),
+):
+    """
+    Chat over a WebSocket. Pass session_id to resume a stored session (from
+    POST /chat/sessions or GET /chat/sessions); without it a new session is
+    started, about loan_case_id if given.
+    """
     await websocket.accept()
 
     # Authenticate user
-    user_email = await authenticate_websocket(websocket, token)
-    if not user_email:
+    payload = await authenticate_websocket(websocket, token)
+    if not payload:
         return
+    user_email, user_id = payload.get("sub"), payload["uid"]
 
     logger.info(f"Authenticated user: {user_email}")
     logger.info("WebSocket connection established")
-    
+
+    stored = await open_chat_session(websocket, user_id, session_id, loan_case_id)
+    if stored is None:
+        return
+
+    # Initialize token-budgeted conversation history, resumed from the store
+    conversation = ConversationManager(client, model_name, owner=user_email, store=chat_store, session=stored)
     try:
+        await conversation.load_history()
+    except Exception as e:
+        logger.error(f"Loading chat session {stored.session_id} failed: {str(e)}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Chat history unavailable")
+        return
+    register_conversation(conversation)
 
-        # Initialize conversation history
-        conversation = []
-        
+    try:
         while True:
             # Receive message from client
             user_message = await websocket.receive_text()
-            logger.info(f"Received message: {user_message}")
+            logger.info(f"Received message: {payload_preview(user_message)}", extra={"chars": len(user_message)})
             
             # Add user message to conversation
-            conversation.append(
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=user_message)],
-                )
-            )
-            
-            # Create config for streaming
-            # generate_content_config = types.GenerateContentConfig(
-            #     thinking_config=types.ThinkingConfig(thinking_budget=-1),
-            # )
-            
-            # Stream response from Gemini
-            response_stream = client.models.generate_content_stream(
-                model=model_name,
-                contents=conversation,
-                # config=generate_content_config,
-            )
-            
-            # Stream chunks to client
-            full_response = ""
-            for chunk in response_stream:
-                if chunk.text:
-                    await websocket.send_text(chunk.text)
-                    full_response += chunk.text
+            conversation.add_user_message(user_message)
             
-            # Add model response to conversation
-            conversation.append(
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=full_response)],
+            # Push back when this worker is already saturated
+            if not await acquire_generation_slot():
+                logger.warning(f"Chat generation capacity exhausted, rejecting message from {user_email}")
+                conversation.discard_last()
+                await websocket.close(
+                    code=status.WS_1013_TRY_AGAIN_LATER,
+                    reason="Server busy, please retry shortly"
                 )
+                return
+
+            # Create config for streaming; older turns travel as a summary
+            system_instruction = conversation.system_instruction()
+            contents = conversation.contents()
+            generate_content_config = types.GenerateContentConfig(
+                system_instruction=system_instruction,
+                # thinking_config=types.ThinkingConfig(thinking_budget=-1),
             )
+
+            # Stream response from Gemini without blocking the event loop
+            full_response = ""
+            try:
+                try:
+                    opened = await llm_caller.call_async(
+                        CHAT_POLICY,
+                        chat_stream_attempt(contents, generate_content_config),
+                        discard=discard_chat_stream,
+                    )
+                except LLMThrottled:
+                    logger.warning(f"Gemini rate limit budget exhausted, rejecting message from {user_email}")
+                    conversation.discard_last()
+                    await websocket.close(
+                        code=status.WS_1013_TRY_AGAIN_LATER,
+                        reason="Model capacity exhausted, please retry shortly"
+                    )
+                    return
+
+                # Stream chunks to client
+                generation = opened.generation
+                outcome = "error"
+                try:
+                    chunk = opened.first_chunk
+                    while chunk is not None:
+                        if chunk.text:
+                            await websocket.send_text(chunk.text)
+                            full_response += chunk.text
+                        if chunk.usage_metadata:
+                            conversation.observe_usage(chunk.usage_metadata)
+                            generation.record_usage(chunk.usage_metadata)
+                        chunk = await anext(opened.stream, None)
+                    outcome = "ok"
+                finally:
+                    # Runs on disconnects and send or model errors too: release the
+                    # upstream stream and charge the governor what was really used
+                    generation.finish(outcome)
+                    opened.lease.settle(generation.usage or partial_usage(system_instruction, contents, full_response))
+                    if hasattr(opened.stream, "aclose"):
+                        await opened.stream.aclose()
+                    # The question and its (possibly cut-off) reply are stored together,
+                    # so a resumed history never has a question without an answer
+                    if full_response:
+                        conversation.add_model_message(full_response)
+                        await conversation.persist()
+                    else:
+                        conversation.discard_last()
+            finally:
+                generation_slots.release()
             
-            logger.info(f"Sent response: {full_response}")
+            logger.info(f"Sent response: {payload_preview(full_response)}", extra={"chars": len(full_response)})
             
     except WebSocketDisconnect:
         logger.info("WebSocket connection closed")
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
-        await websocket.close(code=1011, reason=str(e))
\ No newline at end of file
+        await websocket.close(code=1011, reason=str(e))
+    finally:
+        unregister_conversation(conversation)
+        await conversation.close()
+
+
+@router.get("/chat/stats")
+def chat_memory_stats(current_user: str = Depends(get_current_user)):
+    """Memory held by the caller's open chat sessions on this worker"""
+    return conversation_memory_stats(owner=current_user)
+
+
+def owned_chat_session(session_id: str, user_id: int):
+    stored = chat_store.get_session(session_id, user_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found"
+        )
+    return stored
+
+@router.post("/chat/sessions", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_chat_session(body: ChatSessionCreate, user_id: int = Depends(get_current_user_id)):
+    """Start a session to open /chat with, optionally about one of the user's loan cases"""
+    stored = chat_store.create_session(user_id, body.loan_case_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Loan case with ID {body.loan_case_id} not found"
+        )
+    return stored
+
+@router.get("/chat/sessions", response_model=list[ChatSessionResponse])
+def list_chat_sessions(
+    loan_case_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: int = Depends(get_current_user_id)
+):
+    """The user's sessions with at least one message, most recently active first"""
+    return chat_store.list_sessions(user_id, loan_case_id, limit)
+
+@router.get("/chat/sessions/{session_id}/messages", response_model=ChatMessagePage)
+def read_chat_messages(
+    session_id: str,
+    before_seq: Optional[int] = Query(None, ge=1),
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=settings.CHAT_HISTORY_MAX_PAGE_SIZE),
+    user_id: int = Depends(get_current_user_id)
+):
+    """A page of stored messages, newest page first; follow next_before_seq for older ones"""
+    owned_chat_session(session_id, user_id)
+    messages = chat_store.list_messages(session_id, before_seq=before_seq, limit=limit)
+    next_before_seq = messages[0].seq if messages and messages[0].seq > 1 else None
+    return ChatMessagePage(items=messages, next_before_seq=next_before_seq)
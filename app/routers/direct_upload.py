@@ -0,0 +1,280 @@
+import base64
+import math
+import os
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from ..database.database import get_db
+from ..database.schemas import (
+    DirectUploadRequest,
+    DirectUploadResponse,
+    MultipartUploadRequest,
+    MultipartUploadResponse,
+    MultipartCompleteRequest,
+    MultipartAbortRequest,
+    DirectUploadComplete,
+    FileUploadResult
+)
+from ..database.crud import (
+    get_owned_loan_case,
+    get_blob_by_hash,
+    get_document_by_upload_key,
+    create_blob,
+    create_document
+)
+from ..auth.dependencies import get_current_user_id
+from ..utils.s3_utils import s3_uploader
+from ..utils.zip_utils import SNIFF_BYTES
+from ..utils.config import settings
+from ..utils.logger import logger
+from .file_upload import ALLOWED_MIME_TYPES, validate_file_type
+
+router = APIRouter(tags=["File Upload"])
+
+# S3 limits: single PUT up to 5 GiB, multipart parts of 5 MiB..5 GiB, at most 10,000 parts
+MAX_SINGLE_PUT_BYTES = 5 * 1024 * 1024 * 1024
+MIN_PART_BYTES = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+def check_case_owner(db: Session, user_id: int, case_id: int):
+    if not get_owned_loan_case(db, case_id, user_id):
+        logger.warning(f"Direct upload for unknown or foreign loan case {case_id} by user {user_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan case not found"
+        )
+
+def key_prefix(user_id: int, case_id: int) -> str:
+    return f"cases/{case_id}/{user_id}/"
+
+def new_object_key(user_id: int, case_id: int, filename: str) -> str:
+    file_ext = os.path.splitext(filename)[1]
+    return f"{key_prefix(user_id, case_id)}{uuid.uuid4()}{file_ext}"
+
+def check_key_scope(key: str, user_id: int, case_id: int):
+    """Only objects under the caller's own prefix for this case can be completed"""
+    if not key.startswith(key_prefix(user_id, case_id)) or ".." in key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Upload key does not belong to this user and loan case"
+        )
+
+def check_declared_file(content_type: str, size_bytes: int, max_bytes: int):
+    if content_type not in ALLOWED_MIME_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {content_type} not allowed"
+        )
+    if size_bytes > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {max_bytes} byte limit"
+        )
+
+def sha256_b64(sha256_hex: str) -> str:
+    return base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+
+def verify_sha256(key: str, head: dict, sha256: str) -> bool:
+    """
+    Check the object against the declared SHA-256: against the full-object
+    checksum S3 computed on a single PUT/POST, otherwise by re-hashing objects
+    up to DIRECT_UPLOAD_VERIFY_MAX_BYTES. False if it can't be checked; a
+    mismatch deletes the object and fails the upload.
+    """
+    checksum = head.get("ChecksumSHA256")
+    # Multipart objects carry at most a checksum of part checksums ("<b64>-<parts>")
+    if checksum and "-" not in checksum:
+        matches = checksum == sha256_b64(sha256)
+    elif head["ContentLength"] <= settings.DIRECT_UPLOAD_VERIFY_MAX_BYTES:
+        matches = s3_uploader.hash_object(key) == sha256
+    else:
+        return False
+    if not matches:
+        logger.warning(f"Direct upload {key} does not match its declared SHA-256, deleting it")
+        s3_uploader.delete_object(key)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded content does not match the declared SHA-256"
+        )
+    return True
+
+def completed_result(db: Session, key: str):
+    """The result of an upload already completed under this key, or None"""
+    document = get_document_by_upload_key(db, key)
+    if document is None:
+        return None
+    # A duplicate's own object was dropped in favour of the stored content
+    is_own_object = document.s3_path == f"s3://{s3_uploader.bucket}/{key}"
+    return FileUploadResult(
+        filename=document.original_filename,
+        status="uploaded" if is_own_object else "duplicate",
+        s3_path=document.s3_path
+    )
+
+def finalize_upload(db: Session, user_id: int, case_id: int, key: str,
+                    filename: str, sha256: str) -> FileUploadResult:
+    """
+    Validate the uploaded object's size, sniffed type and hash, then register
+    it under its key. Repeating a completed upload returns its first result.
+    """
+    previous = completed_result(db, key)
+    if previous:
+        return previous
+
+    sha256 = sha256.lower()
+    head = s3_uploader.head_object(key)
+    if head is None:
+        # Presign reported the caller already has this content, so nothing was sent
+        existing = get_blob_by_hash(db, sha256, uploaded_by=user_id)
+        if existing:
+            document = create_document(
+                db, filename, uploaded_by=user_id, loan_case_id=case_id, blob=existing, upload_key=key
+            )
+            return FileUploadResult(filename=filename, status="duplicate", s3_path=document.s3_path)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Uploaded object not found"
+        )
+
+    size_bytes = head["ContentLength"]
+    if not 0 < size_bytes <= settings.DIRECT_UPLOAD_MAX_BYTES:
+        s3_uploader.delete_object(key)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Uploaded object size {size_bytes} is outside the allowed range"
+        )
+
+    sniffed = s3_uploader.read_object_head(key, SNIFF_BYTES)
+    try:
+        mime_type = validate_file_type(sniffed)
+    except HTTPException:
+        logger.warning(f"Direct upload {key} failed type validation, deleting it")
+        s3_uploader.delete_object(key)
+        raise
+
+    s3_path = f"s3://{s3_uploader.bucket}/{key}"
+    if not verify_sha256(key, head, sha256):
+        # Only content whose hash we checked may be handed to other uploads
+        logger.info(f"Direct upload {key} is too large to verify, storing it outside the dedup index")
+        create_document(
+            db, filename, uploaded_by=user_id, loan_case_id=case_id,
+            s3_path=s3_path, mime_type=mime_type, size_bytes=size_bytes, upload_key=key
+        )
+        return FileUploadResult(filename=filename, status="uploaded", s3_path=s3_path)
+
+    blob = create_blob(db, sha256=sha256, s3_path=s3_path, mime_type=mime_type, size_bytes=size_bytes)
+    create_document(db, filename, uploaded_by=user_id, loan_case_id=case_id, blob=blob, upload_key=key)
+    if blob.s3_path != s3_path:
+        # Same content was registered meanwhile; keep the existing object
+        s3_uploader.delete_object(key)
+        return FileUploadResult(filename=filename, status="duplicate", s3_path=blob.s3_path)
+    return FileUploadResult(filename=filename, status="uploaded", s3_path=s3_path)
+
+@router.post("/uploads/presign", response_model=DirectUploadResponse)
+def presign_upload(
+    upload: DirectUploadRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    check_case_owner(db, user_id, upload.loan_case_id)
+    check_declared_file(
+        upload.content_type,
+        upload.size_bytes,
+        min(settings.DIRECT_UPLOAD_MAX_BYTES, MAX_SINGLE_PUT_BYTES)
+    )
+    expires_in = settings.S3_URL_EXPIRATION
+
+    # Content the caller already uploaded needs no second transfer: the client
+    # skips the upload and completes the key, which registers the document then.
+    # The declared hash isn't proof of having the content, so other users'
+    # blobs are only matched at completion, after the upload has been verified.
+    existing = get_blob_by_hash(db, upload.sha256.lower(), uploaded_by=user_id)
+    key = new_object_key(user_id, upload.loan_case_id, upload.filename)
+    if existing:
+        logger.info(f"Direct upload of {upload.filename} needs no transfer, content already at {existing.s3_path}")
+        return DirectUploadResponse(
+            key=key, method=upload.method, duplicate=True,
+            s3_path=existing.s3_path, expires_in=expires_in
+        )
+
+    checksum = sha256_b64(upload.sha256)
+    if upload.method == "post":
+        presigned = s3_uploader.presign_post(
+            key, upload.content_type, checksum, settings.DIRECT_UPLOAD_MAX_BYTES, expires_in
+        )
+        return DirectUploadResponse(
+            key=key, method="post", url=presigned["url"],
+            fields=presigned["fields"], expires_in=expires_in
+        )
+
+    url = s3_uploader.presign_put(key, upload.content_type, checksum, expires_in)
+    return DirectUploadResponse(
+        key=key, method="put", url=url, expires_in=expires_in,
+        headers={"Content-Type": upload.content_type, "x-amz-checksum-sha256": checksum}
+    )
+
+@router.post("/uploads/complete", response_model=FileUploadResult)
+def complete_upload(
+    completed: DirectUploadComplete,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    check_case_owner(db, user_id, completed.loan_case_id)
+    check_key_scope(completed.key, user_id, completed.loan_case_id)
+    return finalize_upload(db, user_id, completed.loan_case_id, completed.key, completed.filename, completed.sha256)
+
+@router.post("/uploads/multipart", response_model=MultipartUploadResponse)
+def start_multipart_upload(
+    upload: MultipartUploadRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    check_case_owner(db, user_id, upload.loan_case_id)
+    check_declared_file(upload.content_type, upload.size_bytes, settings.DIRECT_UPLOAD_MAX_BYTES)
+
+    part_size = max(settings.DIRECT_UPLOAD_PART_BYTES, MIN_PART_BYTES)
+    part_size = max(part_size, math.ceil(upload.size_bytes / MAX_PARTS))
+    part_count = math.ceil(upload.size_bytes / part_size)
+
+    key = new_object_key(user_id, upload.loan_case_id, upload.filename)
+    upload_id = s3_uploader.create_multipart_upload(key, upload.content_type)
+    expires_in = settings.S3_URL_EXPIRATION
+    parts = [
+        {"part_number": n, "url": s3_uploader.presign_upload_part(key, upload_id, n, expires_in)}
+        for n in range(1, part_count + 1)
+    ]
+    logger.info(f"Multipart upload started for {key}: {part_count} parts of {part_size} bytes")
+    return MultipartUploadResponse(
+        key=key, upload_id=upload_id, part_size=part_size, parts=parts, expires_in=expires_in
+    )
+
+@router.post("/uploads/multipart/complete", response_model=FileUploadResult)
+def complete_multipart_upload(
+    completed: MultipartCompleteRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    check_case_owner(db, user_id, completed.loan_case_id)
+    check_key_scope(completed.key, user_id, completed.loan_case_id)
+    # S3 forgets the upload id once completed, so a retry is answered from the document
+    previous = completed_result(db, completed.key)
+    if previous:
+        return previous
+    s3_uploader.complete_multipart_upload(
+        completed.key,
+        completed.upload_id,
+        [{"PartNumber": p.part_number, "ETag": p.etag} for p in completed.parts]
+    )
+    # S3 keeps no full-object SHA-256 for multipart uploads; finalize_upload re-hashes it
+    return finalize_upload(db, user_id, completed.loan_case_id, completed.key, completed.filename, completed.sha256)
+
+@router.post("/uploads/multipart/abort", status_code=status.HTTP_204_NO_CONTENT)
+def abort_multipart_upload(
+    aborted: MultipartAbortRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    check_case_owner(db, user_id, aborted.loan_case_id)
+    check_key_scope(aborted.key, user_id, aborted.loan_case_id)
+    s3_uploader.abort_multipart_upload(aborted.key, aborted.upload_id)
+    return
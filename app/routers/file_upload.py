@@ -2,13 +2,32 @@ import os
 import zipfile
 import tempfile
 import uuid
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from functools import partial
 import filetype  # NEW - cross-platform alternative
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from ..utils.s3_utils import s3_uploader
-from ..database.schemas import ZipUploadResponse
-from ..auth.dependencies import get_current_user
+from ..utils.zip_utils import (
+    ArchiveLimitError,
+    ArchiveLimits,
+    ExtractionBudget,
+    MemberStream,
+    check_archive,
+    extract_member,
+    remove_quietly,
+    save_upload_to_disk
+)
+from ..database.database import get_db
+from ..database.schemas import ZipUploadResponse, FileUploadResult
+from ..database.crud import get_blob_by_hash, create_blob, create_document
+from ..database.models import DocumentBlob
+from ..auth.dependencies import get_current_user_id
 from ..utils.logger import logger
+from ..utils.config import settings
 
 router = APIRouter(tags=["File Upload"])
 
@@ -23,10 +42,10 @@ ALLOWED_MIME_TYPES = {
     'text/plain'
 }
 
-def validate_file_type(file_path: str):
-    """Validate file type using filetype library"""
+def validate_file_type(source):
+    """Validate file type using filetype library, from a path or the leading bytes"""
     try:
-        kind = filetype.guess(file_path)
+        kind = filetype.guess(source)
         if not kind or kind.mime not in ALLOWED_MIME_TYPES:
             raise HTTPException(
                 status_code=400,
@@ -40,19 +59,189 @@ def validate_file_type(file_path: str):
             detail="Invalid file type"
         )
 
+@dataclass
+class PendingUpload:
+    filename: str
+    sha256: str
+    mime_type: str
+    size_bytes: int
+    future: Future
+    result: FileUploadResult = None
+    blob: DocumentBlob = None
+    stream: MemberStream = None  # streamed members are hashed by their upload
+
+@dataclass
+class StoredDuplicate:
+    """A member whose content is already stored; its document is registered with the rest"""
+    filename: str
+    blob: DocumentBlob
+
+def delete_uploaded(entries: list):
+    """Remove this archive's objects from S3 when it is rejected before registration"""
+    for entry in entries:
+        if isinstance(entry, PendingUpload):
+            result = entry.future.result()
+            if result.ok:
+                s3_uploader.delete_object(result.s3_key)
+
+def process_archive(zip_path: str, temp_dir: str, limits: ArchiveLimits,
+                    db: Session, user_id: int = None) -> list[FileUploadResult]:
+    """
+    Extract members one at a time and hand each valid one to the shared S3
+    worker pool, so extraction of the next member overlaps with uploads.
+    With ZIP_STREAM_TO_S3, members are streamed from the archive instead of
+    being extracted to temp files. With UPLOAD_DEDUP_ENABLED, content already
+    stored as a blob (or earlier in this archive) is shared, and each member
+    gets its own document row pointing at the shared blob. Extracted members
+    are hashed before upload, so duplicates are never sent; streamed members
+    are hashed as they upload, so each is decompressed once and a duplicate's
+    object is deleted at registration.
+    Nothing is written to the database until every member has been read, so
+    an archive rejected partway leaves no rows; its uploaded objects are
+    deleted. Returns one result per member, in archive order.
+    """
+    dedup = settings.UPLOAD_DEDUP_ENABLED
+    entries = []
+    streams = []
+    first_by_hash = {}
+    try:
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                members = check_archive(zip_ref, limits)
+                budget = ExtractionBudget(limits)
+                for zip_info in members:
+                    sha256 = None
+                    if settings.ZIP_STREAM_TO_S3:
+                        # Sniff the header bytes and stream the rest; nothing touches disk
+                        stream = MemberStream(zip_ref, zip_info, budget)
+                        source, discard = stream.header, stream.close
+                    else:
+                        extracted_path, sha256 = extract_member(zip_ref, zip_info, temp_dir, budget)
+                        source, discard = extracted_path, partial(remove_quietly, extracted_path)
+                
+                    # Until the worker takes ownership, the stream / temp file is ours to release
+                    handed_off = False
+                    try:
+                        # Validate file type
+                        try:
+                            mime_type = validate_file_type(source)
+                        except HTTPException as e:
+                            logger.warning(f"Skipping invalid file {zip_info.filename}: {e.detail}")
+                            entries.append(FileUploadResult(filename=zip_info.filename, status="skipped", error=e.detail))
+                            continue
+                
+                        # Skip content we already store
+                        if dedup and sha256:
+                            existing = get_blob_by_hash(db, sha256)
+                            if existing:
+                                logger.info(f"Duplicate content {zip_info.filename}, reusing {existing.s3_path}")
+                                entries.append(StoredDuplicate(zip_info.filename, existing))
+                                continue
+                            if sha256 in first_by_hash:
+                                entries.append((zip_info.filename, first_by_hash[sha256]))
+                                continue
+                
+                        # Generate unique S3 key
+                        file_ext = os.path.splitext(zip_info.filename)[1]
+                        s3_key = f"{uuid.uuid4()}{file_ext}"
+                
+                        # Upload to S3; the worker closes the stream / deletes the file when done
+                        if settings.ZIP_STREAM_TO_S3:
+                            future = s3_uploader.submit_upload_fileobj(stream, s3_key, close_after=True)
+                            streams.append(stream)
+                        else:
+                            future = s3_uploader.submit_upload(extracted_path, s3_key, remove_after=True)
+                        upload = PendingUpload(
+                            zip_info.filename, sha256, mime_type, zip_info.file_size, future,
+                            stream=stream if settings.ZIP_STREAM_TO_S3 else None
+                        )
+                        if sha256:
+                            first_by_hash[sha256] = upload
+                        entries.append(upload)
+                        handed_off = True
+                    finally:
+                        if not handed_off:
+                            discard()
+        finally:
+            # Never leave uploads reading from a temp dir that is about to be removed
+            wait([entry.future for entry in entries if isinstance(entry, PendingUpload)])
+    
+        # A streamed member that broke the decompression budget fails the whole archive
+        for stream in streams:
+            if stream.limit_error:
+                raise stream.limit_error
+    except Exception:
+        delete_uploaded(entries)
+        raise
+    
+    results = []
+    for entry in entries:
+        if isinstance(entry, FileUploadResult):
+            results.append(entry)
+        elif isinstance(entry, StoredDuplicate):
+            create_document(db, entry.filename, uploaded_by=user_id, blob=entry.blob)
+            results.append(FileUploadResult(filename=entry.filename, status="duplicate", s3_path=entry.blob.s3_path))
+        elif isinstance(entry, PendingUpload):
+            entry.result = register_upload(db, entry, user_id, dedup)
+            results.append(entry.result)
+        else:
+            # Repeat of an earlier member in this archive
+            filename, first = entry
+            if first.blob is not None:
+                create_document(db, filename, uploaded_by=user_id, blob=first.blob)
+            status = "duplicate" if first.result.status != "failed" else "failed"
+            results.append(FileUploadResult(
+                filename=filename, status=status, s3_path=first.result.s3_path, error=first.result.error
+            ))
+    return results
+
+def register_upload(db: Session, upload: PendingUpload, user_id: int, dedup: bool) -> FileUploadResult:
+    result = upload.future.result()
+    if not result.ok:
+        return FileUploadResult(filename=upload.filename, status="failed", error=result.error)
+    if not dedup:
+        return FileUploadResult(filename=upload.filename, status="uploaded", s3_path=result.s3_path)
+    
+    if upload.stream is not None:
+        # Streamed members are only hashed once sent; drop the copy if the content was stored already
+        upload.sha256 = upload.stream.sha256
+        existing = get_blob_by_hash(db, upload.sha256)
+        if existing:
+            logger.info(f"Duplicate content {upload.filename}, reusing {existing.s3_path}")
+            s3_uploader.delete_object(result.s3_key)
+            upload.blob = existing
+            create_document(db, upload.filename, uploaded_by=user_id, blob=existing)
+            return FileUploadResult(filename=upload.filename, status="duplicate", s3_path=existing.s3_path)
+    
+    # The hash was computed here from the archive, so it can enter the dedup index
+    upload.blob = create_blob(
+        db,
+        sha256=upload.sha256,
+        s3_path=result.s3_path,
+        mime_type=upload.mime_type,
+        size_bytes=upload.size_bytes
+    )
+    create_document(db, upload.filename, uploaded_by=user_id, blob=upload.blob)
+    if upload.blob.s3_path != result.s3_path:
+        # Same content was registered by a concurrent upload; keep theirs
+        s3_uploader.delete_object(result.s3_key)
+        return FileUploadResult(filename=upload.filename, status="duplicate", s3_path=upload.blob.s3_path)
+    return FileUploadResult(filename=upload.filename, status="uploaded", s3_path=result.s3_path)
+
 @router.post("/upload-zip", response_model=ZipUploadResponse)
 async def upload_zip(
     file: UploadFile = File(...),
-    current_user: str = Depends(get_current_user)
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
 ):
+    limits = ArchiveLimits.from_settings()
     try:
         # Create temp directory
         with tempfile.TemporaryDirectory() as temp_dir:
-            temp_zip_path = os.path.join(temp_dir, file.filename)
+            temp_zip_path = os.path.join(temp_dir, "upload.zip")
             
-            # Save uploaded zip file
-            with open(temp_zip_path, "wb") as f:
-                f.write(await file.read())
+            # Stream uploaded zip file to disk in bounded chunks
+            await save_upload_to_disk(file, temp_zip_path, limits)
             
             # Verify it's a zip file
             if not zipfile.is_zipfile(temp_zip_path):
@@ -61,50 +250,48 @@ async def upload_zip(
                     detail="Uploaded file is not a valid ZIP archive"
                 )
             
-            extracted_files = []
-            s3_paths = []
-            
-            # Extract and process files
-            with zipfile.ZipFile(temp_zip_path, 'r') as zip_ref:
-                for zip_info in zip_ref.infolist():
-                    if zip_info.is_dir():
-                        continue
-                    
-                    extracted_path = os.path.join(temp_dir, zip_info.filename)
-                    zip_ref.extract(zip_info, temp_dir)
-                    
-                    # Validate file type
-                    try:
-                        validate_file_type(extracted_path)
-                    except HTTPException as e:
-                        logger.warning(f"Skipping invalid file {zip_info.filename}: {e.detail}")
-                        continue
-                    
-                    # Generate unique S3 key
-                    file_ext = os.path.splitext(zip_info.filename)[1]
-                    s3_key = f"{uuid.uuid4()}{file_ext}"
-                    
-                    # Upload to S3
-                    s3_path = s3_uploader.upload_file(extracted_path, s3_key)
-                    
-                    extracted_files.append(zip_info.filename)
-                    s3_paths.append(s3_path)
+            # Extract, validate and upload off the event loop
+            results = await run_in_threadpool(process_archive, temp_zip_path, temp_dir, limits, db, user_id)
             
-            if not extracted_files:
+            valid = [r for r in results if r.status != "skipped"]
+            uploaded = [r for r in results if r.status in ("uploaded", "duplicate")]
+            if not valid:
                 raise HTTPException(
                     status_code=400,
                     detail="No valid files found in ZIP archive"
                 )
+            if not uploaded:
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"All {len(valid)} S3 uploads failed: {valid[0].error}"
+                )
             
+            failed = len(valid) - len(uploaded)
+            duplicates = sum(1 for r in uploaded if r.status == "duplicate")
             return ZipUploadResponse(
                 original_filename=file.filename,
-                extracted_files=extracted_files,
-                s3_paths=s3_paths,
-                message=f"Successfully processed {len(extracted_files)} files"
+                extracted_files=[r.filename for r in uploaded],
+                s3_paths=[r.s3_path for r in uploaded],
+                files=results,
+                message=f"Successfully processed {len(uploaded)} files"
+                + (f", {duplicates} already stored" if duplicates else "")
+                + (f", {failed} failed" if failed else "")
             )
     
     except HTTPException:
         raise
+    except ArchiveLimitError as e:
+        logger.warning(f"Rejected ZIP upload {file.filename}: {str(e)}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e)
+        )
+    except zipfile.BadZipFile as e:
+        logger.warning(f"Corrupt ZIP upload {file.filename}: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Corrupt ZIP archive: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Error processing ZIP file: {str(e)}")
         raise HTTPException(
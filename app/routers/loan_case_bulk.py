@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import os
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from ..database.database import get_db, SessionLocal
+from ..database.schemas import LoanCaseCreate, LoanCaseImportResult
+from ..database.crud import bulk_insert_loan_cases, user_loan_cases_statement
+from ..auth.dependencies import get_current_user_id
+from ..utils.config import settings
+from ..utils.logger import logger
+from .loan_cases import loan_case_filters
+
+router = APIRouter(tags=["Loan Cases"])
+
+EXPORT_FIELDS = ["id", "business_name", "loan_amount", "loan_type", "loan_tenure"]
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def import_format(upload: UploadFile, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    ext = os.path.splitext(upload.filename or "")[1].lower()
+    if ext == ".csv" or upload.content_type == "text/csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl") or upload.content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unknown import format; upload a .csv or .ndjson file or pass ?format="
+    )
+
+def iter_rows(fileobj, fmt: str):
+    """Yield (row number, raw row) pairs from the upload without reading it all"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, row
+        return
+    for number, line in enumerate(text, start=1):
+        if line.strip():
+            yield number, line
+
+def parse_row(raw, fmt: str) -> LoanCaseCreate:
+    if fmt == "csv":
+        # Blank cells mean "missing", not empty strings
+        return LoanCaseCreate(**{k: v for k, v in raw.items() if k and v not in ("", None)})
+    return LoanCaseCreate.model_validate_json(raw)
+
+def row_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+        )
+    return str(exc)
+
+def import_loan_cases(db: Session, fileobj, fmt: str, underwriter_id: int, skip_invalid: bool) -> LoanCaseImportResult:
+    """
+    Validate rows with LoanCaseCreate and insert them in executemany batches,
+    all in one transaction. Unless skip_invalid is set, any invalid row rolls
+    the whole import back.
+    """
+    imported, failed, errors, batch = 0, 0, [], []
+
+    def flush():
+        nonlocal imported
+        if batch:
+            bulk_insert_loan_cases(db, batch, underwriter_id)
+            imported += len(batch)
+            batch.clear()
+
+    try:
+        for number, raw in iter_rows(fileobj, fmt):
+            if number > settings.LOAN_CASE_IMPORT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Imports are limited to {settings.LOAN_CASE_IMPORT_MAX_ROWS} rows"
+                )
+            try:
+                batch.append(parse_row(raw, fmt))
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                if len(errors) < settings.LOAN_CASE_IMPORT_MAX_ERRORS:
+                    errors.append({"row": number, "error": row_error(e)})
+                continue
+            if len(batch) >= settings.LOAN_CASE_IMPORT_BATCH_ROWS:
+                flush()
+        flush()
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded"
+        )
+    except csv.Error as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed CSV: {str(e)}"
+        )
+    except Exception:
+        db.rollback()
+        raise
+
+    if failed and not skip_invalid:
+        db.rollback()
+        logger.warning(f"Loan case import by user {underwriter_id} rejected: {failed} invalid rows")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Import rejected; fix the rows below or pass skip_invalid=true",
+                    "failed": failed, "errors": errors}
+        )
+
+    db.commit()
+    logger.info(f"Loan case import by user {underwriter_id}: {imported} imported, {failed} skipped")
+    return LoanCaseImportResult(imported=imported, failed=failed, errors=errors)
+
+@router.post("/loan-cases/import", response_model=LoanCaseImportResult, status_code=status.HTTP_201_CREATED)
+async def import_loan_cases_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None),
+    skip_invalid: bool = False,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    fmt = import_format(file, format)
+    return await run_in_threadpool(import_loan_cases, db, file.file, fmt, user_id, skip_invalid)
+
+def export_rows(underwriter_id: int, filters: dict, fmt: str):
+    """
+    Stream an underwriter's cases batch by batch. Uses its own session and a
+    server-side cursor (yield_per), since the request session is closed
+    before a streaming body is sent.
+    """
+    stmt = user_loan_cases_statement(underwriter_id, **filters)
+    with SessionLocal() as db:
+        result = db.execute(stmt, execution_options={"yield_per": settings.LOAN_CASE_EXPORT_BATCH_ROWS})
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            for partition in result.scalars().partitions():
+                for loan_case in partition:
+                    writer.writerow([getattr(loan_case, field) for field in EXPORT_FIELDS])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in result.scalars().partitions():
+                yield "".join(
+                    json.dumps({field: getattr(loan_case, field) for field in EXPORT_FIELDS}) + "\n"
+                    for loan_case in partition
+                )
+
+@router.get("/loan-cases/export")
+def export_loan_cases(
+    format: Literal["csv", "ndjson"] = "csv",
+    filters: dict = Depends(loan_case_filters),
+    user_id: int = Depends(get_current_user_id)
+):
+    return StreamingResponse(
+        export_rows(user_id, filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="loan_cases.{format}"'}
+    )
@@ -1,74 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import binascii
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from ..database.database import get_db
-from ..database.schemas import LoanCaseCreate, LoanCaseResponse, LoanCaseUpdate
+from ..database.schemas import LoanCaseCreate, LoanCaseResponse, LoanCaseUpdate, LoanCasePage
 from ..database.crud import (
     create_loan_case,
-    get_loan_case,
-    get_user_loan_cases,
+    get_owned_loan_case,
+    list_user_loan_cases,
     update_loan_case,
     delete_loan_case
 )
-from ..auth.dependencies import get_current_user
-from ..database.crud import get_user_by_email
+from ..auth.dependencies import get_current_user_id
+from ..utils.config import settings
 from ..utils.logger import logger
  
 router = APIRouter(tags=["Loan Cases"])
 
+# Ownership is part of every case query, so a case that belongs to someone
+# else is indistinguishable from a missing one (404)
+def loan_case_not_found(case_id: int, user_id: int, action: str):
+    logger.warning(f"Loan case {case_id} not found or not owned during {action} by user {user_id}")
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Loan case not found"
+    )
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def loan_case_filters(
+    loan_type: Optional[str] = None,
+    min_amount: Optional[int] = Query(None, ge=0),
+    max_amount: Optional[int] = Query(None, ge=0),
+    min_tenure: Optional[int] = Query(None, ge=0),
+    max_tenure: Optional[int] = Query(None, ge=0)
+) -> dict:
+    return {
+        "loan_type": loan_type,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+        "min_tenure": min_tenure,
+        "max_tenure": max_tenure,
+    }
+
+async def loan_case_list_params(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LOAN_CASE_PAGE_SIZE, ge=1, le=settings.LOAN_CASE_MAX_PAGE_SIZE),
+    filters: dict = Depends(loan_case_filters)
+) -> dict:
+    """Query parameters of the case listing, as keyword arguments for list_user_loan_cases"""
+    return {
+        # One extra row tells us whether another page exists
+        "limit": limit + 1,
+        "after_id": decode_cursor(cursor) if cursor else None,
+        **filters,
+    }
+
+def loan_case_page(rows, params: dict) -> LoanCasePage:
+    limit = params["limit"] - 1
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].id) if len(rows) > limit else None
+    return LoanCasePage(items=items, next_cursor=next_cursor)
+
 @router.post("/loan-cases/", response_model=LoanCaseResponse, status_code=status.HTTP_201_CREATED)
 def create_new_loan_case(
     loan_case: LoanCaseCreate,
-    current_user: str = Depends(get_current_user),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    user = get_user_by_email(db, current_user)
-    if not user:
-        logger.error(f"User not found during loan case creation: {current_user}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return create_loan_case(db, loan_case, user.id)
+    return create_loan_case(db, loan_case, user_id)
 
-@router.get("/loan-cases/", response_model=list[LoanCaseResponse])
+@router.get("/loan-cases/", response_model=LoanCasePage)
 def read_user_loan_cases(
-    current_user: str = Depends(get_current_user),
+    params: dict = Depends(loan_case_list_params),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    user = get_user_by_email(db, current_user)
-    if not user:
-        logger.error(f"User not found during loan case retrieval: {current_user}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return get_user_loan_cases(db, user.id)
+    return loan_case_page(list_user_loan_cases(db, user_id, **params), params)
 
 @router.get("/loan-cases/{case_id}", response_model=LoanCaseResponse)
 def read_loan_case(
     case_id: int,
-    current_user: str = Depends(get_current_user),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    loan_case = get_loan_case(db, case_id)
+    loan_case = get_owned_loan_case(db, case_id, user_id)
     if not loan_case:
-        logger.warning(f"Loan case not found: {case_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Loan case not found"
-        )
-    
-    # Verify ownership
-    user = get_user_by_email(db, current_user)
-    if loan_case.underwriter_id != user.id:
-        logger.warning(f"Unauthorized access to loan case {case_id} by user {current_user}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this loan case"
-        )
-    
+        raise loan_case_not_found(case_id, user_id, "read")
     return loan_case
 
 # Change from PUT to PATCH and use LoanCaseUpdate schema
@@ -76,50 +105,20 @@ def read_loan_case(
 def update_existing_loan_case(
     case_id: int,
     loan_case: LoanCaseUpdate,
-    current_user: str = Depends(get_current_user),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    # Verify ownership
-    db_loan_case = get_loan_case(db, case_id)
-    if not db_loan_case:
-        logger.warning(f"Loan case not found during update: {case_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Loan case not found"
-        )
-    
-    user = get_user_by_email(db, current_user)
-    if db_loan_case.underwriter_id != user.id:
-        logger.warning(f"Unauthorized update attempt on loan case {case_id} by user {current_user}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this loan case"
-        )
-    
-    return update_loan_case(db, case_id, loan_case)
+    updated = update_loan_case(db, case_id, user_id, loan_case)
+    if not updated:
+        raise loan_case_not_found(case_id, user_id, "update")
+    return updated
 
 @router.delete("/loan-cases/{case_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_existing_loan_case(
     case_id: int,
-    current_user: str = Depends(get_current_user),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    # Verify ownership
-    db_loan_case = get_loan_case(db, case_id)
-    if not db_loan_case:
-        logger.warning(f"Loan case not found during deletion: {case_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Loan case not found"
-        )
-    
-    user = get_user_by_email(db, current_user)
-    if db_loan_case.underwriter_id != user.id:
-        logger.warning(f"Unauthorized deletion attempt on loan case {case_id} by user {current_user}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this loan case"
-        )
-    
-    delete_loan_case(db, case_id)
-    return
\ No newline at end of file
+    if not delete_loan_case(db, case_id, user_id):
+        raise loan_case_not_found(case_id, user_id, "delete")
+    return
@@ -0,0 +1,135 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..database.pool_metrics import pool_metrics_snapshot
+from ..auth.rate_limit import rate_limiter
+from ..utils.logger import logging_stats
+from ..llm.governor import llm_governor
+from ..llm.resilience import llm_caller
+from ..llm.conversation import conversation_totals
+from ..llm.client import scorecard_cache
+from ..utils.metrics import registry
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+POOL_EVENTS = ("checkouts", "checkins", "connects", "invalidations", "timeouts", "connect_errors", "disconnects")
+
+# Collectors re-expose the JSON snapshots below in Prometheus form
+
+@registry.register_collector
+def pool_collector():
+    snapshots = pool_metrics_snapshot()
+    connections, sizes, events, waits = [], [], [], []
+    for engine, snapshot in snapshots.items():
+        pool = snapshot["pool"]
+        if pool:
+            sizes.append(("db_pool_size", {"engine": engine}, pool["size"]))
+            for state in ("checked_out", "checked_in", "overflow"):
+                connections.append(("db_pool_connections", {"engine": engine, "state": state}, pool[state]))
+        for name in POOL_EVENTS:
+            events.append(("db_pool_events_total", {"engine": engine, "event": name}, snapshot[name]))
+        wait = snapshot["checkout_wait_seconds"]
+        for bound, count in wait["buckets"].items():
+            waits.append(("db_pool_checkout_wait_seconds_bucket", {"engine": engine, "le": bound}, count))
+        waits.append(("db_pool_checkout_wait_seconds_sum", {"engine": engine}, wait["sum"]))
+        waits.append(("db_pool_checkout_wait_seconds_count", {"engine": engine}, wait["count"]))
+    return [
+        ("db_pool_size", "gauge", "Configured connection pool size", sizes),
+        ("db_pool_connections", "gauge", "Pool connections by state", connections),
+        ("db_pool_events_total", "counter", "Pool checkouts, connects, timeouts and errors", events),
+        ("db_pool_checkout_wait_seconds", "histogram", "Time waiting for a pooled connection", waits),
+    ]
+
+@registry.register_collector
+def rate_limit_collector():
+    snapshot = rate_limiter.snapshot()
+    decisions = []
+    for name, counts in snapshot["decisions"].items():
+        action, key = name.split(":", 1)
+        for outcome, count in counts.items():
+            decisions.append(("rate_limit_decisions_total", {"action": action, "key": key, "outcome": outcome}, count))
+    return [
+        ("rate_limit_decisions_total", "counter", "Rate limiter decisions on the password routes", decisions),
+        ("rate_limit_backend_errors_total", "counter", "Rate limit backend failures (requests allowed)",
+         [("rate_limit_backend_errors_total", {}, snapshot["backend_errors"])]),
+    ]
+
+@registry.register_collector
+def logging_collector():
+    stats = logging_stats()
+    return [
+        ("log_queue_depth", "gauge", "Log records waiting for the writer thread",
+         [("log_queue_depth", {}, stats["queued"])]),
+        ("log_records_dropped_total", "counter", "Log records dropped because the queue was full",
+         [("log_records_dropped_total", {}, stats["dropped"])]),
+    ]
+
+@registry.register_collector
+def llm_governor_collector():
+    snapshot = llm_governor.snapshot()
+    return [
+        ("llm_governor_available", "gauge", "Requests and tokens left in the governor's buckets",
+         [("llm_governor_available", {"resource": "requests"}, snapshot["requests_available"]),
+          ("llm_governor_available", {"resource": "tokens"}, snapshot["tokens_available"])]),
+        ("llm_governor_queued", "gauge", "Model calls waiting for capacity by priority",
+         [("llm_governor_queued", {"priority": priority}, count) for priority, count in snapshot["queued"].items()]),
+        ("llm_governor_paused_seconds", "gauge", "Remaining cooldown after a quota error",
+         [("llm_governor_paused_seconds", {}, snapshot["paused_seconds"])]),
+    ]
+
+@registry.register_collector
+def scorecard_cache_collector():
+    stats = scorecard_cache.stats()
+    return [
+        ("scorecard_cache_events_total", "counter", "Scorecard cache hits, misses, stores and store errors",
+         [("scorecard_cache_events_total", {"event": name}, stats[name])
+          for name in ("memory_hits", "durable_hits", "misses", "stores", "errors")]),
+        ("scorecard_cache_memory_entries", "gauge", "Scorecards held in the in-process LRU",
+         [("scorecard_cache_memory_entries", {}, stats["memory_entries"])]),
+    ]
+
+@registry.register_collector
+def chat_collector():
+    totals = conversation_totals()
+    return [
+        ("chat_active_sessions", "gauge", "Chat WebSocket sessions open on this worker",
+         [("chat_active_sessions", {}, totals["active_sessions"])]),
+        ("chat_history_memory_bytes", "gauge", "Chat history text held in memory by open sessions",
+         [("chat_history_memory_bytes", {}, totals["memory_bytes"])]),
+    ]
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """All metrics of this worker in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/metrics/pool")
+def database_pool_metrics():
+    """Connection pool state, counters and checkout wait histogram per engine"""
+    return pool_metrics_snapshot()
+
+@router.get("/metrics/rate-limit")
+def rate_limit_metrics():
+    """Allowed/limited decisions per action and key type for the password routes"""
+    return rate_limiter.snapshot()
+
+@router.get("/metrics/logging")
+def logging_metrics():
+    """Log records waiting for the writer thread and records dropped on a full queue"""
+    return logging_stats()
+
+@router.get("/metrics/llm-governor")
+def llm_governor_metrics():
+    """Gemini rate governor buckets, cooldown and queued calls per priority"""
+    return llm_governor.snapshot()
+
+@router.get("/metrics/scorecard-cache")
+def scorecard_cache_metrics():
+    """Scorecard result cache hits by tier, misses, stores and durable-store errors"""
+    return scorecard_cache.stats()
+
+@router.get("/metrics/llm-calls")
+def llm_call_metrics():
+    """Recent model latency percentiles per operation, for tuning deadlines and hedging"""
+    return llm_caller.snapshot()
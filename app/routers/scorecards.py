@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from ..database.database import get_db
+from ..database.models import LoanCase
+from ..database.schemas import ScorecardBatchRequest, ScorecardBatchStatus
+from ..auth.dependencies import get_current_user_id
+from ..llm.batch import BatchItem, BatchJob, batch_runner, case_context
+from ..llm.client import invalidate_scorecard
+from ..utils.config import settings
+from ..utils.logger import logger
+
+router = APIRouter(tags=["Scorecards"])
+
+def load_owned_cases(db: Session, user_id: int, case_ids: list[int]):
+    cases = db.query(LoanCase).filter(
+        LoanCase.id.in_(case_ids),
+        LoanCase.underwriter_id == user_id
+    ).all()
+    return {case.id: case for case in cases}
+
+@router.post("/scorecards/batch", response_model=ScorecardBatchStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_scorecard_batch(
+    batch: ScorecardBatchRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    case_ids = list(dict.fromkeys(batch.case_ids))
+    if len(case_ids) > settings.SCORECARD_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.SCORECARD_BATCH_MAX_ITEMS} loan cases"
+        )
+
+    # Sync DB work goes to the threadpool so the event loop keeps serving
+    owned_cases = await run_in_threadpool(load_owned_cases, db, user_id, case_ids)
+
+    # Unknown or foreign cases are reported per item instead of failing the batch
+    items = []
+    for case_id in case_ids:
+        case = owned_cases.get(case_id)
+        if case:
+            items.append(BatchItem(case_id=case_id, context=case_context(case)))
+        else:
+            items.append(BatchItem(case_id=case_id, status="failed", error="Loan case not found"))
+
+    try:
+        job = await batch_runner.submit(BatchJob(owner=user_id, items=items))
+    except Exception as e:
+        logger.error(f"Scorecard batch could not be stored: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scorecard batches are unavailable, try again later"
+        )
+    return job.to_dict()
+
+@router.get("/scorecards/batch/{job_id}", response_model=ScorecardBatchStatus)
+async def read_scorecard_batch(
+    job_id: str,
+    user_id: int = Depends(get_current_user_id)
+):
+    # Jobs started on another worker, or before a restart, are read from the job store
+    job = await batch_runner.lookup(job_id)
+    if not job or job.owner != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scorecard batch not found"
+        )
+    return job.to_dict()
+
+@router.delete("/scorecards/{case_id}/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_cached_scorecard(
+    case_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    # The cache is keyed by the case's scoring context, so edited cases already miss;
+    # this forces a fresh scorecard for an unchanged case
+    owned_cases = await run_in_threadpool(load_owned_cases, db, user_id, [case_id])
+    case = owned_cases.get(case_id)
+    if not case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Loan case not found"
+        )
+    await run_in_threadpool(invalidate_scorecard, case_context(case))
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -17,6 +18,119 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: str
     S3_URL_EXPIRATION: int
 
+    # Auth
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified JWTs kept until they expire
+    PASSWORD_HASH_ROUNDS: int = 12  # bcrypt cost; weaker stored hashes are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt process pool size; 0 hashes on the calling thread
+
+    # Rate limiting (/login, /forgot-password); limits are attempts per window
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process), "postgres" (shared by workers) or "none"
+    RATE_LIMIT_WINDOW_SECONDS: int = 300
+    RATE_LIMIT_LOGIN_PER_EMAIL: int = 10
+    RATE_LIMIT_LOGIN_PER_IP: int = 100
+    RATE_LIMIT_FORGOT_PASSWORD_PER_EMAIL: int = 5
+    RATE_LIMIT_FORGOT_PASSWORD_PER_IP: int = 20
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # key IPs on X-Forwarded-For behind a trusted proxy
+
+    # Database
+    DB_ASYNC_MODE: bool = False  # serve loan-case/auth routes with AsyncSession + asyncpg
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
+    LOAN_CASE_PAGE_SIZE: int = 50
+    LOAN_CASE_MAX_PAGE_SIZE: int = 500
+    LOAN_CASE_IMPORT_BATCH_ROWS: int = 5000
+    LOAN_CASE_IMPORT_MAX_ROWS: int = 100000
+    LOAN_CASE_IMPORT_MAX_ERRORS: int = 100
+    LOAN_CASE_EXPORT_BATCH_ROWS: int = 1000
+
+    # Chat
+    CHAT_MAX_CONCURRENT_GENERATIONS: int = 32
+    CHAT_GENERATION_WAIT_SECONDS: float = 10.0
+    CHAT_MAX_CONTEXT_TOKENS: int = 32000
+    CHAT_RECENT_CONTEXT_TOKENS: int = 8000
+    CHAT_SUMMARY_MAX_TOKENS: int = 1024
+    CHAT_SUMMARY_CLOSE_WAIT_SECONDS: float = 10.0  # on disconnect, time a running summary gets to finish
+    CHAT_SESSION_STORE: str = "postgres"  # postgres | memory (single worker, lost on restart)
+    CHAT_HISTORY_PAGE_SIZE: int = 50  # messages read per query when resuming or paging history
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = 200
+
+    # LLM
+    LLM_CONTEXT_CACHE_ENABLED: bool = True
+    LLM_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    LLM_CONTEXT_CACHE_MAX_ENTRIES: int = 256
+    LLM_GOVERNOR_ENABLED: bool = True
+    LLM_REQUESTS_PER_MINUTE: int = 60  # per worker; divide the project quota by the worker count
+    LLM_TOKENS_PER_MINUTE: int = 1_000_000  # per worker, prompt + output tokens
+    LLM_GOVERNOR_MAX_WAIT_SECONDS: float = 30.0  # calls waiting longer for capacity are rejected
+    LLM_DEFAULT_OUTPUT_TOKENS: int = 1024  # output estimate for calls without max_output_tokens
+    LLM_QUOTA_COOLDOWN_SECONDS: float = 10.0  # pause after the API reports the quota exhausted
+    LLM_DEADLINE_SECONDS: float = 60.0  # case chat and conversation summaries, retries included
+    LLM_SCORECARD_DEADLINE_SECONDS: float = 120.0
+    LLM_CHAT_FIRST_TOKEN_DEADLINE_SECONDS: float = 20.0  # /chat retries only until the first chunk
+    LLM_CHAT_STREAM_TIMEOUT_SECONDS: float = 300.0  # HTTP timeout of a /chat stream, first chunk to last
+    LLM_MAX_ATTEMPTS: int = 3  # per model, for 5xx/429/timeout/transport errors
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5  # doubled per retry, with +-50% jitter
+    LLM_RETRY_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95  # hedge attempts slower than this latency percentile
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # no hedging until this many latencies are known
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    LLM_FALLBACK_MODEL: Optional[str] = None  # lighter model tried once the primary gives up
+    LLM_FALLBACK_BUDGET_FRACTION: float = 0.3  # share of the deadline kept for the fallback
+    LLM_CALL_WORKERS: int = 16  # threads for hedged sync calls
+    LLM_BACKEND: str = "gemini"  # gemini | fake (offline, see app/llm/fake_client.py) | record
+    LLM_FAKE_RECORDINGS_PATH: Optional[str] = None  # JSONL of recorded/canned responses
+    LLM_FAKE_LATENCY_SECONDS: float = 0.5  # time to the first chunk
+    LLM_FAKE_LATENCY_JITTER: float = 0.0  # +- fraction of the latency
+    LLM_FAKE_CHUNK_CHARS: int = 40
+    LLM_FAKE_CHUNKS_PER_SECOND: float = 20.0  # 0 streams all chunks at once
+    LLM_FAKE_RESPONSE_CHARS: int = 800  # length of synthetic replies
+    LLM_FAKE_ERROR_RATE: float = 0.0  # share of calls failing with a 503
+    LLM_FAKE_SEED: int = 0
+    SCORECARD_CACHE_BACKEND: str = "postgres"  # postgres | disk | none
+    SCORECARD_CACHE_DIR: str = "cache/scorecards"
+    SCORECARD_CACHE_MAX_ENTRIES: int = 512
+    SCORECARD_BATCH_CONCURRENCY: int = 4
+    SCORECARD_BATCH_MAX_ITEMS: int = 1000
+    SCORECARD_BATCH_MAX_ATTEMPTS: int = 2  # per case; only retried when the model returns no usable scorecard
+    SCORECARD_BATCH_JOB_STORE: str = "postgres"  # postgres | memory (single worker only)
+    SCORECARD_BATCH_JOB_RETENTION: int = 100  # memory store: finished jobs kept
+    SCORECARD_BATCH_JOB_TTL_HOURS: int = 72  # postgres store: jobs older than this are deleted
+    SCORECARD_BATCH_HEARTBEAT_SECONDS: float = 30.0
+
+    # Uploads
+    UPLOAD_MAX_ARCHIVE_BYTES: int = 1024 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    ZIP_MAX_MEMBERS: int = 1000
+    ZIP_MAX_TOTAL_UNCOMPRESSED_BYTES: int = 4 * 1024 * 1024 * 1024
+    ZIP_MAX_COMPRESSION_RATIO: float = 100.0
+    ZIP_STREAM_TO_S3: bool = False  # stream members straight to S3 instead of via temp files
+    UPLOAD_DEDUP_ENABLED: bool = True
+
+    # S3
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. MinIO/moto for local runs
+    S3_UPLOAD_WORKERS: int = 8
+    S3_MULTIPART_THRESHOLD_BYTES: int = 16 * 1024 * 1024
+    S3_MULTIPART_CHUNK_BYTES: int = 16 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+    DIRECT_UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    DIRECT_UPLOAD_PART_BYTES: int = 64 * 1024 * 1024
+    DIRECT_UPLOAD_VERIFY_MAX_BYTES: int = 256 * 1024 * 1024  # re-hash objects S3 has no SHA-256 for up to this size
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_DIR: str = "logs"
+    LOG_FILE_MAX_BYTES: int = 50 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 10
+    LOG_ROTATE_WHEN: Optional[str] = None  # e.g. "midnight" to rotate by time instead of size
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped rather than blocking callers
+    LOG_PAYLOAD_MAX_CHARS: int = 512  # chat messages/responses are truncated to this in logs
+    LOG_PAYLOAD_SAMPLE_RATE: float = 1.0  # fraction of chat payloads logged at all
+
     class Config:
         env_file = ".env"
 
@@ -1,32 +1,119 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from pathlib import Path
+from .config import settings
+
+# Callers only put records on a bounded queue; formatting and the file/stdout
+# writes happen on the listener thread, so slow disks never block the event loop
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields merged in"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Drops (and counts) records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Keep the raw record: the listener's handlers format it, and the JSON
+        # formatter needs msg/args/exc_info intact. getMessage() here so args
+        # holding mutable objects are rendered as they were at log time.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_formatter():
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def build_file_handler(path: Path):
+    # Time-based rotation when LOG_ROTATE_WHEN is set (e.g. "midnight"), size-based otherwise
+    if settings.LOG_ROTATE_WHEN:
+        return TimedRotatingFileHandler(
+            path, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_FILE_BACKUP_COUNT, encoding="utf-8"
+        )
+    return RotatingFileHandler(
+        path, maxBytes=settings.LOG_FILE_MAX_BYTES, backupCount=settings.LOG_FILE_BACKUP_COUNT, encoding="utf-8"
+    )
+
 
 def setup_logger():
     logger = logging.getLogger("credit_underwriter")
-    logger.setLevel(logging.INFO)
-    
+    logger.setLevel(settings.LOG_LEVEL)
+
     # Create logs directory if not exists
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    # File handler
-    file_handler = logging.FileHandler(log_dir / "app.log")
-    file_handler.setLevel(logging.INFO)
-    
-    # Console handler
+    log_dir = Path(settings.LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    formatter = build_formatter()
+    file_handler = build_file_handler(log_dir / "app.log")
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    return logger
-
-logger = setup_logger()
\ No newline at end of file
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    listener = QueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Flush what's queued when the process exits
+    atexit.register(listener.stop)
+
+    logger.addHandler(queue_handler)
+    return logger, queue_handler, listener
+
+
+def payload_preview(text: str) -> str:
+    """
+    Shorten a large payload such as a chat message for logging. Only a
+    LOG_PAYLOAD_SAMPLE_RATE fraction of payloads is logged at all; the rest
+    are reduced to their size.
+    """
+    if settings.LOG_PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return f"<{len(text)} chars, not sampled>"
+    if len(text) <= settings.LOG_PAYLOAD_MAX_CHARS:
+        return text
+    return f"{text[:settings.LOG_PAYLOAD_MAX_CHARS]}... <{len(text)} chars>"
+
+
+def logging_stats():
+    return {"queued": queue_handler.queue.qsize(), "dropped": queue_handler.dropped}
+
+
+logger, queue_handler, log_listener = setup_logger()
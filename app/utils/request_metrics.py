@@ -0,0 +1,86 @@
+"""
+Per-route HTTP latency, plus the database work done on behalf of each request.
+
+The middleware puts a RequestStats object in a context variable for the
+duration of the request. The SQLAlchemy hooks in database/query_metrics.py
+add to it; contextvars follow the request into run_in_threadpool, so sync
+routes are counted too. Routes are labelled by their path template
+(/loan-cases/{case_id}), never the raw path, to keep label cardinality bounded.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+from .metrics import registry
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request",
+    ("method", "route"),
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses aren't buffered"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_templates = None
+
+    def route_template(self, scope) -> str:
+        # The router leaves the matched endpoint in the scope; map it back to its path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "<unmatched>"
+        if self._route_templates is None:
+            self._route_templates = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint") and hasattr(route, "path")
+            }
+        return self._route_templates.get(endpoint, "<unmatched>")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_stats.reset(token)
+            method, route = scope["method"], self.route_template(scope)
+            http_request_duration.observe(elapsed, method=method, route=route, status=status_code)
+            http_request_db_queries.observe(stats.queries, method=method, route=route)
+            http_request_db_seconds.observe(stats.db_seconds, method=method, route=route)
@@ -1,24 +1,62 @@
 import boto3
+import hashlib
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from fastapi import HTTPException
+from ..utils.config import settings
 from ..utils.logger import logger
 
+
+@dataclass
+class UploadResult:
+    s3_key: str
+    s3_path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
 class S3Uploader:
     def __init__(self):
+        # One client shared by every upload thread; boto3 clients are thread-safe
+        # and the connection pool is sized for the worker pool plus multipart parts
         self.client = boto3.client(
             's3',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION')
+            region_name=os.getenv('AWS_REGION'),
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            config=Config(
+                max_pool_connections=settings.S3_UPLOAD_WORKERS * settings.S3_MULTIPART_CONCURRENCY,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            )
         )
         self.bucket = os.getenv('S3_BUCKET_NAME')
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD_BYTES,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_BYTES,
+            max_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload"
+        )
+        # Bounds queued uploads so producers (e.g. ZIP extraction) can't run far ahead
+        self._slots = threading.BoundedSemaphore(settings.S3_UPLOAD_WORKERS * 2)
 
     def upload_file(self, file_path: str, s3_key: str):
         try:
             self.client.upload_file(
                 file_path,
                 self.bucket,
-                s3_key
+                s3_key,
+                Config=self.transfer_config
             )
             logger.info(f"Successfully uploaded {file_path} to S3 as {s3_key}")
             return f"s3://{self.bucket}/{s3_key}"
@@ -29,4 +67,186 @@ class S3Uploader:
                 detail=f"S3 upload failed: {str(e)}"
             )
 
-s3_uploader = S3Uploader()
\ No newline at end of file
+    def upload_fileobj(self, fileobj, s3_key: str):
+        """Stream a readable object to S3; large bodies go up as multipart parts"""
+        try:
+            self.client.upload_fileobj(
+                fileobj,
+                self.bucket,
+                s3_key,
+                Config=self.transfer_config
+            )
+            logger.info(f"Successfully streamed {s3_key} to S3")
+            return f"s3://{self.bucket}/{s3_key}"
+        except Exception as e:
+            logger.error(f"S3 upload failed: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"S3 upload failed: {str(e)}"
+            )
+
+    # Direct (presigned) uploads
+
+    def presign_put(self, s3_key: str, content_type: str, checksum_sha256: str, expires_in: int):
+        """URL for a single PUT; S3 rejects the body unless it matches the SHA-256"""
+        return self._presign(
+            "put_object",
+            {"ContentType": content_type, "ChecksumSHA256": checksum_sha256},
+            s3_key, expires_in
+        )
+
+    def presign_post(self, s3_key: str, content_type: str, checksum_sha256: str,
+                     max_bytes: int, expires_in: int):
+        """Browser form upload policy with type, size and checksum conditions"""
+        fields = {"Content-Type": content_type, "x-amz-checksum-sha256": checksum_sha256}
+        try:
+            return self.client.generate_presigned_post(
+                self.bucket,
+                s3_key,
+                Fields=fields,
+                Conditions=[{k: v} for k, v in fields.items()] + [["content-length-range", 1, max_bytes]],
+                ExpiresIn=expires_in
+            )
+        except Exception as e:
+            logger.error(f"S3 presign failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"S3 presign failed: {str(e)}")
+
+    def create_multipart_upload(self, s3_key: str, content_type: str) -> str:
+        try:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=s3_key, ContentType=content_type
+            )
+            return response["UploadId"]
+        except Exception as e:
+            logger.error(f"S3 multipart create failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"S3 multipart create failed: {str(e)}")
+
+    def presign_upload_part(self, s3_key: str, upload_id: str, part_number: int, expires_in: int):
+        return self._presign(
+            "upload_part",
+            {"UploadId": upload_id, "PartNumber": part_number},
+            s3_key, expires_in
+        )
+
+    def complete_multipart_upload(self, s3_key: str, upload_id: str, parts: list[dict]):
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])}
+            )
+        except Exception as e:
+            logger.error(f"S3 multipart complete failed: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"S3 multipart complete failed: {str(e)}")
+
+    def abort_multipart_upload(self, s3_key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=s3_key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"S3 multipart abort failed for {s3_key}: {str(e)}")
+
+    def head_object(self, s3_key: str):
+        """Object metadata including any stored checksum, or None if it doesn't exist"""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=s3_key, ChecksumMode="ENABLED")
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise self._read_error(s3_key, e)
+
+    def read_object_head(self, s3_key: str, num_bytes: int) -> bytes:
+        """First bytes of an object, for type sniffing without downloading it"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=s3_key, Range=f"bytes=0-{num_bytes - 1}")
+            return response["Body"].read()
+        except Exception as e:
+            raise self._read_error(s3_key, e)
+
+    def hash_object(self, s3_key: str, chunk_bytes: int = 1024 * 1024) -> str:
+        """Hex SHA-256 of an object, streamed in chunks"""
+        digest = hashlib.sha256()
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=s3_key)["Body"]
+            try:
+                for chunk in iter(lambda: body.read(chunk_bytes), b""):
+                    digest.update(chunk)
+            finally:
+                body.close()
+        except Exception as e:
+            raise self._read_error(s3_key, e)
+        return digest.hexdigest()
+
+    def _is_missing(self, e: Exception) -> bool:
+        return (isinstance(e, self.client.exceptions.ClientError)
+                and e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"))
+
+    def _read_error(self, s3_key: str, e: Exception) -> HTTPException:
+        """An object gone missing is the caller's 404; anything else is S3 failing us"""
+        if self._is_missing(e):
+            return HTTPException(status_code=404, detail="Uploaded object not found")
+        logger.error(f"S3 read failed for {s3_key}: {str(e)}")
+        return HTTPException(status_code=502, detail="S3 read failed, try again later")
+
+    def _presign(self, operation: str, params: dict, s3_key: str, expires_in: int) -> str:
+        try:
+            return self.client.generate_presigned_url(
+                operation,
+                Params={"Bucket": self.bucket, "Key": s3_key, **params},
+                ExpiresIn=expires_in
+            )
+        except Exception as e:
+            logger.error(f"S3 presign failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"S3 presign failed: {str(e)}")
+
+    def delete_object(self, s3_key: str):
+        """Best-effort delete, e.g. of an upload that lost a dedup race"""
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=s3_key)
+            logger.info(f"Deleted redundant S3 object {s3_key}")
+        except Exception as e:
+            logger.warning(f"S3 delete failed for {s3_key}: {str(e)}")
+
+    def submit_upload(self, file_path: str, s3_key: str, remove_after: bool = False) -> "Future[UploadResult]":
+        """
+        Queue an upload on the shared worker pool. Blocks while the queue is full.
+        The future never raises; failures are reported in the UploadResult.
+        """
+        def cleanup():
+            if remove_after:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+        return self._submit(self.upload_file, file_path, s3_key, cleanup)
+
+    def submit_upload_fileobj(self, fileobj, s3_key: str, close_after: bool = False) -> "Future[UploadResult]":
+        """Like submit_upload, for a readable object; optionally closed once uploaded"""
+        return self._submit(self.upload_fileobj, fileobj, s3_key, fileobj.close if close_after else None)
+
+    def upload_files(self, items: list[tuple[str, str]]) -> list[UploadResult]:
+        """Upload (file_path, s3_key) pairs concurrently, returning results in order"""
+        futures = [self.submit_upload(file_path, s3_key) for file_path, s3_key in items]
+        return [future.result() for future in futures]
+
+    def _submit(self, upload, source, s3_key: str, cleanup) -> "Future[UploadResult]":
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._upload_quietly, upload, source, s3_key, cleanup)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    @staticmethod
+    def _upload_quietly(upload, source, s3_key: str, cleanup) -> UploadResult:
+        try:
+            return UploadResult(s3_key=s3_key, s3_path=upload(source, s3_key))
+        except HTTPException as e:
+            return UploadResult(s3_key=s3_key, error=e.detail)
+        finally:
+            if cleanup:
+                cleanup()
+
+s3_uploader = S3Uploader()
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import threading
+import uuid
+import zipfile
+from dataclasses import dataclass
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from .config import settings
+
+
+class ArchiveLimitError(Exception):
+    """Upload or archive exceeds a configured size/safety limit"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class ArchiveLimits:
+    max_archive_bytes: int
+    max_members: int
+    max_total_uncompressed_bytes: int
+    max_compression_ratio: float
+    chunk_bytes: int
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_archive_bytes=settings.UPLOAD_MAX_ARCHIVE_BYTES,
+            max_members=settings.ZIP_MAX_MEMBERS,
+            max_total_uncompressed_bytes=settings.ZIP_MAX_TOTAL_UNCOMPRESSED_BYTES,
+            max_compression_ratio=settings.ZIP_MAX_COMPRESSION_RATIO,
+            chunk_bytes=settings.UPLOAD_CHUNK_BYTES,
+        )
+
+
+async def save_upload_to_disk(upload: UploadFile, dest_path: str, limits: ArchiveLimits) -> int:
+    """Copy an upload to disk chunk by chunk, enforcing the archive size limit"""
+    if upload.size is not None and upload.size > limits.max_archive_bytes:
+        raise ArchiveLimitError(
+            f"Archive exceeds the {limits.max_archive_bytes} byte upload limit", status_code=413
+        )
+
+    written = 0
+    with open(dest_path, "wb") as f:
+        while chunk := await upload.read(limits.chunk_bytes):
+            written += len(chunk)
+            if written > limits.max_archive_bytes:
+                raise ArchiveLimitError(
+                    f"Archive exceeds the {limits.max_archive_bytes} byte upload limit", status_code=413
+                )
+            await run_in_threadpool(f.write, chunk)
+    return written
+
+
+def check_archive(zip_ref: zipfile.ZipFile, limits: ArchiveLimits) -> list[zipfile.ZipInfo]:
+    """
+    Reject zip bombs from the central directory before anything is extracted.
+    Returns the file members (directories excluded).
+    """
+    members = [info for info in zip_ref.infolist() if not info.is_dir()]
+    if len(members) > limits.max_members:
+        raise ArchiveLimitError(f"Archive has more than {limits.max_members} files")
+
+    total = sum(info.file_size for info in members)
+    if total > limits.max_total_uncompressed_bytes:
+        raise ArchiveLimitError(
+            f"Archive expands beyond {limits.max_total_uncompressed_bytes} bytes"
+        )
+
+    for info in members:
+        ratio = info.file_size / max(info.compress_size, 1)
+        # Small, highly repetitive files (e.g. text) legitimately compress well
+        if info.file_size > limits.chunk_bytes and ratio > limits.max_compression_ratio:
+            raise ArchiveLimitError(
+                f"Suspicious compression ratio ({ratio:.0f}:1) for {info.filename}"
+            )
+    return members
+
+
+class ExtractionBudget:
+    """Tracks bytes actually decompressed, in case the central directory lies"""
+
+    def __init__(self, limits: ArchiveLimits):
+        self.limits = limits
+        self.remaining = limits.max_total_uncompressed_bytes
+        # Streamed members are read concurrently by upload workers
+        self._lock = threading.Lock()
+
+    def consume(self, info: zipfile.ZipInfo, member_written: int, chunk_len: int):
+        with self._lock:
+            self.remaining -= chunk_len
+            remaining = self.remaining
+        if remaining < 0:
+            raise ArchiveLimitError(
+                f"Archive expands beyond {self.limits.max_total_uncompressed_bytes} bytes"
+            )
+        if member_written > info.file_size:
+            raise ArchiveLimitError(f"{info.filename} is larger than its declared size")
+
+
+def extract_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, dest_dir: str, budget: ExtractionBudget) -> tuple[str, str]:
+    """
+    Stream one member to its own file under dest_dir, hashing it on the way.
+    Returns (path, sha256 hex). The on-disk name is generated, so member paths
+    can't escape dest_dir.
+    """
+    file_ext = os.path.splitext(info.filename)[1]
+    dest_path = os.path.join(dest_dir, f"{uuid.uuid4()}{file_ext}")
+    digest = hashlib.sha256()
+    written = 0
+    with zip_ref.open(info) as src, open(dest_path, "wb") as dst:
+        while chunk := src.read(budget.limits.chunk_bytes):
+            written += len(chunk)
+            budget.consume(info, written, len(chunk))
+            digest.update(chunk)
+            dst.write(chunk)
+    return dest_path, digest.hexdigest()
+
+
+# filetype inspects at most this many leading bytes
+SNIFF_BYTES = 8192
+
+
+class MemberStream:
+    """
+    Read-only stream over one ZIP member for upload_fileobj, without touching
+    disk. The leading bytes are read up front for MIME sniffing and replayed
+    to the reader; every decompressed byte is charged to the shared budget
+    and hashed, so sha256 is the member's hash once the stream has been read
+    to the end.
+    """
+
+    def __init__(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, budget: ExtractionBudget):
+        self.info = info
+        self.budget = budget
+        self.limit_error: ArchiveLimitError | None = None
+        self._src = zip_ref.open(info)
+        self._written = 0
+        self._digest = hashlib.sha256()
+        self.header = self._read_src(SNIFF_BYTES)
+        self._pending = self.header
+
+    def _read_src(self, size: int) -> bytes:
+        chunk = self._src.read(size)
+        if chunk:
+            self._written += len(chunk)
+            try:
+                self.budget.consume(self.info, self._written, len(chunk))
+            except ArchiveLimitError as e:
+                self.limit_error = e
+                raise
+            self._digest.update(chunk)
+        return chunk
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._pending + self._read_src(-1)
+            self._pending = b""
+            return data
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+            return data
+        return self._read_src(size)
+
+    def readable(self) -> bool:
+        return True
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def close(self):
+        self._src.close()
+
+
+def remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
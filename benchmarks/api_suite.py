@@ -0,0 +1,346 @@
+"""
+End-to-end API benchmark suite.
+
+Starts the app in-process (lifespan on, so tables are created) against the
+Postgres named by the POSTGRES_* settings and an S3 stand-in: a local moto
+server by default, or any S3-compatible endpoint such as MinIO with
+--s3-endpoint. Then it drives the HTTP API with --concurrency clients and
+records latency percentiles, throughput and error counts per scenario:
+
+- signup           POST /signup with fresh accounts
+- login            POST /login for the signed-up accounts
+- loan_case_*      create / read / update / delete cycles on /loan-cases/
+- listing_*        first page, a deep cursor page and a filtered page of a
+                   user seeded with --list-cases cases via /loan-cases/import
+- upload_zip_<N>mb POST /upload-zip with generated archives of each size,
+                   uploaded through the real S3 client
+
+Results are written as JSON (--json) with the git commit and settings, and
+--compare checks a run against an earlier results file, exiting non-zero
+when p95 latency or throughput regresses by more than --threshold.
+
+Needs a reachable Postgres; the database is created if missing.
+
+Usage:
+    python -m benchmarks.api_suite --json results/api-$(git rev-parse --short HEAD).json
+    python -m benchmarks.api_suite --scenarios login listing --compare results/api-base.json
+    python -m benchmarks.api_suite --s3-endpoint http://localhost:9000 --zip-sizes-mb 1 10 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from benchmarks.common import InProcessServer, bootstrap_env, free_port, quiet_app_logger, summarize
+
+SCENARIOS = ("signup", "login", "loan_cases", "listing", "upload_zip")
+PASSWORD = "benchmark-pass"
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+class S3StandIn:
+    """A moto S3 server on a free port, unless an external endpoint is given"""
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self._server = None
+
+    def __enter__(self):
+        if not self.endpoint:
+            import logging
+
+            from moto.server import ThreadedMotoServer
+
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            port = free_port()
+            self._server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+            self._server.start()
+            self.endpoint = f"http://127.0.0.1:{port}"
+        return self
+
+    def __exit__(self, *exc):
+        if self._server:
+            self._server.stop()
+
+    def ensure_bucket(self, bucket):
+        import boto3
+
+        s3 = boto3.client(
+            "s3", endpoint_url=self.endpoint, region_name=os.environ["AWS_REGION"],
+            aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
+            aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+        )
+        existing = {b["Name"] for b in s3.list_buckets().get("Buckets", [])}
+        if bucket not in existing:
+            s3.create_bucket(Bucket=bucket)
+
+
+async def drive(name, count, concurrency, request, expected):
+    """Run request(i) for i in range(count) with bounded concurrency"""
+    latencies, errors = [], {}
+    indexes = iter(range(count))
+
+    async def worker():
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                response = await request(i)
+                code = response.status_code
+            except Exception as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if code != expected:
+                errors[str(code)] = errors.get(str(code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    elapsed = time.perf_counter() - started
+    result = {
+        "requests": count,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": count / elapsed if elapsed else 0.0,
+        "latency_seconds": summarize(latencies),
+    }
+    print(
+        f"{name:24s} n={count:5d}  {result['throughput_rps']:8.1f} req/s  "
+        f"p50={result['latency_seconds']['p50'] * 1000:8.1f}ms  p95={result['latency_seconds']['p95'] * 1000:8.1f}ms  "
+        f"p99={result['latency_seconds']['p99'] * 1000:8.1f}ms" + (f"  errors={errors}" if errors else "")
+    )
+    return result
+
+
+def signup_body(email):
+    return {
+        "name": "Bench", "email": email, "phone": "0000000000", "password": PASSWORD,
+        "security_question": "q", "security_answer": "a",
+    }
+
+
+async def create_user(http):
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    response = await http.post("/signup", json=signup_body(email))
+    response.raise_for_status()
+    return email, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def case_body(i):
+    return {
+        "business_name": f"Bench Traders {i}",
+        "loan_amount": 100000 + 1000 * (i % 500),
+        "loan_type": ("term", "working_capital", "equipment")[i % 3],
+        "loan_tenure": 12 * (1 + i % 5),
+    }
+
+
+async def bench_auth(http, options, results, scenarios):
+    prefix = uuid.uuid4().hex[:8]
+    emails = [f"bench-{prefix}-{i}@example.com" for i in range(options.auth_requests)]
+    if "signup" in scenarios:
+        results["signup"] = await drive(
+            "signup", len(emails), options.concurrency,
+            lambda i: http.post("/signup", json=signup_body(emails[i])), 200,
+        )
+    else:
+        # Login needs accounts; create a few outside the measurement
+        emails = [(await create_user(http))[0] for _ in range(min(8, options.auth_requests))]
+    if "login" in scenarios:
+        results["login"] = await drive(
+            "login", options.auth_requests, options.concurrency,
+            lambda i: http.post("/login", data={"username": emails[i % len(emails)], "password": PASSWORD}), 200,
+        )
+
+
+async def bench_loan_cases(http, options, results):
+    _, headers = await create_user(http)
+    ids = [None] * options.crud_requests
+
+    async def create(i):
+        response = await http.post("/loan-cases/", json=case_body(i), headers=headers)
+        if response.status_code == 201:
+            ids[i] = response.json()["id"]
+        return response
+
+    n, c = options.crud_requests, options.concurrency
+    results["loan_case_create"] = await drive("loan_case_create", n, c, create, 201)
+    created = [case_id for case_id in ids if case_id is not None]
+    results["loan_case_read"] = await drive(
+        "loan_case_read", len(created), c, lambda i: http.get(f"/loan-cases/{created[i]}", headers=headers), 200,
+    )
+    results["loan_case_update"] = await drive(
+        "loan_case_update", len(created), c,
+        lambda i: http.patch(f"/loan-cases/{created[i]}", json={"loan_amount": 250000 + i}, headers=headers), 200,
+    )
+    results["loan_case_delete"] = await drive(
+        "loan_case_delete", len(created), c, lambda i: http.delete(f"/loan-cases/{created[i]}", headers=headers), 204,
+    )
+
+
+async def bench_listing(http, options, results):
+    _, headers = await create_user(http)
+    rows = "\n".join(json.dumps(case_body(i)) for i in range(options.list_cases))
+    started = time.perf_counter()
+    response = await http.post(
+        "/loan-cases/import", params={"format": "ndjson"},
+        files={"file": ("cases.ndjson", rows.encode(), "application/x-ndjson")}, headers=headers,
+    )
+    response.raise_for_status()
+    results["listing_seed"] = {"cases": options.list_cases, "seconds": time.perf_counter() - started}
+
+    # Walk to the middle of the listing once to get a deep cursor
+    cursor, pages = None, max(1, options.list_cases // options.page_size // 2)
+    for _ in range(pages):
+        page = (await http.get("/loan-cases/", params={"limit": options.page_size, "cursor": cursor}
+                               if cursor else {"limit": options.page_size}, headers=headers)).json()
+        cursor = page.get("next_cursor") or cursor
+
+    n, c = options.list_requests, options.concurrency
+    results["listing_first_page"] = await drive(
+        "listing_first_page", n, c,
+        lambda i: http.get("/loan-cases/", params={"limit": options.page_size}, headers=headers), 200,
+    )
+    if cursor:
+        results["listing_deep_page"] = await drive(
+            "listing_deep_page", n, c,
+            lambda i: http.get("/loan-cases/", params={"limit": options.page_size, "cursor": cursor}, headers=headers),
+            200,
+        )
+    results["listing_filtered"] = await drive(
+        "listing_filtered", n, c,
+        lambda i: http.get("/loan-cases/", params={
+            "limit": options.page_size, "loan_type": "term", "min_amount": 200000, "max_tenure": 36,
+        }, headers=headers), 200,
+    )
+
+
+async def bench_upload_zip(http, options, results):
+    from benchmarks.upload_zip_memory import build_archive
+
+    _, headers = await create_user(http)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in options.zip_sizes_mb:
+            # Fresh random archives so upload dedup doesn't skip the S3 writes
+            archives = []
+            for i in range(options.zip_repeats):
+                path = os.path.join(tmp, f"bundle-{size_mb}-{i}.zip")
+                build_archive(path, size_mb)
+                archives.append(path)
+
+            async def upload(i):
+                with open(archives[i], "rb") as f:
+                    return await http.post(
+                        "/upload-zip", files={"file": (f"bundle-{i}.zip", f, "application/zip")}, headers=headers,
+                    )
+
+            # Sequential: one archive at a time is the realistic case and keeps MB/s meaningful
+            result = await drive(f"upload_zip_{size_mb}mb", len(archives), 1, upload, 200)
+            result["megabytes_per_second"] = size_mb * len(archives) / result["seconds"] if result["seconds"] else 0.0
+            results[f"upload_zip_{size_mb}mb"] = result
+            for path in archives:
+                os.remove(path)
+
+
+async def run(options):
+    import httpx
+
+    from app.main import app
+
+    quiet_app_logger()
+    results = {}
+    scenarios = set(options.scenarios)
+    async with InProcessServer(app, lifespan="on") as server:
+        limits = httpx.Limits(max_connections=options.concurrency + 4)
+        async with httpx.AsyncClient(base_url=server.base_url, timeout=300, limits=limits) as http:
+            if scenarios & {"signup", "login"}:
+                await bench_auth(http, options, results, scenarios)
+            if "loan_cases" in scenarios:
+                await bench_loan_cases(http, options, results)
+            if "listing" in scenarios:
+                await bench_listing(http, options, results)
+            if "upload_zip" in scenarios:
+                await bench_upload_zip(http, options, results)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print changes against a baseline run; returns the regressed scenarios"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} ({(baseline.get('git') or {}).get('commit') or 'unknown commit'}):")
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if not previous or "latency_seconds" not in current:
+            continue
+        p95_before, p95_now = previous["latency_seconds"]["p95"], current["latency_seconds"]["p95"]
+        rps_before, rps_now = previous["throughput_rps"], current["throughput_rps"]
+        p95_change = (p95_now - p95_before) / p95_before if p95_before else 0.0
+        rps_change = (rps_now - rps_before) / rps_before if rps_before else 0.0
+        regressed = p95_change > threshold or rps_change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:24s} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}" + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--auth-requests", type=int, default=64, help="signups and logins")
+    parser.add_argument("--crud-requests", type=int, default=200, help="cases per create/read/update/delete")
+    parser.add_argument("--list-cases", type=int, default=5000, help="cases seeded for the listing scenarios")
+    parser.add_argument("--list-requests", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--zip-sizes-mb", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--zip-repeats", type=int, default=3)
+    parser.add_argument("--s3-endpoint", help="S3-compatible endpoint (e.g. MinIO); default starts moto")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95/throughput change for --compare")
+    args = parser.parse_args()
+
+    # Repeated logins from one client would trip the login rate limiter
+    bootstrap_env(RATE_LIMIT_BACKEND="none", LOG_LEVEL="WARNING")
+    with S3StandIn(args.s3_endpoint) as s3:
+        os.environ["S3_ENDPOINT_URL"] = s3.endpoint
+        s3.ensure_bucket(os.environ["S3_BUCKET_NAME"])
+        results = asyncio.run(run(args))
+
+    report = {
+        "benchmark": "api_suite",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "s3": "external" if args.s3_endpoint else "moto",
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+        "results": results,
+    }
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Concurrent /chat latency benchmark.
+
+Starts the app in-process, replaces the Gemini client used by the chat router
+with a stub that streams a fixed number of chunks with a fixed delay, and opens
+N WebSocket sessions at once. Every session sends one message and records how
+long the full reply takes.
+
+With the non-blocking stream, p99 stays close to a single generation's latency
+as N grows (until CHAT_MAX_CONCURRENT_GENERATIONS is reached). `--blocking`
+makes the stub sleep synchronously between chunks, which reproduces the old
+behaviour: sessions serialize on the event loop and p99 grows roughly N-fold.
+
+Usage:
+    python -m benchmarks.chat_concurrency --sessions 1 8 32 64
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import InProcessServer, bootstrap_env, quiet_app_logger, summarize
+
+# No database here: keep chat sessions in process
+bootstrap_env(CHAT_SESSION_STORE="memory")
+
+import websockets  # noqa: E402
+
+from app.auth.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import chat  # noqa: E402
+
+quiet_app_logger()
+
+
+class StubStreamingModels:
+    def __init__(self, chunks, delay, blocking):
+        self.chunks = chunks
+        self.delay = delay
+        self.blocking = blocking
+
+    async def generate_content_stream(self, model, contents, config=None):
+        async def stream():
+            for i in range(self.chunks):
+                if self.blocking:
+                    time.sleep(self.delay)
+                else:
+                    await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=f"chunk-{i} ", usage_metadata=None)
+        return stream()
+
+
+async def run_session(url, chunks):
+    started = time.perf_counter()
+    async with websockets.connect(url) as ws:
+        await ws.send("What is the DSCR for this applicant?")
+        for _ in range(chunks):
+            await ws.recv()
+    return time.perf_counter() - started
+
+
+async def run(sessions_list, chunks, delay, blocking):
+    chat.client = SimpleNamespace(aio=SimpleNamespace(
+        models=StubStreamingModels(chunks, delay, blocking)
+    ))
+    token = create_access_token(data={"sub": "bench@example.com", "uid": 1})
+    results = []
+    async with InProcessServer(app) as server:
+        url = f"{server.ws_url}/chat?token={token}"
+        for sessions in sessions_list:
+            latencies = await asyncio.gather(*(run_session(url, chunks) for _ in range(sessions)))
+            stats = summarize(latencies)
+            stats["sessions"] = sessions
+            results.append(stats)
+            print(
+                f"sessions={sessions:4d}  p50={stats['p50'] * 1000:8.1f}ms  "
+                f"p99={stats['p99'] * 1000:8.1f}ms"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--blocking", action="store_true", help="simulate the old synchronous stream")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sessions, args.chunks, args.chunk_delay, args.blocking))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "chat_concurrency", "blocking": args.blocking, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
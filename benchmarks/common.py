@@ -0,0 +1,101 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run from the repository root as modules, e.g.
+`python -m benchmarks.chat_concurrency`. Settings are read from the
+environment / `.env` as usual; `bootstrap_env` only fills in harmless
+placeholders for values a benchmark does not exercise.
+"""
+import asyncio
+import os
+import socket
+
+BENCH_ENV_DEFAULTS = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "credit_underwriter_bench",
+    "SECRET_KEY": "benchmark-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "GOOGLE_API_KEY": "benchmark-placeholder",
+    "GEMINI_MODEL": "gemini-2.0-flash",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "credit-underwriter-bench",
+    "S3_URL_EXPIRATION": "3600",
+}
+
+
+def bootstrap_env(**overrides):
+    """Populate placeholder settings before `app` is imported"""
+    for key, value in {**BENCH_ENV_DEFAULTS, **overrides}.items():
+        os.environ.setdefault(key, str(value))
+
+
+def quiet_app_logger():
+    """Keep per-request INFO logs from drowning out benchmark output"""
+    import logging
+
+    logging.getLogger("credit_underwriter").setLevel(logging.WARNING)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class InProcessServer:
+    """Runs uvicorn on the current event loop for the duration of a block"""
+
+    def __init__(self, app, port=None, lifespan="off"):
+        import uvicorn
+
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan=lifespan
+        ))
+        self._task = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self._task.done():
+                # uvicorn exits instead of raising when startup (e.g. init_db) fails
+                raise RuntimeError("Benchmark server failed to start; see the log above")
+            await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.should_exit = True
+        await self._task
@@ -0,0 +1,116 @@
+"""
+Sync vs async database mode benchmark for the loan-case routes.
+
+For each mode a fresh subprocess starts the app in-process with
+DB_ASYNC_MODE set accordingly, signs up a user, seeds a few loan cases and
+then runs N concurrent clients that each issue GET /loan-cases/{id} and
+GET /loan-cases/ in a loop. Reports throughput and latency percentiles.
+Needs a reachable Postgres (POSTGRES_* settings); the benchmark database is
+created on startup if missing.
+
+Usage:
+    python -m benchmarks.db_mode --concurrency 8 64 256 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.common import InProcessServer, bootstrap_env, quiet_app_logger, summarize
+
+SEED_CASES = 20
+
+
+async def client_loop(http, headers, case_ids, count, latencies):
+    for i in range(count):
+        path = f"/loan-cases/{case_ids[i % len(case_ids)]}" if i % 2 else "/loan-cases/"
+        started = time.perf_counter()
+        response = await http.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def measure(async_mode, concurrency, total_requests):
+    bootstrap_env(DB_ASYNC_MODE=str(async_mode).lower())
+    import httpx
+
+    from app.main import app
+
+    quiet_app_logger()
+    async with InProcessServer(app, lifespan="on") as server:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=server.base_url, timeout=None, limits=limits) as http:
+            email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+            signup = await http.post("/signup", json={
+                "name": "Bench", "email": email, "phone": "0000000000", "password": "benchmark-pass",
+                "security_question": "q", "security_answer": "a",
+            })
+            signup.raise_for_status()
+            headers = {"Authorization": f"Bearer {signup.json()['access_token']}"}
+            case_ids = []
+            for i in range(SEED_CASES):
+                created = await http.post("/loan-cases/", headers=headers, json={
+                    "business_name": f"Bench Co {i}", "loan_amount": 100000 + i,
+                    "loan_type": "term", "loan_tenure": 36,
+                })
+                created.raise_for_status()
+                case_ids.append(created.json()["id"])
+
+            latencies = []
+            per_client = max(1, total_requests // concurrency)
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                client_loop(http, headers, case_ids, per_client, latencies) for _ in range(concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "async" if async_mode else "sync",
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--single", nargs=2, metavar=("MODE", "CONCURRENCY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        mode, concurrency = args.single
+        print(json.dumps(asyncio.run(measure(mode == "async", int(concurrency), args.requests))))
+        return
+
+    results = []
+    for concurrency in args.concurrency:
+        for mode in ("sync", "async"):
+            # Settings are read at import time, so each mode gets its own process
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.db_mode", "--single", mode, str(concurrency),
+                 "--requests", str(args.requests)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            results.append(result)
+            latency = result["latency"]
+            print(
+                f"mode={mode:5s}  concurrency={concurrency:4d}  rps={result['rps']:8.1f}  "
+                f"p50={latency['p50'] * 1000:7.1f}ms  p99={latency['p99'] * 1000:7.1f}ms"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "db_mode", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
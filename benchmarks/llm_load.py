@@ -0,0 +1,208 @@
+"""
+LLM load test against the offline fake model backend.
+
+Starts the app in-process with LLM_BACKEND=fake, so the real chat router,
+rate governor, retry/deadline layer and scorecard batch runner are exercised
+while the model itself is app/llm/fake_client.py with configurable latency,
+chunk size and streaming rate. No API key or network access is needed.
+
+For every concurrency level it opens N /chat WebSocket sessions, each sending
+--messages questions back to back, while a scorecard batch of --scorecards
+cases runs on the same worker. It reports:
+- chat time to first chunk and full-reply latency (client side)
+- chat throughput in replies/s and characters/s
+- scorecard batch duration and scorecards/s
+- event-loop lag: how late a 10 ms sleep wakes up on the loop shared by the
+  server and the clients, which shows whether any model call blocks it
+
+Usage:
+    python -m benchmarks.llm_load --sessions 1 16 64 --scorecards 32
+    python -m benchmarks.llm_load --latency 1.0 --chunks-per-second 50 --json llm.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.common import InProcessServer, bootstrap_env, quiet_app_logger, summarize
+
+bootstrap_env(
+    LLM_BACKEND="fake",
+    # Measure the app, not the quota; set LLM_REQUESTS_PER_MINUTE to load-test the governor
+    LLM_REQUESTS_PER_MINUTE=1_000_000,
+    SCORECARD_CACHE_BACKEND="none",
+    SCORECARD_BATCH_JOB_STORE="memory",
+    CHAT_SESSION_STORE="memory",
+)
+
+import websockets  # noqa: E402
+
+from app.auth.security import create_access_token  # noqa: E402
+from app.llm.batch import BatchItem, BatchJob, batch_runner  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.config import settings  # noqa: E402
+
+quiet_app_logger()
+
+QUESTIONS = (
+    "What is the DSCR for this applicant?",
+    "Summarize the main credit risks.",
+    "Is the requested tenure reasonable given the cash flows?",
+)
+
+
+class LoopLagProbe:
+    """Samples how late a short sleep wakes up on the running loop"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def run_session(url, messages, expected_chars):
+    """(first-chunk latencies, reply latencies, characters received, rejection or None)"""
+    ttfts, totals, received = [], [], 0
+    try:
+        async with websockets.connect(url, open_timeout=30) as ws:
+            for i in range(messages):
+                started = time.perf_counter()
+                await ws.send(QUESTIONS[i % len(QUESTIONS)])
+                reply = await asyncio.wait_for(ws.recv(), 60)
+                ttfts.append(time.perf_counter() - started)
+                chars = len(reply)
+                while chars < expected_chars:
+                    chars += len(await asyncio.wait_for(ws.recv(), 60))
+                totals.append(time.perf_counter() - started)
+                received += chars
+    except websockets.ConnectionClosed as e:
+        return ttfts, totals, received, f"{e.rcvd.code if e.rcvd else 'closed'}"
+    except asyncio.TimeoutError:
+        return ttfts, totals, received, "timeout"
+    return ttfts, totals, received, None
+
+
+async def run_scorecards(count, level):
+    if not count:
+        return None
+    items = [
+        # Distinct contexts so single-flight and the result cache don't collapse the work
+        BatchItem(case_id=i, context=f"Loan case details:\n- Business name: Load {level}-{i}\n- Requested amount: {1000 * (i + 1)}\n")
+        for i in range(count)
+    ]
+    started = time.perf_counter()
+    job = await batch_runner.submit(BatchJob(owner=0, items=items))
+    while not job.finished_at:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    summary = job.to_dict()
+    return {
+        "count": count,
+        "succeeded": summary["succeeded"],
+        "failed": summary["failed"],
+        "seconds": elapsed,
+        "per_second": summary["succeeded"] / elapsed if elapsed else 0.0,
+    }
+
+
+async def run_level(url, sessions, messages, scorecards, expected_chars):
+    with LoopLagProbe() as probe:
+        started = time.perf_counter()
+        scoring = asyncio.create_task(run_scorecards(scorecards, sessions))
+        outcomes = await asyncio.gather(*(run_session(url, messages, expected_chars) for _ in range(sessions)))
+        chat_seconds = time.perf_counter() - started
+        scoring = await scoring
+    ttfts = [value for outcome in outcomes for value in outcome[0]]
+    totals = [value for outcome in outcomes for value in outcome[1]]
+    chars = sum(outcome[2] for outcome in outcomes)
+    rejections = {}
+    for outcome in outcomes:
+        if outcome[3]:
+            rejections[outcome[3]] = rejections.get(outcome[3], 0) + 1
+    return {
+        "sessions": sessions,
+        "chat": {
+            "replies": len(totals),
+            "rejected_sessions": rejections,
+            "ttft_seconds": summarize(ttfts),
+            "reply_seconds": summarize(totals),
+            "replies_per_second": len(totals) / chat_seconds,
+            "chars_per_second": chars / chat_seconds,
+        },
+        "scorecards": scoring,
+        "event_loop_lag_seconds": summarize(probe.samples),
+    }
+
+
+async def run(options):
+    token = create_access_token(data={"sub": "load@example.com", "uid": 1})
+    results = []
+    async with InProcessServer(app) as server:
+        url = f"{server.ws_url}/chat?token={token}"
+        for sessions in options.sessions:
+            level = await run_level(url, sessions, options.messages, options.scorecards, settings.LLM_FAKE_RESPONSE_CHARS)
+            results.append(level)
+            chat, lag = level["chat"], level["event_loop_lag_seconds"]
+            scoring = level["scorecards"]
+            print(
+                f"sessions={sessions:4d}  ttft p50={chat['ttft_seconds']['p50'] * 1000:7.1f}ms "
+                f"p99={chat['ttft_seconds']['p99'] * 1000:7.1f}ms  "
+                f"reply p99={chat['reply_seconds']['p99'] * 1000:7.1f}ms  "
+                f"{chat['replies_per_second']:6.1f} replies/s  "
+                + (f"scorecards {scoring['per_second']:5.1f}/s  " if scoring else "")
+                + f"loop lag p99={lag['p99'] * 1000:6.1f}ms max={lag['max'] * 1000:6.1f}ms"
+                + (f"  rejected={chat['rejected_sessions']}" if chat["rejected_sessions"] else "")
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--messages", type=int, default=3, help="messages per chat session")
+    parser.add_argument("--scorecards", type=int, default=16, help="scorecards per level (0 disables)")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake time to first chunk (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+- fraction of the latency")
+    parser.add_argument("--chunk-chars", type=int, default=40)
+    parser.add_argument("--chunks-per-second", type=float, default=20.0)
+    parser.add_argument("--response-chars", type=int, default=800)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake calls failing with 503")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    # The fake model reads these on every call
+    settings.LLM_FAKE_LATENCY_SECONDS = args.latency
+    settings.LLM_FAKE_LATENCY_JITTER = args.jitter
+    settings.LLM_FAKE_CHUNK_CHARS = args.chunk_chars
+    settings.LLM_FAKE_CHUNKS_PER_SECOND = args.chunks_per_second
+    settings.LLM_FAKE_RESPONSE_CHARS = args.response_chars
+    settings.LLM_FAKE_ERROR_RATE = args.error_rate
+
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "llm_load",
+                "config": {key: value for key, value in vars(args).items() if key != "json"},
+                "python": sys.version.split()[0],
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+GET /loan-cases/ page latency at increasing portfolio depth.
+
+Seeds one underwriter with --cases loan cases (reused across runs unless
+--reseed is given), then fetches a page starting at several depths of the
+portfolio through the app, using the keyset cursor the API hands out. For
+comparison the same page is also read with LIMIT/OFFSET directly in SQL.
+Keyset latency should stay flat from the first page to the last; OFFSET
+grows with depth. Needs a reachable Postgres (POSTGRES_* settings).
+
+Usage:
+    python -m benchmarks.loan_case_pagination --cases 100000 --page-size 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import bootstrap_env, quiet_app_logger, summarize
+
+bootstrap_env()
+
+import httpx  # noqa: E402
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+from app.auth.security import create_access_token, get_password_hash  # noqa: E402
+from app.database.database import SessionLocal, init_db  # noqa: E402
+from app.database.models import CreditUnderwriter, LoanCase  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers.loan_cases import encode_cursor  # noqa: E402
+
+quiet_app_logger()
+
+BENCH_EMAIL = "pagination-bench@example.com"
+LOAN_TYPES = ["term", "working_capital", "equipment", "invoice", "overdraft"]
+DEPTHS = [0.0, 0.25, 0.5, 0.75, 0.99]
+
+
+def seed(cases, reseed):
+    with SessionLocal() as db:
+        user = db.query(CreditUnderwriter).filter(CreditUnderwriter.email == BENCH_EMAIL).first()
+        if user is None:
+            user = CreditUnderwriter(
+                name="Pagination Bench", email=BENCH_EMAIL, phone="0000000000",
+                password=get_password_hash("benchmark-pass"), security_question="q", security_answer="a",
+            )
+            db.add(user)
+            db.commit()
+        existing = db.scalar(select(func.count()).select_from(LoanCase).where(LoanCase.underwriter_id == user.id))
+        if reseed and existing:
+            db.execute(LoanCase.__table__.delete().where(LoanCase.underwriter_id == user.id))
+            db.commit()
+            existing = 0
+        rng = random.Random(42)
+        batch = 10000
+        for start in range(existing, cases, batch):
+            db.execute(insert(LoanCase), [
+                {
+                    "business_name": f"Bench Co {i}",
+                    "loan_amount": rng.randrange(10_000, 5_000_000),
+                    "loan_type": rng.choice(LOAN_TYPES),
+                    "loan_tenure": rng.choice([12, 24, 36, 48, 60, 84, 120]),
+                    "underwriter_id": user.id,
+                }
+                for i in range(start, min(cases, start + batch))
+            ])
+            db.commit()
+        db.execute(text("ANALYZE loan_cases"))
+        db.commit()
+        ids = db.scalars(select(LoanCase.id).where(LoanCase.underwriter_id == user.id).order_by(LoanCase.id)).all()
+        return user.id, ids
+
+
+def time_offset_page(user_id, offset, page_size, repeats):
+    samples = []
+    with SessionLocal() as db:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            db.execute(
+                select(LoanCase).where(LoanCase.underwriter_id == user_id)
+                .order_by(LoanCase.id).offset(offset).limit(page_size)
+            ).all()
+            samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def run(cases, page_size, repeats, reseed):
+    init_db()
+    user_id, ids = seed(cases, reseed)
+    token = create_access_token(data={"sub": BENCH_EMAIL, "uid": user_id})
+    headers = {"Authorization": f"Bearer {token}"}
+    print(f"underwriter {user_id}: {len(ids)} cases, page size {page_size}")
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        for depth in DEPTHS:
+            offset = int(depth * (len(ids) - page_size))
+            params = {"limit": page_size}
+            if offset:
+                params["cursor"] = encode_cursor(ids[offset - 1])
+            for label, extra in (("keyset", {}), ("keyset+type", {"loan_type": "term"})):
+                samples = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    response = await http.get("/loan-cases/", params={**params, **extra}, headers=headers)
+                    samples.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                stats = summarize(samples)
+                results.append({"query": label, "depth": depth, "offset": offset, "latency": stats})
+                print(f"{label:12s} depth={depth:4.2f} offset={offset:7d}  p50={stats['p50'] * 1000:7.2f}ms  "
+                      f"p99={stats['p99'] * 1000:7.2f}ms")
+            stats = time_offset_page(user_id, offset, page_size, repeats)
+            results.append({"query": "sql-offset", "depth": depth, "offset": offset, "latency": stats})
+            print(f"{'sql-offset':12s} depth={depth:4.2f} offset={offset:7d}  p50={stats['p50'] * 1000:7.2f}ms  "
+                  f"p99={stats['p99'] * 1000:7.2f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--reseed", action="store_true", help="delete and recreate the benchmark cases")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.cases, args.page_size, args.repeats, args.reseed))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "loan_case_pagination", "cases": args.cases, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Login storm vs. responsiveness of other routes.
+
+For each PASSWORD_HASH_WORKERS value a fresh subprocess starts the app on
+uvicorn, signs up one user and then, for --seconds, keeps --storm concurrent
+clients logging in while a probe requests GET /loan-cases/?limit=1 every
+--probe-interval seconds. Reports logins/s and the probe's latency. With the
+process pool, bcrypt is bounded to the pool size and the probe stays fast;
+workers=0 hashes on threads and lets the storm take every core.
+Needs a reachable Postgres (POSTGRES_* settings).
+
+Usage:
+    python -m benchmarks.login_storm --workers 0 2 --storm 64 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.common import InProcessServer, bootstrap_env, quiet_app_logger, summarize
+
+PASSWORD = "benchmark-pass"
+
+
+async def storm_client(http, email, deadline, latencies):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await http.post("/login", data={"username": email, "password": PASSWORD})
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def probe(http, headers, deadline, interval, latencies):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await http.get("/loan-cases/", params={"limit": 1}, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+
+
+async def measure(workers, storm, seconds, interval):
+    # One account logs in non-stop, which the login rate limiter would cut off
+    bootstrap_env(PASSWORD_HASH_WORKERS=str(workers), RATE_LIMIT_BACKEND="none")
+    import httpx
+
+    from app.main import app
+
+    quiet_app_logger()
+    async with InProcessServer(app, lifespan="on") as server:
+        limits = httpx.Limits(max_connections=storm + 8)
+        async with httpx.AsyncClient(base_url=server.base_url, timeout=None, limits=limits) as http:
+            email = f"storm-{uuid.uuid4().hex[:12]}@example.com"
+            signup = await http.post("/signup", json={
+                "name": "Storm", "email": email, "phone": "0000000000", "password": PASSWORD,
+                "security_question": "q", "security_answer": "a",
+            })
+            signup.raise_for_status()
+            headers = {"Authorization": f"Bearer {signup.json()['access_token']}"}
+
+            # Idle baseline for the probe, then the same probe under the storm
+            idle = []
+            await probe(http, headers, time.perf_counter() + 2, interval, idle)
+            logins, probes = [], []
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(
+                probe(http, headers, deadline, interval, probes),
+                *(storm_client(http, email, deadline, logins) for _ in range(storm)),
+            )
+
+    return {
+        "workers": workers,
+        "storm": storm,
+        "logins_per_second": len(logins) / seconds,
+        "login_latency": summarize(logins),
+        "probe_idle_latency": summarize(idle),
+        "probe_storm_latency": summarize(probes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--storm", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(asyncio.run(measure(args.single, args.storm, args.seconds, args.probe_interval))))
+        return
+
+    results = []
+    for workers in args.workers:
+        # Settings are read at import time, so each configuration gets its own process
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.login_storm", "--single", str(workers),
+             "--storm", str(args.storm), "--seconds", str(args.seconds),
+             "--probe-interval", str(args.probe_interval)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        results.append(result)
+        idle, busy = result["probe_idle_latency"], result["probe_storm_latency"]
+        print(
+            f"workers={workers:2d}  logins/s={result['logins_per_second']:6.1f}  "
+            f"probe p50 idle={idle['p50'] * 1000:6.1f}ms storm={busy['p50'] * 1000:7.1f}ms  "
+            f"probe p99 idle={idle['p99'] * 1000:6.1f}ms storm={busy['p99'] * 1000:7.1f}ms"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "login_storm", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Peak-RSS benchmark for /upload-zip.
+
+For each archive size a fresh subprocess starts the app in-process, posts a
+generated ZIP of PDF-like members to /upload-zip and reports the process's
+peak RSS (ru_maxrss). S3 uploads are replaced with a no-op so only the
+ingestion path is measured. With streaming ingestion, peak RSS should stay
+roughly flat as the archive grows.
+
+Usage:
+    python -m benchmarks.upload_zip_memory --sizes-mb 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+from benchmarks.common import InProcessServer, bootstrap_env, quiet_app_logger
+
+MEMBER_BYTES = 4 * 1024 * 1024
+
+
+def build_archive(path, size_mb):
+    """Incompressible PDF-like members so archive size tracks the target"""
+    remaining = size_mb * 1024 * 1024
+    index = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        while remaining > 0:
+            size = min(MEMBER_BYTES, remaining)
+            with zf.open(f"statements/statement_{index:04d}.pdf", "w") as member:
+                member.write(b"%PDF-1.4\n")
+                written = 9
+                while written < size:
+                    block = os.urandom(min(1024 * 1024, size - written))
+                    member.write(block)
+                    written += len(block)
+            remaining -= size
+            index += 1
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+async def measure(size_mb):
+    # No database here: measure ingestion alone, without the dedup index
+    bootstrap_env(UPLOAD_DEDUP_ENABLED="false")
+    import httpx
+
+    from app.auth.security import create_access_token
+    from app.main import app
+    from app.utils import s3_utils
+
+    quiet_app_logger()
+    s3_utils.s3_uploader.upload_file = lambda path, key: f"s3://bench/{key}"
+    token = create_access_token(data={"sub": "bench@example.com", "uid": 1})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, "bundle.zip")
+        build_archive(archive, size_mb)
+        baseline = peak_rss_mb()
+        async with InProcessServer(app) as server:
+            async with httpx.AsyncClient(base_url=server.base_url, timeout=None) as http:
+                started = time.perf_counter()
+                with open(archive, "rb") as f:
+                    response = await http.post(
+                        "/upload-zip",
+                        files={"file": ("bundle.zip", f, "application/zip")},
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        return {
+            "size_mb": size_mb,
+            "files": len(response.json()["extracted_files"]),
+            "seconds": elapsed,
+            "baseline_rss_mb": baseline,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(measure(args.single))))
+        return
+
+    results = []
+    for size_mb in args.sizes_mb:
+        # One process per size so ru_maxrss isn't carried over between runs
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.upload_zip_memory", "--single", str(size_mb)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        results.append(result)
+        print(
+            f"archive={size_mb:5d}MB  files={result['files']:4d}  time={result['seconds']:7.2f}s  "
+            f"peak_rss={result['peak_rss_mb']:7.1f}MB (baseline {result['baseline_rss_mb']:.1f}MB)"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "upload_zip_memory", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Unit tests run offline: the fake LLM backend and the in-memory stores, no
+Postgres, S3 or Gemini. Settings are read when `app` is first imported, so
+they are set here before any test module imports it.
+"""
+import os
+
+REQUIRED_PLACEHOLDERS = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "credit_underwriter_test",
+    "SECRET_KEY": "test-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "GOOGLE_API_KEY": "test-placeholder",
+    "GEMINI_MODEL": "gemini-2.0-flash",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "credit-underwriter-test",
+    "S3_URL_EXPIRATION": "3600",
+}
+
+# Never reach a real backend, whatever the developer's environment says
+OFFLINE = {
+    "LLM_BACKEND": "fake",
+    "LLM_FAKE_RECORDINGS_PATH": "",
+    "LLM_FAKE_LATENCY_SECONDS": "0",
+    "LLM_FAKE_CHUNKS_PER_SECOND": "0",
+    "LLM_FAKE_ERROR_RATE": "0",
+    "CHAT_SESSION_STORE": "memory",
+    "RATE_LIMIT_BACKEND": "memory",
+    "SCORECARD_CACHE_BACKEND": "none",
+    "SCORECARD_BATCH_JOB_STORE": "memory",
+}
+
+for key, value in REQUIRED_PLACEHOLDERS.items():
+    os.environ.setdefault(key, value)
+os.environ.update(OFFLINE)
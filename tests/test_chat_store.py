@@ -0,0 +1,81 @@
+from app.llm.chat_store import MemoryChatStore
+
+
+def test_new_session_is_written_by_its_first_append():
+    store = MemoryChatStore()
+    session = store.new_session(underwriter_id=1, loan_case_id=7)
+
+    assert store.get_session(session.session_id, 1) is None
+    assert store.list_sessions(1) == []
+
+    assert store.append(session, [("user", "hi"), ("model", "hello")]) == [1, 2]
+    stored = store.get_session(session.session_id, 1)
+    assert stored.message_count == 2
+    assert stored.loan_case_id == 7
+    assert [s.session_id for s in store.list_sessions(1)] == [session.session_id]
+
+
+def test_appends_continue_the_sequence():
+    store = MemoryChatStore()
+    session = store.create_session(1)
+    store.append(session, [("user", "a"), ("model", "b")])
+
+    assert store.append(session, [("user", "c"), ("model", "d")]) == [3, 4]
+    assert [m.text for m in store.list_messages(session.session_id)] == ["a", "b", "c", "d"]
+
+
+def test_sessions_are_private_to_their_underwriter():
+    store = MemoryChatStore()
+    session = store.create_session(1)
+    store.append(session, [("user", "a")])
+
+    assert store.get_session(session.session_id, 2) is None
+    assert store.list_sessions(2) == []
+
+
+def test_list_sessions_skips_empty_sessions_and_filters_by_case():
+    store = MemoryChatStore()
+    empty = store.create_session(1, loan_case_id=5)
+    on_case = store.create_session(1, loan_case_id=5)
+    other_case = store.create_session(1, loan_case_id=6)
+    store.append(on_case, [("user", "a")])
+    store.append(other_case, [("user", "b")])
+
+    listed = [s.session_id for s in store.list_sessions(1, loan_case_id=5)]
+    assert listed == [on_case.session_id]
+    assert empty.session_id not in [s.session_id for s in store.list_sessions(1)]
+
+
+def test_list_messages_pages_newest_first_windows():
+    store = MemoryChatStore()
+    session = store.create_session(1)
+    store.append(session, [("user" if n % 2 else "model", str(n)) for n in range(1, 11)])
+
+    newest = store.list_messages(session.session_id, limit=3)
+    assert [m.seq for m in newest] == [8, 9, 10]
+    older = store.list_messages(session.session_id, before_seq=newest[0].seq, limit=3)
+    assert [m.seq for m in older] == [5, 6, 7]
+    after_summary = store.list_messages(session.session_id, after_seq=8, limit=50)
+    assert [m.seq for m in after_summary] == [9, 10]
+
+
+def test_save_summary_never_moves_backwards():
+    store = MemoryChatStore()
+    session = store.create_session(1)
+    store.append(session, [("user", "a"), ("model", "b"), ("user", "c"), ("model", "d")])
+
+    store.save_summary(session.session_id, "through four", 4)
+    store.save_summary(session.session_id, "through two", 2)
+
+    stored = store.get_session(session.session_id, 1)
+    assert (stored.summary, stored.summary_through_seq) == ("through four", 4)
+
+
+def test_returned_sessions_are_copies():
+    store = MemoryChatStore()
+    session = store.create_session(1)
+    store.append(session, [("user", "a")])
+
+    copy = store.get_session(session.session_id, 1)
+    copy.message_count = 99
+    assert store.get_session(session.session_id, 1).message_count == 1
@@ -0,0 +1,169 @@
+import asyncio
+from app.llm.chat_store import MemoryChatStore
+from app.llm.conversation import ConversationManager
+from app.llm.fake_client import FakeClient
+
+MODEL = "gemini-2.0-flash"
+
+
+def exchange(conversation, n, chars=200):
+    conversation.add_user_message(f"question {n} " + "q" * chars)
+    conversation.add_model_message(f"answer {n} " + "a" * chars)
+
+
+def roles(contents):
+    return [content.role for content in contents]
+
+
+def test_short_conversation_is_sent_verbatim():
+    async def scenario():
+        conversation = ConversationManager(FakeClient(), MODEL, max_tokens=1000, recent_tokens=500)
+        exchange(conversation, 1, chars=20)
+        conversation.add_user_message("next")
+
+        contents = conversation.contents()
+        assert roles(contents) == ["user", "model", "user"]
+        assert conversation.system_instruction() is None
+        assert conversation.stats()["folding_turns"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_compaction_folds_whole_exchanges_into_a_summary():
+    async def scenario():
+        conversation = ConversationManager(
+            FakeClient(), MODEL, max_tokens=400, recent_tokens=120, summary_max_tokens=64
+        )
+        for n in range(4):
+            exchange(conversation, n)
+        # The window only holds the latest exchange; older ones are being summarized
+        assert roles(conversation._recent) == ["user", "model"]
+        assert conversation.stats()["folding_turns"] == 6
+
+        await conversation.close(timeout=5)
+
+        assert conversation.summary
+        assert conversation.stats()["folding_turns"] == 0
+        assert conversation.system_instruction().endswith(conversation.summary)
+        contents = conversation.contents()
+        assert roles(contents)[0] == "user"
+        assert conversation.stats()["context_tokens"] <= conversation.max_tokens
+
+    asyncio.run(scenario())
+
+
+def test_contents_respect_the_token_ceiling_before_the_summary_lands():
+    async def scenario():
+        conversation = ConversationManager(FakeClient(), MODEL, max_tokens=200, recent_tokens=150)
+        for n in range(6):
+            exchange(conversation, n)
+        contents = conversation.contents()
+
+        assert conversation._last_estimate <= conversation.max_tokens
+        assert roles(contents)[0] == "user"
+        # The newest turn always survives the ceiling
+        assert contents[-1].parts[0].text.startswith("answer 5")
+        await conversation.close(timeout=5)
+
+    asyncio.run(scenario())
+
+
+def test_discard_last_drops_an_unanswered_message():
+    async def scenario():
+        store = MemoryChatStore()
+        session = store.new_session(1)
+        conversation = ConversationManager(FakeClient(), MODEL, store=store, session=session)
+        exchange(conversation, 1, chars=10)
+        await conversation.persist()
+        conversation.add_user_message("never answered")
+
+        conversation.discard_last()
+        await conversation.persist()
+
+        assert [m.role for m in store.list_messages(session.session_id)] == ["user", "model"]
+
+    asyncio.run(scenario())
+
+
+def test_resume_loads_the_stored_turns():
+    async def scenario():
+        store = MemoryChatStore()
+        session = store.new_session(1, loan_case_id=3)
+        first = ConversationManager(FakeClient(), MODEL, owner=1, store=store, session=session)
+        for n in range(3):
+            exchange(first, n, chars=10)
+        await first.persist()
+
+        stored = store.get_session(session.session_id, 1)
+        resumed = ConversationManager(FakeClient(), MODEL, owner=1, store=store, session=stored)
+        await resumed.load_history()
+
+        assert resumed.session_id == session.session_id
+        assert [t.seq for t in resumed._recent] == [1, 2, 3, 4, 5, 6]
+        assert [t.text for t in resumed._recent] == [t.text for t in first._recent]
+
+    asyncio.run(scenario())
+
+
+def test_resume_starts_from_the_summary():
+    async def scenario():
+        store = MemoryChatStore()
+        session = store.new_session(1)
+        store.append(session, [("user", "old question"), ("model", "old answer"),
+                               ("user", "new question"), ("model", "new answer")])
+        store.save_summary(session.session_id, "They discussed the old question.", 2)
+
+        resumed = ConversationManager(
+            FakeClient(), MODEL, store=store, session=store.get_session(session.session_id, 1)
+        )
+        await resumed.load_history()
+
+        assert resumed.summary == "They discussed the old question."
+        assert [t.text for t in resumed._recent] == ["new question", "new answer"]
+
+    asyncio.run(scenario())
+
+
+def test_resume_keeps_only_the_newest_turns_that_fit():
+    async def scenario():
+        store = MemoryChatStore()
+        session = store.new_session(1)
+        store.append(session, [
+            ("user" if n % 2 == 0 else "model", f"turn {n} " + "x" * 400) for n in range(20)
+        ])
+
+        resumed = ConversationManager(
+            FakeClient(), MODEL, store=store, session=store.get_session(session.session_id, 1),
+            max_tokens=500, recent_tokens=500,
+        )
+        await resumed.load_history()
+
+        seqs = [t.seq for t in resumed._recent]
+        assert seqs and seqs[-1] == 20
+        assert seqs == list(range(seqs[0], 21))
+        assert resumed._recent[0].role == "user"
+        assert sum(t.tokens for t in resumed._recent) <= 500
+
+    asyncio.run(scenario())
+
+
+def test_summary_is_stored_through_the_last_persisted_turn():
+    async def scenario():
+        store = MemoryChatStore()
+        session = store.new_session(1)
+        conversation = ConversationManager(
+            FakeClient(), MODEL, store=store, session=session,
+            max_tokens=400, recent_tokens=120, summary_max_tokens=64,
+        )
+        for n in range(4):
+            conversation.add_user_message(f"question {n} " + "q" * 200)
+            conversation.add_model_message(f"answer {n} " + "a" * 200)
+            await conversation.persist()
+        await conversation.close(timeout=5)
+
+        stored = store.get_session(session.session_id, 1)
+        assert stored.summary == conversation.summary
+        # The latest exchange stays verbatim; everything before it is summarized
+        assert stored.summary_through_seq == 6
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from app.llm.governor import LLMGovernor, LLMThrottled, estimate_prompt_tokens
+
+
+def governor(requests_per_minute=600, tokens_per_minute=100_000, **overrides):
+    options = dict(max_wait_seconds=1.0, default_output_tokens=100, quota_cooldown_seconds=0.2)
+    options.update(overrides)
+    return LLMGovernor(requests_per_minute, tokens_per_minute, **options)
+
+
+def test_uncontended_calls_are_granted_at_once():
+    gov = governor()
+    started = time.perf_counter()
+    lease = gov.acquire(500, "interactive")
+
+    assert time.perf_counter() - started < 0.05
+    assert lease.tokens == 500
+    snapshot = gov.snapshot()
+    assert snapshot["requests_available"] == pytest.approx(599, abs=0.1)
+    assert snapshot["tokens_available"] == pytest.approx(99_500, abs=50)
+
+
+def test_waits_past_the_limit_are_throttled():
+    gov = governor(requests_per_minute=1)
+    gov.acquire(10, "batch")
+
+    with pytest.raises(LLMThrottled):
+        gov.acquire(10, "batch", timeout=0.05)
+    assert gov.snapshot()["queued"]["batch"] == 0
+
+
+def test_settle_replaces_the_estimate_with_actual_usage():
+    gov = governor()
+    lease = gov.acquire(1000, "interactive")
+    lease.settle(SimpleNamespace(prompt_token_count=150, candidates_token_count=50, thoughts_token_count=None))
+
+    assert lease.tokens == 200
+    assert gov.snapshot()["tokens_available"] == pytest.approx(99_800, abs=50)
+
+
+def test_estimate_never_exceeds_the_bucket():
+    gov = governor(tokens_per_minute=1000)
+    assert gov.estimate("x" * 100_000) == 1000
+    assert gov.estimate("x" * 400, output_tokens=50) == estimate_prompt_tokens("x" * 400) + 50
+
+
+def test_interactive_calls_are_granted_before_queued_batch_calls():
+    gov = governor(requests_per_minute=60)
+    # A quota error empties the request bucket and pauses grants
+    gov.penalize()
+    order = []
+
+    def call(priority):
+        gov.acquire(10, priority, timeout=5)
+        order.append(priority)
+
+    batch = threading.Thread(target=call, args=("batch",))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=call, args=("interactive",))
+    interactive.start()
+    batch.join()
+    interactive.join()
+
+    assert order == ["interactive", "batch"]
+
+
+def test_async_callers_share_the_queue():
+    async def scenario():
+        gov = governor(requests_per_minute=1)
+        await gov.acquire_async(10, "interactive")
+        with pytest.raises(LLMThrottled):
+            await gov.acquire_async(10, "background", timeout=0.05)
+        assert gov.snapshot()["queued"]["background"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_async_waiters_leave_the_queue():
+    async def scenario():
+        gov = governor(requests_per_minute=1)
+        await gov.acquire_async(10, "interactive")
+        waiting = asyncio.ensure_future(gov.acquire_async(10, "interactive", timeout=5))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert gov.snapshot()["queued"]["interactive"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_quota_errors_inside_a_reservation_pause_grants():
+    from google.genai import errors
+
+    gov = governor()
+    quota_error = errors.ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+    with pytest.raises(errors.ClientError):
+        with gov.reserve("prompt", "interactive"):
+            raise quota_error
+
+    assert gov.snapshot()["paused_seconds"] > 0
+    with pytest.raises(LLMThrottled):
+        gov.acquire(10, "interactive", timeout=0.05)
+
+
+def test_disabled_governor_never_waits():
+    gov = governor(requests_per_minute=1, enabled=False)
+    for _ in range(5):
+        assert gov.acquire(10, "batch", timeout=0).tokens == 0
@@ -0,0 +1,97 @@
+from app.auth.rate_limit import MemoryRateLimitBackend, RateLimiter, counter_key
+
+WINDOW = 60
+
+
+def limiter(email_limit=3, ip_limit=100, backend=None):
+    return RateLimiter(
+        backend or MemoryRateLimitBackend(), WINDOW, {"login": {"email": email_limit, "ip": ip_limit}}
+    )
+
+
+def login(rate_limiter, now, email="a@example.com", ip="10.0.0.1"):
+    return rate_limiter.check("login", {"email": email, "ip": ip}, now=now)
+
+
+def test_allows_up_to_the_limit_then_rejects():
+    rate_limiter = limiter()
+    assert [login(rate_limiter, 10) for _ in range(3)] == [None, None, None]
+    assert login(rate_limiter, 10) > 0
+
+
+def test_keys_are_limited_independently():
+    rate_limiter = limiter()
+    for _ in range(4):
+        login(rate_limiter, 10)
+    assert login(rate_limiter, 10, email="b@example.com") is None
+
+
+def test_previous_window_counts_by_its_remaining_overlap():
+    rate_limiter = limiter()
+    for _ in range(3):
+        login(rate_limiter, 10)
+
+    # 10s into the next window: 3 * 50/60 + 1 = 3.5 attempts in the last minute
+    assert login(rate_limiter, WINDOW + 10) is not None
+    # 55s in: 3 * 5/60 + 2 is back under the limit
+    assert login(rate_limiter, WINDOW + 55) is None
+
+
+def test_retry_after_is_when_the_next_attempt_is_allowed():
+    rate_limiter = limiter()
+    for _ in range(3):
+        login(rate_limiter, 10)
+    retry_after = login(rate_limiter, WINDOW + 10)
+
+    assert login(rate_limiter, WINDOW + 10 + retry_after) is None
+
+
+def test_rejected_attempts_keep_counting():
+    rate_limiter = limiter()
+    for _ in range(10):
+        login(rate_limiter, 10)
+    # 10 * 30/60 + 1; counting only the allowed attempts would give 3 * 30/60 + 1, under the limit
+    assert login(rate_limiter, WINDOW + 30) is not None
+
+
+def test_counters_older_than_the_previous_window_are_forgotten():
+    rate_limiter = limiter()
+    for _ in range(10):
+        login(rate_limiter, 10)
+    assert login(rate_limiter, 2 * WINDOW + 10) is None
+
+
+def test_backend_failures_fail_open():
+    class BrokenBackend:
+        def hit(self, key, window_start, window):
+            raise ConnectionError("counter store down")
+
+    rate_limiter = limiter(email_limit=1, backend=BrokenBackend())
+    assert [login(rate_limiter, 10) for _ in range(5)] == [None] * 5
+    assert rate_limiter.snapshot()["backend_errors"] == 10
+
+
+def test_decisions_are_reported_per_key_type():
+    rate_limiter = limiter(email_limit=1)
+    login(rate_limiter, 10)
+    login(rate_limiter, 10)
+
+    decisions = rate_limiter.snapshot()["decisions"]
+    assert decisions["login:email"] == {"allowed": 1, "limited": 1}
+    assert decisions["login:ip"] == {"allowed": 2, "limited": 0}
+
+
+def test_counter_keys_have_a_fixed_length():
+    short = counter_key("login", "email", "a@example.com")
+    long = counter_key("login", "email", "a" * 10000 + "@example.com")
+    assert len(short) == len(long)
+    assert short != long
+
+
+def test_memory_backend_sweeps_stale_keys():
+    backend = MemoryRateLimitBackend()
+    for n in range(backend.SWEEP_EVERY - 1):
+        backend.hit(f"old-{n}", 0, WINDOW)
+    # The sweep on the next hit drops keys last seen before the previous window
+    backend.hit("new", 3 * WINDOW, WINDOW)
+    assert list(backend._counters) == ["new"]
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import io
+import os
+import zipfile
+import pytest
+from fastapi import UploadFile
+from app.utils.zip_utils import (
+    SNIFF_BYTES,
+    ArchiveLimitError,
+    ArchiveLimits,
+    ExtractionBudget,
+    MemberStream,
+    check_archive,
+    extract_member,
+    save_upload_to_disk,
+)
+
+CHUNK = 4096
+
+
+def limits(**overrides):
+    options = dict(
+        max_archive_bytes=1024 * 1024,
+        max_members=10,
+        max_total_uncompressed_bytes=1024 * 1024,
+        max_compression_ratio=100.0,
+        chunk_bytes=CHUNK,
+    )
+    options.update(overrides)
+    return ArchiveLimits(**options)
+
+
+def archive(members: dict) -> zipfile.ZipFile:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        for name, data in members.items():
+            zip_ref.writestr(name, data)
+    return zipfile.ZipFile(buffer)
+
+
+def test_check_archive_returns_files_only():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_ref:
+        zip_ref.writestr("docs/", b"")
+        zip_ref.writestr("docs/a.pdf", b"%PDF")
+    members = check_archive(zipfile.ZipFile(buffer), limits())
+    assert [info.filename for info in members] == ["docs/a.pdf"]
+
+
+def test_too_many_members_are_rejected():
+    zip_ref = archive({f"{n}.txt": b"x" for n in range(11)})
+    with pytest.raises(ArchiveLimitError, match="more than 10 files"):
+        check_archive(zip_ref, limits())
+
+
+def test_declared_total_size_is_capped():
+    zip_ref = archive({"a.bin": os.urandom(6000), "b.bin": os.urandom(6000)})
+    with pytest.raises(ArchiveLimitError, match="expands beyond"):
+        check_archive(zip_ref, limits(max_total_uncompressed_bytes=10_000))
+
+
+def test_suspicious_compression_ratio_is_rejected():
+    zip_ref = archive({"bomb.bin": b"\0" * (2 * 1024 * 1024)})
+    with pytest.raises(ArchiveLimitError, match="compression ratio"):
+        check_archive(zip_ref, limits(max_total_uncompressed_bytes=4 * 1024 * 1024))
+
+
+def test_small_compressible_members_are_allowed():
+    zip_ref = archive({"notes.txt": b"a" * (CHUNK - 1)})
+    assert len(check_archive(zip_ref, limits())) == 1
+
+
+def test_budget_counts_bytes_actually_decompressed():
+    zip_ref = archive({"a.bin": os.urandom(3000), "b.bin": os.urandom(3000)})
+    members = check_archive(zip_ref, limits())
+    # Both fit the declared-size check; the running budget only holds one
+    budget = ExtractionBudget(limits(max_total_uncompressed_bytes=5000))
+    budget.consume(members[0], 3000, 3000)
+    with pytest.raises(ArchiveLimitError, match="expands beyond"):
+        budget.consume(members[1], 3000, 3000)
+
+
+def test_members_larger_than_declared_are_rejected():
+    zip_ref = archive({"a.bin": os.urandom(100)})
+    info = zip_ref.infolist()[0]
+    with pytest.raises(ArchiveLimitError, match="larger than its declared size"):
+        ExtractionBudget(limits()).consume(info, info.file_size + 1, 1)
+
+
+def test_extract_member_hashes_what_it_writes(tmp_path):
+    data = os.urandom(10_000)
+    zip_ref = archive({"../escape.pdf": data})
+    path, sha256 = extract_member(zip_ref, zip_ref.infolist()[0], str(tmp_path), ExtractionBudget(limits()))
+
+    assert os.path.dirname(path) == str(tmp_path)
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    with open(path, "rb") as f:
+        assert f.read() == data
+
+
+def test_member_stream_replays_the_header_and_hashes_the_content():
+    data = os.urandom(SNIFF_BYTES * 3 + 17)
+    zip_ref = archive({"a.pdf": data})
+    budget = ExtractionBudget(limits())
+    stream = MemberStream(zip_ref, zip_ref.infolist()[0], budget)
+
+    assert stream.header == data[:SNIFF_BYTES]
+    read = b"".join(iter(lambda: stream.read(1000), b""))
+    stream.close()
+
+    assert read == data
+    assert stream.sha256 == hashlib.sha256(data).hexdigest()
+    assert budget.remaining == 1024 * 1024 - len(data)
+
+
+def test_member_stream_records_a_broken_budget():
+    zip_ref = archive({"a.bin": os.urandom(SNIFF_BYTES * 4)})
+    stream = MemberStream(zip_ref, zip_ref.infolist()[0], ExtractionBudget(limits(max_total_uncompressed_bytes=SNIFF_BYTES * 2)))
+
+    with pytest.raises(ArchiveLimitError):
+        stream.read()
+    assert isinstance(stream.limit_error, ArchiveLimitError)
+    stream.close()
+
+
+def test_oversized_uploads_are_refused_while_saving(tmp_path):
+    async def save(size, declared):
+        upload = UploadFile(io.BytesIO(b"x" * size), size=declared)
+        return await save_upload_to_disk(upload, str(tmp_path / "upload.zip"), limits(max_archive_bytes=10_000))
+
+    assert asyncio.run(save(10_000, 10_000)) == 10_000
+    # Rejected on the declared size, and again on the bytes when the size is missing or wrong
+    for declared in (20_000, None, 5_000):
+        with pytest.raises(ArchiveLimitError) as raised:
+            asyncio.run(save(20_000, declared))
+        assert raised.value.status_code == 413